@@ -47,15 +47,32 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.RequestTimingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    'core.middleware.BrowserMiddleware',
+]
+
+# Run by core.middleware.BrowserMiddleware, for the admin and the docs.
+# The API authenticates with tokens, so requests under TOKEN_ONLY_PATHS
+# don't go through them
+BROWSER_MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+TOKEN_ONLY_PATHS = ['/api/', '/metrics/']
+
+# The admin checks look for the sessions, auth and messages middleware
+# in MIDDLEWARE, they are in BROWSER_MIDDLEWARE
+SILENCED_SYSTEM_CHECKS = ['admin.E408', 'admin.E409', 'admin.E410']
+
 ROOT_URLCONF = 'app.urls'
 
 TEMPLATES = [
@@ -86,11 +103,59 @@ DATABASES = {
         'HOST': os.environ.get('DB_HOST'),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
-        'PASSWORD': os.environ.get('DB_PASS')
+        'PASSWORD': os.environ.get('DB_PASS'),
+        # Keep connections open between requests instead of paying
+        # for a new one every time
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
 
+# Read replicas, as a comma-separated list of hosts sharing the name and
+# credentials of the primary. Safe-method requests read from them, see
+# core.routers. In tests they mirror the default database.
+DB_REPLICA_HOSTS = [
+    host.strip() for host in os.environ.get('DB_REPLICA_HOSTS', '').split(',')
+    if host.strip()
+]
+for index, host in enumerate(DB_REPLICA_HOSTS):
+    DATABASES['replica_%d' % index] = dict(
+        DATABASES['default'], HOST=host, TEST={'MIRROR': 'default'}
+    )
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Caches. Everything the API caches for a user, like the review list
+# versions, has to be seen by every worker, so set MEMCACHED_LOCATION
+# (host:port, comma-separated for several servers) to share it. Without
+# it each process has its own in-memory cache, which is only right for
+# a single worker like runserver.
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': MEMCACHED_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Users who wrote something read from the primary for this long, so
+# they see their writes while the replicas catch up. The CACHES alias
+# has to be shared by every worker.
+DATABASE_REPLICA_STICKY_SECONDS = int(
+    os.environ.get('DATABASE_REPLICA_STICKY_SECONDS', 5)
+)
+DATABASE_STICKY_CACHE_ALIAS = os.environ.get(
+    'DATABASE_STICKY_CACHE_ALIAS', 'default'
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -130,3 +195,78 @@ USE_TZ = True
 STATIC_URL = '/static/'
 
 AUTH_USER_MODEL = 'core.User'
+
+# Resolved auth tokens are kept in a per-process LRU so authenticated
+# requests skip the token+user query. Set TOKEN_CACHE_SHARED_ALIAS to a
+# CACHES alias to also share them between workers.
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 10000))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 30))
+TOKEN_CACHE_SHARED_ALIAS = os.environ.get('TOKEN_CACHE_SHARED_ALIAS')
+
+# Default number of reviews per page, clients can ask for up to 500
+REVIEW_PAGE_SIZE = int(os.environ.get('REVIEW_PAGE_SIZE', 50))
+
+# CACHES alias holding the per-user review list versions used for the
+# list ETags. It must be shared by every worker, `manage.py check
+# --deploy` warns when it is an in-process cache.
+REVIEW_LIST_VERSION_CACHE_ALIAS = os.environ.get(
+    'REVIEW_LIST_VERSION_CACHE_ALIAS', 'default'
+)
+
+# CACHES alias holding the closed buckets of the rating trends, which
+# don't expire, and the versions invalidating them. Like the list
+# versions, it should be shared by every worker.
+REVIEW_TREND_CACHE_ALIAS = os.environ.get(
+    'REVIEW_TREND_CACHE_ALIAS', 'default'
+)
+
+# Queries slower than SLOW_QUERY_MS are kept, per worker, in a ring
+# buffer of SLOW_QUERY_LOG_SIZE entries readable by staff users
+SLOW_QUERY_MS = float(os.environ.get('SLOW_QUERY_MS', 100))
+SLOW_QUERY_LOG_SIZE = int(os.environ.get('SLOW_QUERY_LOG_SIZE', 1000))
+
+# Request metrics served at /metrics/. With several worker processes set
+# METRICS_DIR to a directory they all write to (emptied on deploys), so
+# the endpoint adds up every worker. Only staff users sending their
+# token and the addresses in METRICS_ALLOWED_IPS (comma-separated, none
+# by default) may read the endpoint.
+METRICS_DIR = os.environ.get('METRICS_DIR') or None
+METRICS_FLUSH_SECONDS = float(os.environ.get('METRICS_FLUSH_SECONDS', 1))
+METRICS_ALLOWED_IPS = [
+    ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',')
+    if ip.strip()
+]
+
+# Write-behind mode for review creation: new reviews are validated,
+# queued in the worker and answered with 202, and a background thread
+# writes them in batches of BATCH_SIZE rows or every INTERVAL_MS. When
+# QUEUE_SIZE reviews are waiting, requests wait up to PUT_TIMEOUT_MS
+# for room and are then answered with 429.
+REVIEW_WRITE_BEHIND = os.environ.get('REVIEW_WRITE_BEHIND', '') == '1'
+REVIEW_WRITE_BEHIND_QUEUE_SIZE = int(
+    os.environ.get('REVIEW_WRITE_BEHIND_QUEUE_SIZE', 10000)
+)
+REVIEW_WRITE_BEHIND_BATCH_SIZE = int(
+    os.environ.get('REVIEW_WRITE_BEHIND_BATCH_SIZE', 500)
+)
+REVIEW_WRITE_BEHIND_INTERVAL_MS = int(
+    os.environ.get('REVIEW_WRITE_BEHIND_INTERVAL_MS', 50)
+)
+REVIEW_WRITE_BEHIND_PUT_TIMEOUT_MS = int(
+    os.environ.get('REVIEW_WRITE_BEHIND_PUT_TIMEOUT_MS', 1000)
+)
+
+# Responses of COMPRESSION_CONTENT_TYPES are gzipped at COMPRESSION_LEVEL
+# (1 fastest to 9 smallest) for clients sending Accept-Encoding: gzip.
+# Bodies under COMPRESSION_MIN_SIZE bytes are sent as is, streaming ones
+# like the exports are compressed as they are sent.
+COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', 6))
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_CONTENT_TYPES = [
+    'application/json', 'application/x-ndjson', 'text/csv',
+]
+
+# Check the databases answer and fill the URL, serializer and
+# ContentType caches when the WSGI application is loaded, see
+# core.warmup. `manage.py warm_up` reports how long it takes.
+WARM_UP_ON_START = os.environ.get('WARM_UP_ON_START', '1') == '1'
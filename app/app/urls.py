@@ -16,9 +16,13 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import MetricsView
+
 urlpatterns = [
     path('admin/doc/', include('django.contrib.admindocs.urls')),
     path('admin/', admin.site.urls),
     path('api/user/', include('user.urls')),
     path('api/review/', include('review.urls')),
+    path('api/core/', include('core.urls')),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
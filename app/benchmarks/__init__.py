@@ -0,0 +1,5 @@
+"""Benchmarks for the API, run with `python manage.py benchmark <name>`.
+
+Every module in this package exposes `run(command, **options)` and is
+executed against a throwaway test database, so it never touches real data.
+"""
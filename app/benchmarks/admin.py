@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from core.admin import ReviewAdmin, UserAdmin
+
+from benchmarks.utils import bench_email, sample_user, seed_reviews, \
+                             measure, write_table
+
+
+REVIEW_CHANGELIST_URL = reverse('admin:core_review_changelist')
+USER_CHANGELIST_URL = reverse('admin:core_user_changelist')
+
+
+def seed_users(count, batch_size=5000):
+    """Insert `count` users with unusable passwords in batches"""
+    User = get_user_model()
+    for start in range(0, count, batch_size):
+        User.objects.bulk_create(
+            User(email=bench_email('user%07d' % i), password='!')
+            for i in range(start, min(start + batch_size, count))
+        )
+
+
+def changelist(client, url, params):
+    """Load a changelist page, returning the number of queries run"""
+    with CaptureQueriesContext(connection) as captured:
+        res = client.get(url, params)
+    assert res.status_code == 200, res.status_code
+    return len(captured)
+
+
+def run(command, rows=None, **options):
+    """Latency and queries of the review and user changelists, with
+       the estimated counts and with exact COUNT(*) pagination"""
+    rows = rows or 1000000
+    user = sample_user()
+    seed_reviews(user, rows)
+    seed_users(rows // 10)
+    command.stdout.write('Seeded %d reviews and %d users' % (
+        rows, rows // 10
+    ))
+
+    admin_user = get_user_model().objects.create_superuser(
+        bench_email('admin'), 'benchpass'
+    )
+    client = Client()
+    client.force_login(admin_user)
+
+    pages = [
+        ('review list', REVIEW_CHANGELIST_URL, {}),
+        ('review search', REVIEW_CHANGELIST_URL, {'q': 'Review 0000042'}),
+        ('rating filter', REVIEW_CHANGELIST_URL, {'rating': 3}),
+        ('date drilldown', REVIEW_CHANGELIST_URL, {
+            'submission_date__year': timezone.now().year,
+        }),
+        ('user list', USER_CHANGELIST_URL, {}),
+        ('user search', USER_CHANGELIST_URL, {
+            'q': bench_email('user0000042'),
+        }),
+    ]
+
+    table = []
+    for name, url, params in pages:
+        queries = changelist(client, url, params)
+        estimated = measure(lambda: client.get(url, params), 5)
+        with mock.patch.object(ReviewAdmin, 'paginator', Paginator), \
+                mock.patch.object(UserAdmin, 'paginator', Paginator):
+            exact = measure(lambda: client.get(url, params), 5)
+        table.append([name, queries, '%.2f' % estimated, '%.2f' % exact])
+
+    write_table(
+        command, ['page', 'queries', 'estimated ms', 'exact ms'], table
+    )
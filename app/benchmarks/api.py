@@ -0,0 +1,213 @@
+import json
+import random
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.utils import bench_email, seed_reviews, write_table
+
+
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+REVIEW_URL = reverse('review:review-list')
+
+PASSWORD = 'benchpass'
+
+# Most SQL queries a single request of each endpoint may run, once the
+# token cache is warm
+QUERY_BUDGETS = {
+    'token': 2,
+    'me': 0,
+    'review list': 1,
+    # the sequence number, the review and its company rating
+    'review create': 4,
+}
+
+# Requests checked against the query budgets before timing
+QUERY_SAMPLES = 5
+
+# Transaction control logged as queries by some backends (SQLite logs
+# a BEGIN for every atomic block), not counted against the budgets
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT',
+                          'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--users', type=int, default=100,
+        help='Number of synthetic users, the rows are split among them'
+    )
+    parser.add_argument(
+        '--requests', type=int, default=500,
+        help='Number of timed requests per endpoint'
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help='Seed picking the user of every request'
+    )
+    parser.add_argument(
+        '--baseline', default=None,
+        help='JSON file with the p95 latencies to compare with'
+    )
+    parser.add_argument(
+        '--save-baseline', default=None,
+        help='Write the p95 latencies of this run to a JSON file'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=0.25,
+        help='How much slower than the baseline p95 is still fine'
+    )
+
+
+def seed_users(count, rows):
+    """Create users sharing one password hash, each with a token,
+       and split `rows` reviews among them"""
+    password = make_password(PASSWORD)
+    emails = [bench_email('bench%d' % i) for i in range(count)]
+    users = get_user_model().objects.bulk_create(
+        get_user_model()(
+            email=email, name='Bench %d' % i, password=password,
+        )
+        for i, email in enumerate(emails)
+    )
+    if not users[0].pk:
+        # Only PostgreSQL returns the ids of bulk-created rows
+        users = list(get_user_model().objects.filter(
+            email__in=emails
+        ).order_by('id'))
+    Token.objects.bulk_create(
+        Token(key=Token.generate_key(), user=user) for user in users
+    )
+    for user in users:
+        seed_reviews(user, rows // count)
+    return {
+        token.user_id: (token.user.email, token.key)
+        for token in Token.objects.select_related('user').filter(
+            user__in=users
+        )
+    }
+
+
+def endpoints(users):
+    """Callables issuing one request of each endpoint for a user"""
+    def token(client, email, key):
+        return client.post(TOKEN_URL, {'email': email, 'password': PASSWORD})
+
+    def me(client, email, key):
+        return client.get(ME_URL, HTTP_AUTHORIZATION='Token ' + key)
+
+    def review_list(client, email, key):
+        return client.get(REVIEW_URL, HTTP_AUTHORIZATION='Token ' + key)
+
+    def review_create(client, email, key):
+        return client.post(REVIEW_URL, {
+            'title': 'Benchmark review',
+            'rating': 4,
+            'summary': 'x' * 200,
+            'company': 'Company 0',
+        }, HTTP_AUTHORIZATION='Token ' + key)
+
+    return [
+        ('token', token, 200),
+        ('me', me, 200),
+        ('review list', review_list, 200),
+        ('review create', review_create, 201),
+    ]
+
+
+def count_queries(captured):
+    """Queries run, transaction control statements aside"""
+    return sum(
+        1 for query in captured.captured_queries
+        if not query['sql'].upper().startswith(TRANSACTION_STATEMENTS)
+    )
+
+
+def percentile(timings, percent):
+    return statistics.quantiles(timings, n=100)[percent - 1]
+
+
+def run(command, rows=None, users=100, requests=500, seed=0,
+        baseline=None, save_baseline=None, tolerance=0.25, **options):
+    """Drive the main API endpoints in-process, reporting throughput,
+       latency percentiles and SQL queries per request"""
+    rows = rows or 100000
+    credentials = list(seed_users(users, rows).values())
+    command.stdout.write('Seeded %d users and %d reviews'
+                         % (users, rows // users * users))
+
+    client = APIClient()
+    failures = []
+    results = {}
+    table = []
+    for name, request, status in endpoints(credentials):
+        picker = random.Random(seed)
+
+        # Warm up the token cache of every user, then count queries
+        for email, key in credentials:
+            request(client, email, key)
+        queries = 0
+        for _ in range(QUERY_SAMPLES):
+            with CaptureQueriesContext(connection) as captured:
+                request(client, *picker.choice(credentials))
+            queries = max(queries, count_queries(captured))
+
+        timings = []
+        start = time.perf_counter()
+        for _ in range(requests):
+            email, key = picker.choice(credentials)
+            request_start = time.perf_counter()
+            res = request(client, email, key)
+            timings.append((time.perf_counter() - request_start) * 1000)
+            if res.status_code != status:
+                raise CommandError('%s answered %d' % (name, res.status_code))
+        elapsed = time.perf_counter() - start
+
+        results[name] = {'p95': percentile(timings, 95), 'queries': queries}
+        table.append([
+            name, '%.0f' % (requests / elapsed),
+            '%.2f' % percentile(timings, 50),
+            '%.2f' % percentile(timings, 95),
+            '%.2f' % percentile(timings, 99),
+            queries, QUERY_BUDGETS[name],
+        ])
+        if queries > QUERY_BUDGETS[name]:
+            failures.append('%s ran %d queries, the budget is %d'
+                            % (name, queries, QUERY_BUDGETS[name]))
+
+    write_table(command, [
+        'endpoint', 'req/s', 'p50 ms', 'p95 ms', 'p99 ms', 'queries',
+        'budget',
+    ], table)
+
+    if baseline:
+        with open(baseline) as stream:
+            expected = json.load(stream)
+        for name, result in results.items():
+            if name not in expected:
+                continue
+            limit = expected[name]['p95'] * (1 + tolerance)
+            if result['p95'] > limit:
+                failures.append('%s p95 is %.2fms, the baseline allows %.2fms'
+                                % (name, result['p95'], limit))
+            if result['queries'] > expected[name]['queries']:
+                failures.append('%s ran %d queries, the baseline ran %d'
+                                % (name, result['queries'],
+                                   expected[name]['queries']))
+
+    if save_baseline:
+        with open(save_baseline, 'w') as stream:
+            json.dump(results, stream, indent=2, sort_keys=True)
+        command.stdout.write('Baseline written to %s' % save_baseline)
+
+    if failures:
+        raise CommandError('\n'.join(failures))
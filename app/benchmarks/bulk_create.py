@@ -0,0 +1,52 @@
+import time
+
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Review
+
+from benchmarks.utils import sample_user, write_table
+
+
+REVIEW_URL = reverse('review:review-list')
+
+
+def review_payload(i):
+    """Synthetic review as sent by an ingestion client"""
+    return {
+        'title': 'Review %07d' % i,
+        'rating': i % 5 + 1,
+        'summary': 'x' * 200,
+        'company': 'Company %d' % (i % 100),
+    }
+
+
+def rows_per_second(client, rows, batch):
+    """Create `rows` reviews in POSTs of `batch` items"""
+    start = time.perf_counter()
+    for offset in range(0, rows, batch):
+        if batch == 1:
+            payload = review_payload(offset)
+        else:
+            payload = [
+                review_payload(i) for i in range(offset, offset + batch)
+            ]
+        res = client.post(REVIEW_URL, payload, format='json')
+        assert res.status_code == 201, res.data
+    return rows / (time.perf_counter() - start)
+
+
+def run(command, rows=None, **options):
+    """Compare rows/sec of single-item and batched review creation"""
+    rows = rows or 5000
+    client = APIClient()
+    client.force_authenticate(sample_user())
+
+    table = []
+    for batch in (1, 10, 100, 500, 1000):
+        Review.objects.all().delete()
+        rate = rows_per_second(client, rows, batch)
+        table.append([batch, '%.0f' % rate])
+
+    write_table(command, ['batch size', 'rows/sec'], table)
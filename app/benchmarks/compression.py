@@ -0,0 +1,82 @@
+import random
+from unittest import mock
+
+from django.db import connection
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.fields import get_codec
+from core.models import Review
+
+from benchmarks.search import VOCABULARY
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+REVIEW_URL = reverse('review:review-list')
+
+
+def synthetic_summary(i):
+    """Summary of 150 to 1,500 words"""
+    rng = random.Random(i)
+    return ' '.join(rng.choices(VOCABULARY, k=rng.randint(150, 1500)))
+
+
+def table_sizes():
+    """(total, heap) bytes of the review table, the total counting its
+       TOAST table and indexes. None where the database can't tell"""
+    if connection.vendor != 'postgresql':
+        return None, None
+    with connection.cursor() as cursor:
+        cursor.execute('VACUUM ANALYZE core_review')
+        cursor.execute(
+            "SELECT pg_total_relation_size('core_review'), "
+            "pg_relation_size('core_review')"
+        )
+        return cursor.fetchone()
+
+
+def megabytes(size):
+    return 'n/a' if size is None else '%.1f' % (size / 1024 ** 2)
+
+
+def empty_table():
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('TRUNCATE core_review')
+        else:
+            cursor.execute('DELETE FROM core_review')
+
+
+def run(command, rows=None, page_size=500, **options):
+    """Compare the size of the review table and the list latency with
+       summaries stored raw and compressed with zlib"""
+    rows = rows or 100000
+    user = sample_user()
+    client = APIClient()
+    client.force_authenticate(user)
+    field = Review._meta.get_field('summary')
+
+    table = []
+    for codec in ('raw', 'zlib'):
+        with mock.patch.object(field, 'codec', get_codec(codec)):
+            seed_reviews(user, rows, summary=synthetic_summary)
+        total, heap = table_sizes()
+
+        def full_page():
+            return client.get(REVIEW_URL, {'page_size': page_size})
+
+        def sparse_page():
+            return client.get(REVIEW_URL, {
+                'page_size': page_size, 'fields': 'id,title,rating',
+            })
+
+        table.append([
+            codec, megabytes(total), megabytes(heap),
+            '%.2f' % measure(full_page, 10), '%.2f' % measure(sparse_page, 10),
+        ])
+        empty_table()
+
+    write_table(command, [
+        'codec', 'table MB', 'heap MB', 'full page ms', 'sparse page ms',
+    ], table)
@@ -0,0 +1,57 @@
+import time
+import tracemalloc
+
+from django.core.management.base import CommandError
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from benchmarks.utils import sample_user, seed_reviews, write_table
+
+
+EXPORT_URL = reverse('review:review-export')
+
+# Peak memory allowed while streaming, whatever the number of rows
+MAX_PEAK_BYTES = 16 * 1024 * 1024
+
+
+def export(client, export_type):
+    """Stream a whole export, returning its size in bytes"""
+    res = client.get(EXPORT_URL, {'type': export_type})
+    return sum(len(chunk) for chunk in res.streaming_content)
+
+
+def run(command, rows=None, **options):
+    """Stream exports of every seeded review, reporting throughput
+       and the peak memory allocated while streaming"""
+    rows = rows or 1000000
+    user = sample_user()
+    seed_reviews(user, rows)
+    command.stdout.write('Seeded %d reviews' % rows)
+
+    client = APIClient()
+    client.force_authenticate(user)
+
+    table = []
+    peaks = {}
+    for export_type in ('ndjson', 'csv'):
+        start = time.perf_counter()
+        size = export(client, export_type)
+        elapsed = time.perf_counter() - start
+
+        tracemalloc.start()
+        export(client, export_type)
+        peaks[export_type] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        table.append([
+            export_type, '%.0f' % (rows / elapsed),
+            '%.1f' % (size / 1024 / 1024),
+            '%.1f' % (peaks[export_type] / 1024 / 1024),
+        ])
+
+    write_table(command, ['type', 'rows/sec', 'MB sent', 'peak MB'], table)
+    for export_type, peak in peaks.items():
+        if peak > MAX_PEAK_BYTES:
+            raise CommandError('%s export peaked at %d bytes'
+                               % (export_type, peak))
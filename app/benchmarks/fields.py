@@ -0,0 +1,40 @@
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+REVIEW_URL = reverse('review:review-list')
+
+# Field sets compared, None is the full representation
+FIELD_SETS = [
+    None,
+    'id,title,rating,company',
+    'id,title',
+]
+
+
+def run(command, rows=None, page_size=500, **options):
+    """Compare the size and latency of full and sparse list pages,
+       with summaries close to their 10,000 characters limit"""
+    rows = rows or 20000
+    user = sample_user()
+    seed_reviews(user, rows, summary='x' * 8000)
+    command.stdout.write('Seeded %d reviews' % rows)
+
+    client = APIClient()
+    client.force_authenticate(user)
+
+    table = []
+    for fields in FIELD_SETS:
+        params = {'page_size': page_size}
+        if fields is not None:
+            params['fields'] = fields
+        size = len(client.get(REVIEW_URL, params).content)
+        latency = measure(lambda: client.get(REVIEW_URL, params))
+        table.append([
+            fields or 'all', '%.1f' % (size / 1024), '%.2f' % latency,
+        ])
+
+    write_table(command, ['fields', 'KB per page', 'page ms'], table)
@@ -0,0 +1,64 @@
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.middleware import gzip_compressor
+
+from benchmarks.compression import synthetic_summary
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+REVIEW_URL = reverse('review:review-list')
+
+PAGE_SIZES = (10, 50, 200, 500)
+LEVELS = (1, 6, 9)
+
+
+def gzip_bytes(content, level):
+    compressor = gzip_compressor(level)
+    return compressor.compress(content) + compressor.flush()
+
+
+def run(command, rows=None, **options):
+    """Bytes sent and time spent for review list pages of several sizes,
+       uncompressed and gzipped at several levels"""
+    rows = rows or max(PAGE_SIZES)
+    user = sample_user()
+    seed_reviews(user, rows, summary=synthetic_summary)
+
+    def client_for(level):
+        # The handler reads the level when it builds its middleware
+        with override_settings(COMPRESSION_LEVEL=level):
+            client = APIClient()
+            client.force_authenticate(user)
+            client.get(REVIEW_URL)
+        return client
+
+    clients = {level: client_for(level) for level in LEVELS}
+
+    table = []
+    for page_size in PAGE_SIZES:
+        params = {'page_size': page_size}
+        client = clients[LEVELS[0]]
+        content = client.get(REVIEW_URL, params).content
+        table.append([
+            page_size, 'off', '%.1f' % (len(content) / 1024), '1.00', '-',
+            '%.2f' % measure(lambda: client.get(REVIEW_URL, params)),
+        ])
+        for level, client in clients.items():
+            size = len(client.get(
+                REVIEW_URL, params, HTTP_ACCEPT_ENCODING='gzip'
+            ).content)
+            table.append([
+                page_size, level, '%.1f' % (size / 1024),
+                '%.2f' % (len(content) / size),
+                '%.2f' % measure(lambda: gzip_bytes(content, level)),
+                '%.2f' % measure(lambda: client.get(
+                    REVIEW_URL, params, HTTP_ACCEPT_ENCODING='gzip'
+                )),
+            ])
+
+    write_table(command, [
+        'page size', 'level', 'KB sent', 'ratio', 'gzip ms', 'request ms',
+    ], table)
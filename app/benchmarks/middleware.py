@@ -0,0 +1,105 @@
+import statistics
+
+from django.conf import settings
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+ME_URL = reverse('user:me')
+REVIEW_URL = reverse('review:review-list')
+
+
+def full_stack():
+    """MIDDLEWARE with the browser middleware run for every request,
+       as before BrowserMiddleware"""
+    middleware = []
+    for path in settings.MIDDLEWARE:
+        if path == 'core.middleware.BrowserMiddleware':
+            middleware.extend(settings.BROWSER_MIDDLEWARE)
+        else:
+            middleware.append(path)
+    return middleware
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--session-cookie', action='store_true',
+        help='Send a session cookie along with the token, like the '
+             'browsable API after an admin login'
+    )
+    parser.add_argument(
+        '--rounds', type=int, default=20,
+        help='Rounds alternating the two stacks'
+    )
+    parser.add_argument(
+        '--round-size', type=int, default=100,
+        help='Timed requests per endpoint and stack in every round'
+    )
+
+
+def spread(values):
+    """5th and 95th percentiles of `values`"""
+    cuts = statistics.quantiles(values, n=20, method='inclusive')
+    return cuts[0], cuts[-1]
+
+
+def run(command, rows=None, session_cookie=False, rounds=20,
+        round_size=100, **options):
+    """Per-request time of the API through the full middleware stack
+       vs the token-only one. The stacks take turns over several
+       rounds, so drift in the machine load hits both, and the spread
+       of the rounds tells a saving from noise"""
+    rows = rows or 50
+    user = sample_user()
+    seed_reviews(user, rows)
+    token = Token.objects.create(user=user)
+
+    stacks = [('full', full_stack()), ('token-only', settings.MIDDLEWARE)]
+    urls = [('me', ME_URL), ('review list', REVIEW_URL)]
+    clients = {}
+    for stack, middleware in stacks:
+        with override_settings(MIDDLEWARE=middleware):
+            client = APIClient()
+            if session_cookie:
+                client.force_login(user)
+            client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+            # The handler builds its middleware chain on the first
+            # request and keeps it once the settings are restored
+            for name, url in urls:
+                client.get(url)
+            clients[stack] = client
+
+    timings = {
+        (stack, name): [] for stack, _ in stacks for name, _ in urls
+    }
+    for round_number in range(rounds):
+        # Alternate which stack goes first
+        order = stacks if round_number % 2 == 0 else stacks[::-1]
+        for name, url in urls:
+            for stack, _ in order:
+                client = clients[stack]
+                timings[stack, name].append(
+                    measure(lambda: client.get(url), round_size)
+                )
+
+    table = []
+    for name, url in urls:
+        full = timings['full', name]
+        lean = timings['token-only', name]
+        saved = [a - b for a, b in zip(full, lean)]
+        low, high = spread(saved)
+        table.append([
+            name, '%.1f' % (statistics.median(full) * 1000),
+            '%.1f' % (statistics.median(lean) * 1000),
+            '%.1f' % (statistics.median(saved) * 1000),
+            '%.1f..%.1f' % (low * 1000, high * 1000),
+        ])
+    write_table(command, [
+        'endpoint', 'full us', 'token-only us', 'saved us',
+        'saved p5..p95 us',
+    ], table)
@@ -0,0 +1,35 @@
+from core.models import Review
+from review.pagination import KeysetPagination
+
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+def run(command, rows=None, page_size=50, **options):
+    """Compare keyset and OFFSET page latency at increasing depths.
+       Both fetch the page straight from the ORM, so only the way
+       the page is sought differs"""
+    rows = rows or 100000
+    user = sample_user()
+    seed_reviews(user, rows)
+    command.stdout.write('Seeded %d reviews' % rows)
+
+    paginator = KeysetPagination()
+    queryset = Review.objects.filter(reviewer=user).order_by(
+        *paginator.ordering
+    )
+
+    table = []
+    depth = page_size
+    while depth < rows:
+        # The page right after the review at `depth`, like a cursor
+        position = paginator.get_position(queryset[depth - 1])
+        keyset = measure(lambda: list(paginator.get_page_queryset(
+            queryset, position, False
+        )[:page_size + 1]))
+        offset = measure(
+            lambda: list(queryset[depth:depth + page_size + 1])
+        )
+        table.append([depth, '%.2f' % keyset, '%.2f' % offset])
+        depth *= 4
+
+    write_table(command, ['depth', 'keyset ms', 'offset ms'], table)
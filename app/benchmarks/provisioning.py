@@ -0,0 +1,70 @@
+import os
+import time
+
+from django.contrib.auth import get_user_model
+
+from user.provisioning import HashingPool, provision_users
+
+from benchmarks.utils import bench_email, write_table
+
+
+PASSWORD = 'benchpass'
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--max-workers', type=int, default=os.cpu_count() or 1,
+        help='Largest number of hashing processes tried'
+    )
+
+
+def worker_counts(max_workers):
+    """1, 2, 4... up to and including `max_workers`"""
+    counts = []
+    workers = 1
+    while workers < max_workers:
+        counts.append(workers)
+        workers *= 2
+    return counts + [max_workers]
+
+
+def unsaved_users(prefix, count):
+    User = get_user_model()
+    return [
+        User(email=bench_email('%s%d' % (prefix, i)), name='Bench %d' % i)
+        for i in range(count)
+    ]
+
+
+def run(command, rows=None, max_workers=None, batch_size=1000, **options):
+    """Users created per second one by one with create_user, like the
+       create endpoint, vs in batches hashing the passwords in 1, 2, 4...
+       processes"""
+    rows = rows or 1000
+    max_workers = max_workers or os.cpu_count() or 1
+    User = get_user_model()
+
+    # One by one on a tenth of the rows, it is the slowest by far
+    count = max(1, rows // 10)
+    start = time.perf_counter()
+    for i in range(count):
+        User.objects.create_user(bench_email('one%d' % i), PASSWORD)
+    one_by_one = count / (time.perf_counter() - start)
+    table = [['create_user', '-', '%.0f' % one_by_one, '1.00']]
+
+    for workers in worker_counts(max_workers):
+        users = unsaved_users('w%d-' % workers, rows)
+        # Workers start on the first batch, like in a run of the command
+        with HashingPool(workers) as pool:
+            start = time.perf_counter()
+            for offset in range(0, rows, batch_size):
+                batch = users[offset:offset + batch_size]
+                provision_users(batch, [PASSWORD] * len(batch), pool)
+            elapsed = time.perf_counter() - start
+        table.append([
+            'provision_users', workers, '%.0f' % (rows / elapsed),
+            '%.2f' % (rows / elapsed / one_by_one),
+        ])
+
+    command.stdout.write('%d CPUs' % (os.cpu_count() or 1))
+    write_table(command, ['method', 'workers', 'users/s', 'speedup'], table)
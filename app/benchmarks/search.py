@@ -0,0 +1,78 @@
+import random
+
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Review
+from core.search import search_reviews
+
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+REVIEW_URL = reverse('review:review-list')
+
+VOCABULARY = [
+    'service', 'delivery', 'quality', 'price', 'support', 'product',
+    'package', 'refund', 'manager', 'store', 'order', 'website',
+]
+
+# Words planted in a decreasing share of the summaries
+PLANTED = [('espresso', 10), ('grinder', 1000), ('portafilter', 100000)]
+
+
+def synthetic_summary(i):
+    """Summary of ~40 words, with the planted words every Nth row"""
+    words = random.Random(i).choices(VOCABULARY, k=40)
+    for word, every in PLANTED:
+        if i % every == 0:
+            words.append(word)
+    return ' '.join(words)
+
+
+def run(command, rows=None, page_size=50, **options):
+    """Compare the ranked full-text search with a case-insensitive scan
+       of the titles and decompressed summaries"""
+    rows = rows or 1000000
+    user = sample_user()
+    seed_reviews(user, rows, summary=synthetic_summary)
+    command.stdout.write('Seeded %d reviews' % rows)
+
+    client = APIClient()
+    client.force_authenticate(user)
+    reviews = Review.objects.filter(reviewer=user)
+
+    table = []
+    for word, every in PLANTED:
+        def full_text():
+            return list(search_reviews(reviews, word).order_by(
+                '-rank', 'id'
+            )[:page_size])
+
+        def icontains():
+            # Summaries are stored compressed, so the database can't
+            # match them: the scan decompresses every summary instead
+            page = []
+            rows = reviews.order_by('-title', 'id').values_list(
+                'id', 'title', 'summary'
+            )
+            for pk, title, summary in rows.iterator(chunk_size=2000):
+                if word in title.lower() or word in str(summary).lower():
+                    page.append(pk)
+                    if len(page) == page_size:
+                        break
+            return page
+
+        def api():
+            return client.get(REVIEW_URL, {'q': word})
+
+        table.append([
+            word, rows // every, '%.2f' % measure(full_text, 5),
+            '%.2f' % measure(icontains, 5), '%.2f' % measure(api, 5),
+        ])
+
+    write_table(
+        command,
+        ['word', 'matches', 'fts ms', 'icontains ms', 'api ?q= ms'],
+        table
+    )
@@ -0,0 +1,49 @@
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Review
+from review import renderers
+from review.fastpath import RowSerializer
+from review.serializers import ReviewSerializer
+
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+def run(command, rows=None, **options):
+    """Compare rendering one list page from model instances with
+       ReviewSerializer and from .values() rows with RowSerializer"""
+    rows = rows or 500
+    user = sample_user()
+    seed_reviews(user, rows)
+    command.stdout.write('Seeded %d reviews' % rows)
+
+    queryset = Review.objects.filter(reviewer=user).order_by('-title', 'id')
+    # Like the list view, which joins the company the serializer renders
+    instance_queryset = queryset.select_related('company')
+    serializer = ReviewSerializer()
+    row_serializer = RowSerializer(serializer)
+    instances = list(instance_queryset)
+    values = list(queryset.values(*row_serializer.columns))
+    data = row_serializer.to_representation(values)
+
+    fast_renderer = renderers.FastJSONRenderer()
+    table = [
+        # .all() so every call runs the query, not the cached results
+        ['fetch instances', '%.2f' % measure(
+            lambda: list(instance_queryset.all())
+        )],
+        ['fetch values', '%.2f' % measure(
+            lambda: list(queryset.values(*row_serializer.columns))
+        )],
+        ['ReviewSerializer', '%.2f' % measure(
+            lambda: ReviewSerializer(instances, many=True).data
+        )],
+        ['RowSerializer', '%.2f' % measure(
+            lambda: row_serializer.to_representation(values)
+        )],
+        ['JSONRenderer', '%.2f' % measure(
+            lambda: JSONRenderer().render(data)
+        )],
+        ['FastJSONRenderer%s' % ('' if renderers.orjson else ' (no orjson)'),
+         '%.2f' % measure(lambda: fast_renderer.render(data))],
+    ]
+    write_table(command, ['step (%d rows)' % rows, 'ms'], table)
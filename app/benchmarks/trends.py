@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework.test import APIClient
+
+from core.models import Review
+from review.trends import PERIODS, review_trends
+
+from benchmarks.utils import sample_user, seed_reviews, measure, write_table
+
+
+TREND_URL = reverse('review:review-trend')
+DAYS = 365
+
+
+def spread_over_year(user):
+    """Move the seeded reviews to one day each of the last year, in
+       equal runs of ids"""
+    reviews = Review.objects.filter(reviewer=user)
+    first = reviews.order_by('id').values_list('id', flat=True).first()
+    count = reviews.count()
+    per_day = max(count // DAYS, 1)
+    now = timezone.now()
+    for day in range(DAYS):
+        reviews.filter(
+            id__gte=first + day * per_day, id__lt=first + (day + 1) * per_day
+        ).update(submission_date=now - timedelta(days=day))
+
+
+def run(command, rows=None, **options):
+    """Compare trend requests over a year with a cold and a warm
+       cache of closed buckets"""
+    rows = rows or 500000
+    user = sample_user()
+    seed_reviews(user, rows)
+    spread_over_year(user)
+    command.stdout.write('Seeded %d reviews over %d days' % (rows, DAYS))
+
+    client = APIClient()
+    client.force_authenticate(user)
+
+    table = []
+    for period in PERIODS:
+        params = {'period': period}
+
+        def cold():
+            review_trends.cache.clear()
+            return client.get(TREND_URL, params)
+
+        def warm():
+            return client.get(TREND_URL, params)
+
+        table.append([
+            period, len(warm().data['results']),
+            '%.2f' % measure(cold, 5), '%.2f' % measure(warm),
+        ])
+
+    write_table(command, ['period', 'buckets', 'cold ms', 'warm ms'], table)
@@ -0,0 +1,69 @@
+import statistics
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+
+from core.models import Company, Review
+
+
+# Databases kept with --keepdb still hold the users of earlier runs
+RUN_ID = uuid.uuid4().hex[:8]
+
+
+def bench_email(name):
+    """Email address of a benchmark user, unique to this run"""
+    return '%s.%s@bench.com' % (name, RUN_ID)
+
+
+def sample_user(email=None, password='benchpass'):
+    """Create the user that owns the seeded reviews"""
+    return get_user_model().objects.create_user(
+        email or bench_email('bench'), password
+    )
+
+
+def seed_reviews(user, count, batch_size=5000, summary='x' * 200):
+    """Insert `count` synthetic reviews for a user in batches.
+       `summary` is either a string or a function of the row number"""
+    if not callable(summary):
+        summary = (lambda text: lambda i: text)(summary)
+    companies = Company.objects.intern(
+        ['Company %d' % i for i in range(100)]
+    )
+    for start in range(0, count, batch_size):
+        batch = [
+            Review(
+                reviewer=user,
+                title='Review %07d' % i,
+                rating=i % 5 + 1,
+                summary=summary(i),
+                ip='190.190.190.1',
+                company=companies['Company %d' % (i % 100)],
+            )
+            for i in range(start, min(start + batch_size, count))
+        ]
+        Review.objects.number(batch)
+        Review.objects.bulk_create(batch)
+
+
+def measure(func, repeat=20):
+    """Call `func` several times and return the median time in ms"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def write_table(command, headers, rows):
+    """Write a fixed-width table to the command stdout"""
+    widths = [
+        max(len(str(value)) for value in column)
+        for column in zip(headers, *rows)
+    ]
+    for row in [headers] + rows:
+        command.stdout.write('  '.join(
+            str(value).rjust(width) for value, width in zip(row, widths)
+        ))
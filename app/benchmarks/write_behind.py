@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import Review
+from review.ingest import review_queue
+
+from benchmarks.utils import sample_user, write_table
+
+
+REVIEW_URL = reverse('review:review-list')
+
+
+def payload(i):
+    return {
+        'title': 'Review %07d' % i,
+        'rating': i % 5 + 1,
+        'summary': 'x' * 200,
+        'company': 'Company %d' % (i % 100),
+    }
+
+
+def post_reviews(client, rows, expected_status):
+    """POST one review per request, returning the elapsed seconds"""
+    start = time.perf_counter()
+    for i in range(rows):
+        res = client.post(REVIEW_URL, payload(i), format='json')
+        if res.status_code != expected_status:
+            raise CommandError('Review %d answered %d' % (i, res.status_code))
+    return time.perf_counter() - start
+
+
+def run(command, rows=None, **options):
+    """Compare one commit per request with the write-behind mode,
+       where the commits are shared by many requests"""
+    rows = rows or 5000
+    user = sample_user()
+    client = APIClient()
+    client.force_authenticate(user)
+
+    table = []
+    elapsed = post_reviews(client, rows, 201)
+    rate = '%.0f' % (rows / elapsed)
+    table.append(['sync', rate, rate, rows, '1.0'])
+    Review.objects.all().delete()
+
+    before = review_queue.stats()
+    with override_settings(REVIEW_WRITE_BEHIND=True):
+        elapsed = post_reviews(client, rows, 202)
+        start = time.perf_counter()
+        review_queue.stop()
+        durable = elapsed + time.perf_counter() - start
+    after = review_queue.stats()
+    commits = after['batches'] - before['batches']
+    table.append([
+        'write-behind', '%.0f' % (rows / elapsed), '%.0f' % (rows / durable),
+        commits, '%.1f' % (rows / commits if commits else 0),
+    ])
+
+    write_table(command, [
+        'mode', 'req/s', 'rows written/s', 'commits', 'rows per commit',
+    ], table)
+    written = Review.objects.count()
+    if written != rows:
+        command.stderr.write('Only %d of %d queued reviews were written'
+                             % (written, rows))
@@ -1,14 +1,52 @@
+import re
+
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
 from django.utils.translation import gettext as _
 
 from core import models
+from core.search import search_reviews
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator using the PostgreSQL planner estimate of the number
+       of rows instead of COUNT(*), which reads every row. Counts
+       estimated below `exact_below` are small enough to be exact"""
+    exact_below = 10000
+
+    @cached_property
+    def count(self):
+        estimate = self.estimate()
+        if estimate is None or estimate < self.exact_below:
+            return super().count
+        return estimate
+
+    def estimate(self):
+        """Rows the planner expects the query to return, or None
+           when the database can't tell"""
+        connection = connections[self.object_list.db]
+        if connection.vendor != 'postgresql':
+            return None
+        sql, params = self.object_list.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ' + sql, params)
+            plan = cursor.fetchone()[0]
+        match = re.search(r'rows=(\d+)', plan)
+        return int(match.group(1)) if match else None
 
 
 class UserAdmin(BaseUserAdmin):
     """Customizing user admin"""
     ordering = ['id']
     list_display = ['email', 'name']
+    list_filter = ('is_staff', 'is_active')
+    # Searched by full email, see get_search_results
+    search_fields = ('email',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fieldsets = (
         (
             None,
@@ -35,6 +73,56 @@ class UserAdmin(BaseUserAdmin):
 
     )
 
+    def get_search_results(self, request, queryset, search_term):
+        """Look the email up in its unique index, a substring search
+           would read every user"""
+        if not search_term:
+            return queryset, False
+        email = models.User.objects.normalize_email(search_term.strip())
+        return queryset.filter(email=email), False
+
+
+class CompanyAdmin(admin.ModelAdmin):
+    """Company admin, searched by its canonical name"""
+    search_fields = ('canonical_name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        """Match the canonical form of the term exactly or as a prefix,
+           which the prefix index serves. A substring search would
+           read every company"""
+        if not search_term:
+            return queryset, False
+        return queryset.filter(
+            canonical_name__startswith=models.canonical_company_name(
+                search_term
+            )
+        ), False
+
+
+class ReviewAdmin(admin.ModelAdmin):
+    """Review admin, kept fast on tables of millions of reviews"""
+    list_display = ('title', 'rating', 'company', 'reviewer',
+                    'submission_date')
+    list_select_related = ('company', 'reviewer')
+    list_filter = ('rating',)
+    date_hierarchy = 'submission_date'
+    ordering = ('-id',)
+    # Searched through the full-text index, see get_search_results
+    search_fields = ('title', 'summary')
+    # Selects listing every user or company would be too long
+    raw_id_fields = ('reviewer',)
+    autocomplete_fields = ('company',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term:
+            return queryset, False
+        return search_reviews(queryset, search_term), False
+
 
 admin.site.register(models.User, UserAdmin)
-admin.site.register(models.Review)
+admin.site.register(models.Company, CompanyAdmin)
+admin.site.register(models.Review, ReviewAdmin)
@@ -1,5 +1,29 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def ensure_search_index(using, **kwargs):
+    """Restore the search triggers after migrations rebuilt the table"""
+    from django.db import connections
+    from core.search import ensure_search_index
+
+    ensure_search_index(connections[using])
+
+
+def forget_companies(**kwargs):
+    """A renamed or deleted company can't stay in the company cache,
+       and neither can the ones flushed from the database"""
+    from core.companies import company_cache
+
+    company_cache.clear()
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        post_migrate.connect(ensure_search_index, sender=self)
+        post_migrate.connect(forget_companies, sender=self)
+        company = self.get_model('Company')
+        post_save.connect(forget_companies, sender=company)
+        post_delete.connect(forget_companies, sender=company)
@@ -0,0 +1,88 @@
+"""In-process cache of the companies reviews point to.
+
+Every review write names its company. Companies are only added, so
+each process keeps the ones it resolved and a name it has seen before
+costs no query. Companies are cached once the transaction that resolved
+them commits, so a company whose creation was rolled back is never
+handed out. Validation only looks names up, the companies seen for
+the first time are created by the write inserting their reviews. A
+company renamed or deleted through the ORM empties the cache of the
+process that changed it, the other processes keep it until they
+restart.
+"""
+import threading
+from functools import partial
+
+from django.db import router, transaction
+
+from core.models import Company, canonical_company_name
+
+
+class CompanyCache:
+    """Maps canonical company names to Company instances"""
+    # Emptied when it grows past this many companies
+    max_size = 100000
+
+    def __init__(self):
+        self._companies = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, names, create=True):
+        """Return {name: Company} for every name, creating the
+           companies seen for the first time. With create=False they
+           are left unsaved instead, see persist"""
+        found = {}
+        missing = []
+        for name in names:
+            company = self._companies.get(canonical_company_name(name))
+            if company is None:
+                missing.append(name)
+            else:
+                found[name] = company
+        if missing:
+            using = router.db_for_write(Company)
+            interned = Company.objects.intern(
+                missing, using=using, create=create
+            )
+            found.update(interned)
+            transaction.on_commit(partial(self._remember, [
+                company for company in interned.values()
+                if company.pk is not None
+            ]), using=using)
+        return found
+
+    def lookup(self, names):
+        """resolve without writing anything, for validating requests
+           and records that may still be rejected"""
+        return self.resolve(names, create=False)
+
+    def persist(self, reviews):
+        """Create the companies `lookup` left unsaved and point
+           `reviews` to them. Meant for the transaction inserting the
+           reviews, so a rejected or rolled back write leaves no
+           company behind"""
+        pending = [review for review in reviews if review.company.pk is None]
+        if pending:
+            companies = self.resolve(
+                {review.company.name for review in pending}
+            )
+            for review in pending:
+                review.company = companies[review.company.name]
+
+    def get(self, name):
+        """Return the Company of one name"""
+        return self.resolve([name])[name]
+
+    def clear(self):
+        with self._lock:
+            self._companies.clear()
+
+    def _remember(self, companies):
+        with self._lock:
+            if len(self._companies) + len(companies) > self.max_size:
+                self._companies.clear()
+            for company in companies:
+                self._companies[company.canonical_name] = company
+
+
+company_cache = CompanyCache()
@@ -0,0 +1,175 @@
+"""Text stored compressed in a binary column.
+
+Values are compressed with a codec when written and kept as read from
+the database until the model attribute is first read, so instances
+that never touch the text never decompress it. Every stored value
+starts with the one byte tag of its codec, so rows written with any
+registered codec stay readable after the field switches codec. Text
+that doesn't get smaller is stored as is, under the raw codec.
+"""
+import zlib
+
+from django.db import models
+from django.db.models.query_utils import DeferredAttribute
+
+
+class RawCodec:
+    """Stores the text as is"""
+    tag = b'\x00'
+    name = 'raw'
+
+    def compress(self, data):
+        return data
+
+    def decompress(self, data):
+        return data
+
+
+class ZlibCodec:
+    """zlib from the standard library, a good ratio at a low cost for
+       text of a few KB"""
+    tag = b'z'
+    name = 'zlib'
+
+    def __init__(self, level=6):
+        self.level = level
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data):
+        return zlib.decompress(data)
+
+
+_codecs_by_name = {}
+_codecs_by_tag = {}
+
+
+def register_codec(codec):
+    """Make a codec usable by name in CompressedTextField and readable
+       by its tag. A codec has a one byte `tag`, a `name` and
+       compress/decompress methods taking and returning bytes"""
+    if len(codec.tag) != 1:
+        raise ValueError('Codec tags are one byte long')
+    known = _codecs_by_tag.get(codec.tag)
+    if known is not None and known.name != codec.name:
+        raise ValueError('Tag %r is taken by %s' % (codec.tag, known.name))
+    _codecs_by_name[codec.name] = codec
+    _codecs_by_tag[codec.tag] = codec
+
+
+register_codec(RawCodec())
+register_codec(ZlibCodec())
+
+
+def get_codec(name):
+    try:
+        return _codecs_by_name[name]
+    except KeyError:
+        raise ValueError('Unknown codec %r, register it first' % name)
+
+
+def compress(text, codec):
+    """Tagged payload of `text` compressed with `codec`"""
+    data = text.encode('utf-8')
+    compressed = codec.compress(data)
+    if len(compressed) >= len(data):
+        codec, compressed = _codecs_by_name['raw'], data
+    return codec.tag + compressed
+
+
+def decompress(payload):
+    """Text of a tagged payload, whatever codec wrote it"""
+    payload = bytes(payload)
+    try:
+        codec = _codecs_by_tag[payload[:1]]
+    except KeyError:
+        raise ValueError('Unknown codec tag %r' % payload[:1])
+    return codec.decompress(payload[1:]).decode('utf-8')
+
+
+class CompressedText:
+    """Stored value of a CompressedTextField, decompressed the first
+       time it is turned into a str"""
+    __slots__ = ('payload', '_text')
+
+    def __init__(self, payload):
+        self.payload = payload
+        self._text = None
+
+    def __str__(self):
+        if self._text is None:
+            self._text = decompress(self.payload)
+        return self._text
+
+    def __eq__(self, other):
+        if isinstance(other, CompressedText):
+            other = str(other)
+        return str(self) == other
+
+    def __hash__(self):
+        return hash(str(self))
+
+    def __repr__(self):
+        return '<CompressedText: %d bytes>' % len(self.payload)
+
+
+class CompressedTextDescriptor(DeferredAttribute):
+    """Model attribute giving the decompressed text. A data descriptor,
+       so it is consulted even once the value is in the instance"""
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        value = super().__get__(instance, cls)
+        if isinstance(value, CompressedText):
+            value = instance.__dict__[self.field.attname] = str(value)
+        return value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.field.attname] = value
+
+
+class CompressedTextField(models.TextField):
+    """TextField stored compressed with `codec` (zlib by default) in a
+       binary column. The database only sees bytes, so it can't filter
+       or search on the text"""
+    descriptor_class = CompressedTextDescriptor
+
+    def __init__(self, *args, codec='zlib', **kwargs):
+        self.codec = get_codec(codec)
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.codec.name != 'zlib':
+            kwargs['codec'] = self.codec.name
+        return name, path, args, kwargs
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return None
+        return CompressedText(bytes(value))
+
+    def pre_save(self, model_instance, add):
+        """The value as loaded, so text that was never read is written
+           back without decompressing it"""
+        return model_instance.__dict__.get(self.attname)
+
+    def to_payload(self, value):
+        """Tagged bytes stored for `value`, None for None"""
+        if isinstance(value, CompressedText):
+            return value.payload
+        value = self.get_prep_value(value)
+        if value is None:
+            return None
+        return compress(value, self.codec)
+
+    def get_db_prep_value(self, value, connection, prepared=False):
+        payload = self.to_payload(value)
+        if payload is None:
+            return None
+        return connection.Database.Binary(payload)
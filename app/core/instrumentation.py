@@ -0,0 +1,125 @@
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+_current = ContextVar('request_metrics', default=None)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+\b')
+_VALUE_LIST = re.compile(r'\((?:\s*\?\s*,)+\s*\?\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize a query so the ones only differing in their
+       parameters, or in how many of them an IN list has, look alike"""
+    sql = _STRING.sub('?', sql).replace('%s', '?')
+    sql = _NUMBER.sub('?', sql)
+    sql = _VALUE_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+class RequestMetrics:
+    """Time spent by one request in the database and in each of
+       its named phases, in milliseconds"""
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.phases = {}
+        self.view_start = None
+
+    def add(self, phase, duration):
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    def server_timing(self):
+        """Value of the Server-Timing header. `db` and `auth` happen
+           within `view`, `total` covers the whole middleware stack"""
+        entries = ['db;dur=%.2f;desc="%d queries"' % (self.db, self.queries)]
+        entries.extend(
+            '%s;dur=%.2f' % (phase, duration)
+            for phase, duration in self.phases.items()
+        )
+        return ', '.join(entries)
+
+
+def current_metrics():
+    """Metrics of the request being handled, or None"""
+    return _current.get()
+
+
+@contextmanager
+def collect_metrics():
+    """Make a new RequestMetrics the current one within the block"""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def timing(phase):
+    """Add the time spent in the block to a phase of the current
+       request, if any"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.add(phase, (time.perf_counter() - start) * 1000)
+
+
+class SlowQueryLog:
+    """Bounded ring buffer of the latest slow queries, summarized
+       by fingerprint on demand"""
+
+    def __init__(self, size, threshold):
+        self.threshold = threshold
+        self._entries = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, sql, duration, path):
+        """Remember a query that took `duration` ms, if it is slow"""
+        if duration < self.threshold:
+            return
+        entry = (fingerprint(sql), duration, path)
+        with self._lock:
+            self._entries.append(entry)
+
+    def top(self, count):
+        """The `count` fingerprints with the most total time"""
+        with self._lock:
+            entries = list(self._entries)
+
+        summary = {}
+        for sql, duration, path in entries:
+            item = summary.setdefault(sql, {
+                'fingerprint': sql, 'count': 0, 'total_ms': 0.0,
+                'max_ms': 0.0, 'last_path': path,
+            })
+            item['count'] += 1
+            item['total_ms'] += duration
+            item['max_ms'] = max(item['max_ms'], duration)
+            item['last_path'] = path
+        return sorted(
+            summary.values(), key=lambda item: item['total_ms'], reverse=True
+        )[:count]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+slow_query_log = SlowQueryLog(
+    size=settings.SLOW_QUERY_LOG_SIZE,
+    threshold=settings.SLOW_QUERY_MS,
+)
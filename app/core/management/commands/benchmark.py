@@ -0,0 +1,52 @@
+import pkgutil
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, \
+                             teardown_test_environment
+
+import benchmarks
+
+
+def available_benchmarks():
+    """Names of the benchmark modules shipped in the benchmarks package"""
+    return sorted(
+        module.name for module in pkgutil.iter_modules(benchmarks.__path__)
+        if module.name != 'utils'
+    )
+
+
+class Command(BaseCommand):
+    """Django command to run a benchmark against a throwaway database"""
+    help = 'Run one of the benchmarks in the benchmarks package'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=available_benchmarks())
+        parser.add_argument(
+            '--rows', type=int, default=None,
+            help='Number of synthetic rows to seed'
+        )
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help='Preserve the benchmark database between runs'
+        )
+        # Benchmarks may take options of their own
+        for name in available_benchmarks():
+            module = import_module('benchmarks.%s' % name)
+            if hasattr(module, 'add_arguments'):
+                module.add_arguments(parser)
+
+    def handle(self, *args, **options):
+        module = import_module('benchmarks.%s' % options['name'])
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, keepdb=options['keepdb']
+        )
+        try:
+            module.run(self, **options)
+        finally:
+            connection.creation.destroy_test_db(
+                old_name, verbosity=0, keepdb=options['keepdb']
+            )
+            teardown_test_environment()
@@ -0,0 +1,301 @@
+import csv
+import io
+import json
+import os
+import time
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.companies import company_cache
+from core.fields import CompressedTextField
+from core.models import Company, CompanyRating, Review
+from review.trends import trend_scopes, trend_versions
+from review.versioning import list_versions
+
+
+# Columns of the dump, `reviewer` holds the email of an existing user
+# and `submission_date` is optional (defaults to the import time)
+COLUMNS = ('title', 'rating', 'summary', 'ip', 'company', 'reviewer')
+
+# Model fields written for every imported review, in COPY column order
+WRITE_FIELDS = (
+    'title', 'rating', 'summary', 'ip', 'submission_date', 'company',
+    'reviewer', 'sequence', 'search_summary',
+)
+
+
+def read_csv(stream):
+    """Yield one dict per CSV record, the first line holds the columns"""
+    return csv.DictReader(stream)
+
+
+def read_ndjson(stream):
+    """Yield one dict per non-empty line of newline-delimited JSON,
+       or None for lines that can't be decoded"""
+    for line in stream:
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+
+
+READERS = {'csv': read_csv, 'ndjson': read_ndjson}
+
+
+@contextmanager
+def keep_submission_date():
+    """bulk_create stamps auto_now_add fields with the current time,
+       switch it off so the dates of the dump are kept"""
+    field = Review._meta.get_field('submission_date')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    """Django command to import reviews from a CSV or NDJSON dump"""
+    help = 'Import reviews from a CSV or NDJSON file in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file to import')
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Format of the file, guessed from its extension by default'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Reviews written per transaction'
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help='File recording the progress, defaults to <path>.checkpoint'
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=100,
+            help='Abort once more invalid records than this are found'
+        )
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use bulk_create even on PostgreSQL'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or \
+            os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError('Unknown format, use --format csv or ndjson')
+
+        self.checkpoint_path = options['checkpoint'] or path + '.checkpoint'
+        self.max_errors = options['max_errors']
+        self.use_copy = connection.vendor == 'postgresql' and \
+            not options['no_copy']
+        self.reviewers = {}
+        self.errors = 0
+
+        position, imported = self.read_checkpoint()
+        if position:
+            self.stdout.write(
+                'Resuming after record %d (%d reviews already imported)'
+                % (position, imported)
+            )
+
+        start = time.perf_counter()
+        new_rows = 0
+        with open(path, newline='', encoding='utf-8') as stream:
+            records = islice(READERS[file_format](stream), position, None)
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                reviews = self.build_reviews(batch, position)
+                self.write(reviews)
+                position += len(batch)
+                imported += len(reviews)
+                new_rows += len(reviews)
+                self.write_checkpoint(position, imported)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    '%d records read, %d reviews imported, %.0f reviews/s'
+                    % (position, imported, new_rows / elapsed)
+                )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            'Imported %d reviews in %.1fs (%.0f reviews/s), %d invalid '
+            'records skipped' % (new_rows, elapsed,
+                                 new_rows / elapsed if elapsed else 0,
+                                 self.errors)
+        ))
+
+    def build_reviews(self, records, position):
+        """Validate records with the model rules and return the
+           valid ones as unsaved reviews"""
+        self.resolve_reviewers(records)
+        companies = self.resolve_companies(records)
+        reviews = []
+        for number, record in enumerate(records, position + 1):
+            try:
+                reviews.append(self.build_review(record, companies))
+            except ValidationError as error:
+                self.reject(number, error.messages)
+            except (KeyError, TypeError, ValueError) as error:
+                self.reject(number, [str(error)])
+        return reviews
+
+    def build_review(self, record, companies):
+        """Turn one record into a validated, unsaved review"""
+        if not isinstance(record, dict):
+            raise ValidationError('Not a JSON object')
+        missing = [column for column in COLUMNS if column not in record]
+        if missing:
+            raise ValidationError('Missing columns: %s' % ', '.join(missing))
+
+        reviewer_id = self.reviewers.get(record['reviewer'])
+        if reviewer_id is None:
+            raise ValidationError('Unknown reviewer %s' % record['reviewer'])
+
+        submission_date = record.get('submission_date') or None
+        if submission_date is None:
+            submission_date = timezone.now()
+        elif isinstance(submission_date, str):
+            submission_date = parse_datetime(submission_date)
+            if submission_date is None:
+                raise ValidationError('Invalid submission_date')
+        if timezone.is_naive(submission_date):
+            submission_date = timezone.make_aware(submission_date)
+
+        review = Review(
+            title=record['title'],
+            rating=record['rating'],
+            summary=record['summary'],
+            ip=record['ip'],
+            company=companies.get(record['company']),
+            reviewer_id=reviewer_id,
+            submission_date=submission_date,
+        )
+        # The reviewer and company were checked against the batch
+        # lookups above, excluding them saves queries per record
+        review.full_clean(exclude=['reviewer', 'company'])
+        return review
+
+    def resolve_reviewers(self, records):
+        """Look up the ids of every new reviewer email in the batch"""
+        emails = {
+            record.get('reviewer') for record in records
+            if isinstance(record, dict)
+        } - set(self.reviewers) - {None}
+        if emails:
+            # Unknown emails are remembered too, so they aren't looked up
+            # again in every batch
+            self.reviewers.update(dict.fromkeys(emails))
+            self.reviewers.update(
+                get_user_model().objects.filter(
+                    email__in=emails
+                ).values_list('email', 'id')
+            )
+
+    def resolve_companies(self, records):
+        """Return {name: Company} for the company names of the batch"""
+        max_length = Company._meta.get_field('name').max_length
+        names = set()
+        for record in records:
+            name = record.get('company') if isinstance(record, dict) else None
+            if isinstance(name, str) and 0 < len(name) <= max_length:
+                names.add(name)
+        # Created by write(), with the reviews naming them
+        return company_cache.lookup(names)
+
+    def reject(self, number, messages):
+        """Report an invalid record, aborting after too many of them"""
+        self.errors += 1
+        self.stderr.write('Record %d skipped: %s'
+                          % (number, '; '.join(messages)))
+        if self.errors > self.max_errors:
+            raise CommandError(
+                'Too many invalid records, fix the file and run the '
+                'command again to resume from the last checkpoint'
+            )
+
+    def write(self, reviews):
+        """Write one batch of reviews in a single transaction"""
+        if not reviews:
+            return
+        with transaction.atomic():
+            company_cache.persist(reviews)
+            Review.objects.number(reviews)
+            if self.use_copy:
+                self.copy(reviews)
+            else:
+                with keep_submission_date():
+                    Review.objects.bulk_create(reviews)
+            CompanyRating.objects.record(reviews)
+            list_versions.bump_on_commit(
+                *(review.reviewer_id for review in reviews)
+            )
+            # Imported reviews keep their dates, so they can land in
+            # closed trend buckets
+            trend_versions.bump_on_commit(*{
+                scope for review in reviews for scope in trend_scopes(review)
+            })
+
+    def copy(self, reviews):
+        """Stream the batch to PostgreSQL with COPY FROM STDIN"""
+        fields = [Review._meta.get_field(name) for name in WRITE_FIELDS]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for review in reviews:
+            # Handed to the search trigger, like bulk_create does
+            review.search_summary = review.summary
+            row = []
+            for field in fields:
+                value = getattr(review, field.attname)
+                if isinstance(field, CompressedTextField):
+                    # bytea in its hex text format
+                    value = '\\x' + field.to_payload(value).hex()
+                else:
+                    value = field.get_db_prep_save(value, connection)
+                row.append('' if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in fields
+        )
+        with connection.cursor() as cursor:
+            cursor.copy_expert(
+                'COPY %s (%s) FROM STDIN WITH (FORMAT csv)' % (
+                    connection.ops.quote_name(Review._meta.db_table), columns
+                ),
+                buffer
+            )
+
+    def read_checkpoint(self):
+        """Return the (records read, reviews imported) of a previous run"""
+        try:
+            with open(self.checkpoint_path) as checkpoint:
+                state = json.load(checkpoint)
+        except FileNotFoundError:
+            return 0, 0
+        return state['position'], state['imported']
+
+    def write_checkpoint(self, position, imported):
+        """Record the progress once a batch is committed. If the process
+           dies between the commit and this write, resuming imports
+           that last batch again"""
+        tmp_path = self.checkpoint_path + '.tmp'
+        with open(tmp_path, 'w') as checkpoint:
+            json.dump({'position': position, 'imported': imported},
+                      checkpoint)
+        os.replace(tmp_path, self.checkpoint_path)
@@ -0,0 +1,151 @@
+import os
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from core.management.commands.import_reviews import READERS
+from user.provisioning import HashingPool, provision_users
+from user.serializers import UserSerializer
+
+
+# Columns of the file, the same fields the user create endpoint takes
+COLUMNS = ('email', 'password', 'name')
+
+PASSWORD_MIN_LENGTH = \
+    UserSerializer.Meta.extra_kwargs['password']['min_length']
+
+
+class Command(BaseCommand):
+    """Django command to create users in bulk from a CSV or NDJSON file"""
+    help = 'Create users and their auth tokens in batches, hashing the ' \
+           'passwords in a pool of processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or NDJSON file of users')
+        parser.add_argument(
+            '--format', choices=sorted(READERS),
+            help='Format of the file, guessed from its extension by default'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Users written per transaction'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=None,
+            help='Processes hashing the passwords, one per CPU by default'
+        )
+        parser.add_argument(
+            '--max-errors', type=int, default=100,
+            help='Abort once more invalid records than this are found'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or \
+            os.path.splitext(path)[1].lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError('Unknown format, use --format csv or ndjson')
+
+        self.max_errors = options['max_errors']
+        self.errors = 0
+        self.existing = 0
+        self.seen = set()
+
+        start = time.perf_counter()
+        position = created = 0
+        with open(path, newline='', encoding='utf-8') as stream, \
+                HashingPool(options['workers']) as pool:
+            self.stdout.write('Hashing passwords in %d processes'
+                              % pool.workers)
+            records = READERS[file_format](stream)
+            while True:
+                batch = list(islice(records, options['batch_size']))
+                if not batch:
+                    break
+                users, passwords = self.build_users(batch, position)
+                provision_users(users, passwords, pool)
+                position += len(batch)
+                created += len(users)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    '%d records read, %d users created, %.0f users/s'
+                    % (position, created, created / elapsed)
+                )
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            'Created %d users in %.1fs (%.0f users/s), %d existing users '
+            'and %d invalid records skipped' % (
+                created, elapsed, created / elapsed if elapsed else 0,
+                self.existing, self.errors,
+            )
+        ))
+
+    def build_users(self, records, position):
+        """Validate records like the user create endpoint and return
+           unsaved users and their passwords. Users that already exist
+           are skipped, so running the command again after a failure
+           carries on where it stopped"""
+        User = get_user_model()
+        users, passwords = [], []
+        for number, record in enumerate(records, position + 1):
+            try:
+                user, password = self.build_user(record)
+            except ValidationError as error:
+                self.reject(number, error.messages)
+                continue
+            if user.email in self.seen:
+                self.reject(number, ['Duplicate email %s' % user.email])
+                continue
+            self.seen.add(user.email)
+            users.append(user)
+            passwords.append(password)
+
+        existing = set(User.objects.filter(
+            email__in=[user.email for user in users]
+        ).values_list('email', flat=True))
+        self.existing += len(existing)
+        return (
+            [user for user in users if user.email not in existing],
+            [password for user, password in zip(users, passwords)
+             if user.email not in existing],
+        )
+
+    def build_user(self, record):
+        """Turn one record into a validated, unsaved user and its
+           password"""
+        if not isinstance(record, dict):
+            raise ValidationError('Not a JSON object')
+        missing = [column for column in COLUMNS if not record.get(column)]
+        if missing:
+            raise ValidationError('Missing columns: %s' % ', '.join(missing))
+        if not all(isinstance(record[column], str) for column in COLUMNS):
+            raise ValidationError('Every column holds text')
+        password = record['password']
+        if len(password) < PASSWORD_MIN_LENGTH:
+            raise ValidationError('Passwords need at least %d characters'
+                                  % PASSWORD_MIN_LENGTH)
+
+        User = get_user_model()
+        user = User(
+            email=User.objects.normalize_email(record['email']),
+            name=record['name'],
+        )
+        # Emails are checked against the whole batch at once
+        user.full_clean(exclude=['password'], validate_unique=False)
+        return user, password
+
+    def reject(self, number, messages):
+        """Report an invalid record, aborting after too many of them"""
+        self.errors += 1
+        self.stderr.write('Record %d skipped: %s'
+                          % (number, '; '.join(messages)))
+        if self.errors > self.max_errors:
+            raise CommandError(
+                'Too many invalid records, fix the file and run the '
+                'command again, the users already created are skipped'
+            )
@@ -0,0 +1,89 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import CompanyRating
+
+
+class Command(BaseCommand):
+    """Django command to recompute the company rating summaries from
+       the reviews and report the ones that drifted"""
+    help = 'Recompute the company ratings from the reviews and fix drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report the drift, without fixing it'
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                # Writers wait until the summaries are replaced, so
+                # none of their increments is lost in between
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'LOCK TABLE %s IN EXCLUSIVE MODE'
+                        % connection.ops.quote_name(
+                            CompanyRating._meta.db_table
+                        )
+                    )
+            expected = CompanyRating.objects.compute()
+            stored = {
+                rating.pk: rating
+                for rating in CompanyRating.objects.all()
+            }
+            drifted = self.report(expected, stored)
+            if drifted and not options['dry_run']:
+                self.fix(expected, stored)
+
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS(
+                'All %d company ratings are up to date' % len(expected)
+            ))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(
+                '%d company ratings drifted' % drifted
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                'Fixed %d drifted company ratings' % drifted
+            ))
+
+    def report(self, expected, stored):
+        """Write one line per drifted summary, returning their number"""
+        drifted = 0
+        for company_id in sorted(set(expected) | set(stored)):
+            summary = expected.get(company_id, {})
+            rating = stored.get(company_id)
+            changes = [
+                '%s %s -> %s' % (
+                    name, getattr(rating, name, 0), summary.get(name, 0)
+                )
+                for name in self.summary_fields()
+                if getattr(rating, name, 0) != summary.get(name, 0)
+            ]
+            if changes:
+                drifted += 1
+                self.stdout.write('Company %d: %s'
+                                  % (company_id, ', '.join(changes)))
+        return drifted
+
+    def fix(self, expected, stored):
+        """Write the expected summaries over the stored ones"""
+        CompanyRating.objects.filter(
+            pk__in=set(stored) - set(expected)
+        ).delete()
+        for company_id, summary in expected.items():
+            rating = stored.get(company_id)
+            if rating is None:
+                CompanyRating.objects.create(company_id=company_id, **summary)
+            elif any(getattr(rating, name) != value
+                     for name, value in summary.items()):
+                CompanyRating.objects.filter(pk=company_id).update(**summary)
+
+    @staticmethod
+    def summary_fields():
+        return [
+            field.name for field in CompanyRating._meta.concrete_fields
+            if not field.primary_key
+        ]
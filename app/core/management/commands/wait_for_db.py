@@ -1,21 +1,59 @@
 import time
 
-from django.db import connections
+from django.db import DEFAULT_DB_ALIAS, connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """Django command to pause exec until db is available"""
+    help = 'Wait until the database accepts connections and queries'
+    first_delay = 0.1
+    max_delay = 5
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait before giving up'
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Alias of the database to wait for'
+        )
 
     def handle(self, *args, **options):
         self.stdout.write('Waiting for DB...')
-        db_conn = None
-        while not db_conn:
+        deadline = time.monotonic() + options['timeout']
+        delay = self.first_delay
+        while True:
             try:
-                db_conn = connections['default']
-            except OperationalError:
-                self.stdout.write('DB is unavailable, waiting 1 seconds...')
-                time.sleep(1)
+                self.probe(options['database'])
+                break
+            except OperationalError as error:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise CommandError(
+                        'DB still unavailable after %ss: %s'
+                        % (options['timeout'], error)
+                    )
+                wait = min(delay, remaining)
+                self.stdout.write('DB is unavailable, waiting %.1f seconds...'
+                                  % wait)
+                time.sleep(wait)
+                delay = min(delay * 2, self.max_delay)
 
         self.stdout.write(self.style.SUCCESS('DB is ready!'))
+
+    def probe(self, alias):
+        """Open a connection and run a query on it. Looking up the
+           connection alone doesn't connect to anything"""
+        connection = connections[alias]
+        try:
+            connection.ensure_connection()
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except OperationalError:
+            # Don't keep a half-open connection for the next attempt
+            connection.close()
+            raise
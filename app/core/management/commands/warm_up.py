@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warm_up
+
+
+class Command(BaseCommand):
+    """Django command to run the warm-up done before serving and
+       report how long each phase takes"""
+    help = 'Run the startup warm-up and report the duration of each phase'
+
+    def handle(self, *args, **options):
+        total = 0
+        for phase, duration in warm_up():
+            total += duration
+            self.stdout.write('%-14s %8.1f ms' % (phase, duration))
+        self.stdout.write(self.style.SUCCESS('Warmed up in %.1f ms' % total))
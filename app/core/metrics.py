@@ -0,0 +1,201 @@
+"""Request metrics in the Prometheus text format.
+
+Every worker process keeps its counters and histograms in memory. With
+METRICS_DIR set, each worker also writes a snapshot of them to its own
+file in that directory at most every METRICS_FLUSH_SECONDS, and the
+metrics endpoint adds up the files of every worker, including the ones
+that exited, so the totals don't go backwards when a worker restarts.
+"""
+import glob
+import json
+import os
+import threading
+import time
+
+from django.conf import settings
+
+
+# name: (type, help, histogram buckets)
+METRICS = {
+    'http_requests_total': (
+        'counter', 'Requests handled, by view, method and status.', None,
+    ),
+    'http_request_duration_seconds': (
+        'histogram', 'Time to build the response, by view and method.',
+        (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+    ),
+    'http_response_size_bytes': (
+        'histogram', 'Size of the non-streaming response bodies, by view.',
+        (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    ),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"') \
+                     .replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, _escape(value)) for name, value in pairs
+    )
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry:
+    """Counters and fixed-bucket histograms keyed by metric name and
+       labels. Updates only take a short lock around a list update"""
+    file_pattern = 'metrics-*.json'
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        # Pids get reused, a new worker must not take over the file
+        # of one that exited
+        self._file_name = 'metrics-%d-%d.json' % (
+            self._pid, time.time() * 1000
+        )
+        self._values = {}
+        self._last_flush = time.monotonic()
+
+    def inc(self, name, labels, amount=1):
+        """Add `amount` to a counter"""
+        key = (name, tuple(labels))
+        with self._lock:
+            self._check_fork()
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def observe(self, name, labels, value):
+        """Record a value in a histogram"""
+        buckets = METRICS[name][2]
+        key = (name, tuple(labels))
+        with self._lock:
+            self._check_fork()
+            series = self._values.get(key)
+            if series is None:
+                # One count per bucket, then +Inf, then the sum
+                series = self._values[key] = [0] * (len(buckets) + 2)
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            else:
+                series[len(buckets)] += 1
+            series[-1] += value
+
+    def snapshot(self):
+        """Copy of the values of this process"""
+        with self._lock:
+            self._check_fork()
+            return {
+                key: list(value) if isinstance(value, list) else value
+                for key, value in self._values.items()
+            }
+
+    def maybe_flush(self):
+        """Write the snapshot file if the flush interval has passed"""
+        if self.directory and \
+                time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Write the values of this process to its snapshot file"""
+        if not self.directory:
+            return
+        self._last_flush = time.monotonic()
+        values = self.snapshot()
+        path = os.path.join(self.directory, self._file_name)
+        tmp_path = '%s.%d.tmp' % (path, threading.get_ident())
+        with open(tmp_path, 'w') as stream:
+            json.dump([
+                [name, [list(pair) for pair in labels], value]
+                for (name, labels), value in values.items()
+            ], stream)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Values of every worker added up"""
+        if not self.directory:
+            return self.snapshot()
+        self.flush()
+        totals = {}
+        for path in glob.glob(os.path.join(self.directory,
+                                           self.file_pattern)):
+            try:
+                with open(path) as stream:
+                    entries = json.load(stream)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in entries:
+                if name not in METRICS:
+                    continue
+                key = (name, tuple(tuple(pair) for pair in labels))
+                if key not in totals:
+                    totals[key] = value
+                elif isinstance(value, list):
+                    totals[key] = [a + b for a, b in zip(totals[key], value)]
+                else:
+                    totals[key] += value
+        return totals
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format"""
+        values = self.collect()
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            lines.append('# HELP %s %s' % (name, help_text))
+            lines.append('# TYPE %s %s' % (name, kind))
+            for (series_name, labels), value in sorted(values.items()):
+                if series_name != name:
+                    continue
+                if kind == 'counter':
+                    lines.append('%s%s %s' % (
+                        name, _format_labels(labels), _format_value(value)
+                    ))
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (float('inf'),), value):
+                    cumulative += count
+                    lines.append('%s_bucket%s %d' % (
+                        name,
+                        _format_labels(labels, [('le', _format_value(
+                            float(bound)))]),
+                        cumulative,
+                    ))
+                lines.append('%s_sum%s %s' % (
+                    name, _format_labels(labels), _format_value(value[-1])
+                ))
+                lines.append('%s_count%s %d' % (
+                    name, _format_labels(labels), cumulative
+                ))
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _check_fork(self):
+        """A forked worker starts from zero instead of counting again
+           what its parent process had recorded"""
+        if os.getpid() != self._pid:
+            self._reset()
+
+
+metrics = MetricsRegistry(
+    directory=settings.METRICS_DIR,
+    flush_interval=settings.METRICS_FLUSH_SECONDS,
+)
@@ -0,0 +1,282 @@
+import time
+import zlib
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.handlers.exception import convert_exception_to_response
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.module_loading import import_string
+
+from core.instrumentation import collect_metrics, current_metrics, \
+                                 slow_query_log
+from core.metrics import metrics
+from core.routers import request_routing
+
+
+class QueryTimer:
+    """execute_wrapper counting and timing the queries of a request"""
+
+    def __init__(self, metrics, path):
+        self.metrics = metrics
+        self.path = path
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            self.metrics.queries += 1
+            self.metrics.db += duration
+            slow_query_log.record(sql, duration, self.path)
+
+
+class RequestTimingMiddleware:
+    """Measure the database, view and render time of every request
+       and send them in a Server-Timing header.
+
+       Queries run while a streaming response is consumed happen
+       after the header is sent, so they aren't counted"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        with collect_metrics() as metrics, ExitStack() as stack:
+            timer = QueryTimer(metrics, request.path)
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = self.get_response(request)
+
+        now = time.perf_counter()
+        if metrics.view_start is not None and 'view' not in metrics.phases:
+            # Responses without a render step
+            metrics.add('view', (now - metrics.view_start) * 1000)
+        metrics.add('total', (now - start) * 1000)
+        response['Server-Timing'] = metrics.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = current_metrics()
+        if metrics is not None:
+            metrics.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        """DRF responses are rendered after the view returns, split
+           that time from the view one"""
+        metrics = current_metrics()
+        if metrics is None or metrics.view_start is None:
+            return response
+        render_start = time.perf_counter()
+        metrics.add('view', (render_start - metrics.view_start) * 1000)
+
+        def rendered(response):
+            metrics.add('render', (time.perf_counter() - render_start) * 1000)
+        response.add_post_render_callback(rendered)
+        return response
+
+
+class MetricsMiddleware:
+    """Count requests and record their latency and response size
+       per resolved view name"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else '<unresolved>'
+        metrics.inc('http_requests_total', (
+            ('view', view), ('method', request.method),
+            ('status', str(response.status_code)),
+        ))
+        metrics.observe('http_request_duration_seconds', (
+            ('view', view), ('method', request.method),
+        ), duration)
+        if not response.streaming:
+            metrics.observe('http_response_size_bytes', (
+                ('view', view),
+            ), len(response.content))
+        metrics.maybe_flush()
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Let the database router know about the request, so its safe
+       reads can go to a replica"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_routing(request) as routing:
+            response = self.get_response(request)
+        routing.finish()
+        return response
+
+
+class BrowserMiddleware:
+    """Run the BROWSER_MIDDLEWARE (sessions, CSRF, messages...) only
+       for the pages used with a browser, like the admin. Requests
+       under TOKEN_ONLY_PATHS authenticate with tokens, so they skip
+       that chain and its hooks entirely"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.token_only_paths = tuple(settings.TOKEN_ONLY_PATHS)
+        # Built like the handler builds the MIDDLEWARE chain
+        self.view_hooks = []
+        self.template_response_hooks = []
+        self.exception_hooks = []
+        handler = get_response
+        for path in reversed(settings.BROWSER_MIDDLEWARE):
+            try:
+                middleware = import_string(path)(handler)
+            except MiddlewareNotUsed:
+                continue
+            if hasattr(middleware, 'process_view'):
+                self.view_hooks.insert(0, middleware.process_view)
+            if hasattr(middleware, 'process_template_response'):
+                self.template_response_hooks.append(
+                    middleware.process_template_response
+                )
+            if hasattr(middleware, 'process_exception'):
+                self.exception_hooks.append(middleware.process_exception)
+            handler = convert_exception_to_response(middleware)
+        self.browser_chain = handler
+
+    def is_token_only(self, request):
+        return request.path_info.startswith(self.token_only_paths)
+
+    def __call__(self, request):
+        if self.is_token_only(request):
+            return self.get_response(request)
+        return self.browser_chain(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.is_token_only(request):
+            return None
+        for hook in self.view_hooks:
+            response = hook(request, view_func, view_args, view_kwargs)
+            if response is not None:
+                return response
+        return None
+
+    def process_template_response(self, request, response):
+        if self.is_token_only(request):
+            return response
+        for hook in self.template_response_hooks:
+            response = hook(request, response)
+        return response
+
+    def process_exception(self, request, exception):
+        if self.is_token_only(request):
+            return None
+        for hook in self.exception_hooks:
+            response = hook(request, exception)
+            if response is not None:
+                return response
+        return None
+
+
+def accepts_encoding(header, coding):
+    """Whether an Accept-Encoding header accepts `coding`, by name or
+       through `*`, with a non-zero q value"""
+    qualities = {}
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[name] = quality
+    return qualities.get(coding, qualities.get('*', 0.0)) > 0
+
+
+def gzip_compressor(level):
+    """zlib compressor writing the gzip format"""
+    return zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+def gzip_chunks(chunks, level):
+    """Gzip a stream, flushing after every chunk so the client gets
+       each of them without waiting for the end of the stream"""
+    compressor = gzip_compressor(level)
+    for chunk in chunks:
+        data = compressor.compress(chunk) + \
+            compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class CompressionMiddleware:
+    """Gzip responses of COMPRESSION_CONTENT_TYPES, at
+       COMPRESSION_LEVEL, for clients accepting it.
+
+       Bodies under COMPRESSION_MIN_SIZE bytes are sent as is, the
+       gzip framing and the CPU time aren't worth it for them.
+       Streaming responses, like the exports, are compressed chunk by
+       chunk as they are sent. Strong ETags become weak, as the body
+       is no longer the one they were computed for"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.level = settings.COMPRESSION_LEVEL
+        self.min_size = settings.COMPRESSION_MIN_SIZE
+        self.content_types = frozenset(settings.COMPRESSION_CONTENT_TYPES)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not self.compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not accepts_encoding(
+                request.META.get('HTTP_ACCEPT_ENCODING', ''), 'gzip'):
+            return response
+
+        if response.streaming:
+            response.streaming_content = gzip_chunks(
+                response.streaming_content, self.level
+            )
+            del response['Content-Length']
+        else:
+            compressor = gzip_compressor(self.level)
+            content = compressor.compress(response.content) + \
+                compressor.flush()
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'gzip'
+        return response
+
+    def compressible(self, response):
+        """Whether the response is worth compressing, whatever the
+           client accepts"""
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '')
+        if content_type.split(';')[0].strip().lower() \
+                not in self.content_types:
+            return False
+        return response.streaming or len(response.content) >= self.min_size
@@ -0,0 +1,28 @@
+# Generated by Django 3.1.4 on 2026-10-17 16:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_review'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', '-title', 'id'], name='review_reviewer_title_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', 'submission_date'], name='review_reviewer_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='reviewer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+    ]
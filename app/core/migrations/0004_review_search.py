@@ -0,0 +1,128 @@
+from django.db import migrations
+
+
+# The search index as first installed, reading the summary from its
+# text column. Later migrations replace the triggers, see core.search
+SEARCH_CONFIG = 'english'
+BACKFILL_BATCH_SIZE = 10000
+
+_PG_VECTOR = (
+    "setweight(to_tsvector('{config}', coalesce({row}title, '')), 'A') || "
+    "setweight(to_tsvector('{config}', coalesce({row}summary, '')), 'B')"
+)
+
+POSTGRESQL_INSTALL = [
+    'ALTER TABLE core_review ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    '''CREATE OR REPLACE FUNCTION core_review_search_vector()
+       RETURNS trigger AS $$
+       BEGIN
+           NEW.search_vector := %s;
+           RETURN NEW;
+       END
+       $$ LANGUAGE plpgsql''' % _PG_VECTOR.format(
+        config=SEARCH_CONFIG, row='NEW.'
+    ),
+    'DROP TRIGGER IF EXISTS core_review_search_vector ON core_review',
+    '''CREATE TRIGGER core_review_search_vector
+       BEFORE INSERT OR UPDATE OF title, summary ON core_review
+       FOR EACH ROW EXECUTE PROCEDURE core_review_search_vector()''',
+]
+
+POSTGRESQL_INDEX = '''CREATE INDEX IF NOT EXISTS core_review_search_idx
+    ON core_review USING GIN (search_vector)'''
+
+POSTGRESQL_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS core_review_search_vector ON core_review',
+    'DROP FUNCTION IF EXISTS core_review_search_vector()',
+    'DROP INDEX IF EXISTS core_review_search_idx',
+    'ALTER TABLE core_review DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_INSTALL = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS core_review_fts USING fts5(
+           title, summary, content='core_review', content_rowid='id',
+           tokenize='porter unicode61'
+       )''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_insert
+       AFTER INSERT ON core_review BEGIN
+           INSERT INTO core_review_fts(rowid, title, summary)
+           VALUES (new.id, new.title, new.summary);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_delete
+       AFTER DELETE ON core_review BEGIN
+           INSERT INTO core_review_fts(core_review_fts, rowid, title, summary)
+           VALUES ('delete', old.id, old.title, old.summary);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_update
+       AFTER UPDATE OF title, summary ON core_review BEGIN
+           INSERT INTO core_review_fts(core_review_fts, rowid, title, summary)
+           VALUES ('delete', old.id, old.title, old.summary);
+           INSERT INTO core_review_fts(rowid, title, summary)
+           VALUES (new.id, new.title, new.summary);
+       END''',
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS core_review_fts_insert',
+    'DROP TRIGGER IF EXISTS core_review_fts_delete',
+    'DROP TRIGGER IF EXISTS core_review_fts_update',
+    'DROP TABLE IF EXISTS core_review_fts',
+]
+
+
+def _backfill_postgresql(cursor):
+    """Fill the vector of existing rows in short batches, so a large
+       table isn't locked by a single UPDATE"""
+    cursor.execute('SELECT max(id) FROM core_review')
+    max_id = cursor.fetchone()[0] or 0
+    vector = _PG_VECTOR.format(config=SEARCH_CONFIG, row='')
+    for start in range(0, max_id, BACKFILL_BATCH_SIZE):
+        cursor.execute(
+            'UPDATE core_review SET search_vector = %s '
+            'WHERE id > %%s AND id <= %%s AND search_vector IS NULL'
+            % vector,
+            [start, start + BACKFILL_BATCH_SIZE]
+        )
+
+
+def install(apps, schema_editor):
+    """Create the search column or table, its triggers and index,
+       and index the existing reviews in batches"""
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for statement in POSTGRESQL_INSTALL:
+                cursor.execute(statement)
+            _backfill_postgresql(cursor)
+            cursor.execute(POSTGRESQL_INDEX)
+        elif connection.vendor == 'sqlite':
+            for statement in SQLITE_INSTALL:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO core_review_fts(core_review_fts) "
+                "VALUES ('rebuild')"
+            )
+
+
+def uninstall(apps, schema_editor):
+    connection = schema_editor.connection
+    statements = {
+        'postgresql': POSTGRESQL_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+class Migration(migrations.Migration):
+    # The backfill runs in batches that each commit on their own
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_review_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 3.1.4 on 2026-10-17 17:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_review_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('canonical_name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'verbose_name_plural': 'companies',
+            },
+        ),
+        # The text column is kept until the reviews are backfilled
+        migrations.RenameField(
+            model_name='review',
+            old_name='company',
+            new_name='company_name',
+        ),
+        # A default lets 0007 add the column back when it is reversed
+        migrations.AlterField(
+            model_name='review',
+            name='company_name',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='company',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.PROTECT, related_name='reviews', to='core.company'),
+        ),
+    ]
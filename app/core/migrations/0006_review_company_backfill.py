@@ -0,0 +1,100 @@
+import unicodedata
+
+from django.db import migrations, transaction
+
+
+BATCH_SIZE = 5000
+# Names looked up per query, below the SQLite parameter limit
+LOOKUP_BATCH_SIZE = 500
+
+
+def canonical_name(name):
+    """The canonical company name as of this migration, see
+       core.models.canonical_company_name"""
+    name = ' '.join(unicodedata.normalize('NFKC', name).split())
+    return name.casefold()[:255]
+
+
+def intern(companies, names):
+    """Return {name: Company} for every name, creating the missing
+       companies. Names with the same canonical form share one"""
+    by_key = {}
+    for name in names:
+        by_key.setdefault(canonical_name(name), name)
+
+    found = {}
+    keys = list(by_key)
+    for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+        chunk = keys[start:start + LOOKUP_BATCH_SIZE]
+        found.update(
+            (company.canonical_name, company)
+            for company in companies.filter(canonical_name__in=chunk)
+        )
+        missing = [key for key in chunk if key not in found]
+        if missing:
+            companies.bulk_create([
+                companies.model(name=by_key[key], canonical_name=key)
+                for key in missing
+            ], ignore_conflicts=True)
+            found.update(
+                (company.canonical_name, company)
+                for company in companies.filter(canonical_name__in=missing)
+            )
+    return {name: found[canonical_name(name)] for name in names}
+
+
+def backfill(apps, schema_editor):
+    """Point every review at the company of its name, one short
+       transaction per batch of ids. Only reviews without a company
+       are read, so an interrupted run resumes where it stopped"""
+    Company = apps.get_model('core', 'Company')
+    Review = apps.get_model('core', 'Review')
+    using = schema_editor.connection.alias
+    reviews = Review.objects.using(using)
+    companies = {}
+    last_id = 0
+    while True:
+        batch = list(
+            reviews.filter(id__gt=last_id, company__isnull=True)
+            .order_by('id').values_list('id', 'company_name')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        first_id, last_id = batch[0][0], batch[-1][0]
+
+        names = {name for _, name in batch} - set(companies)
+        companies.update(intern(Company.objects.using(using), names))
+        by_company = {}
+        for _, name in batch:
+            by_company.setdefault(companies[name].id, set()).add(name)
+
+        with transaction.atomic(using=using):
+            for company_id, company_names in by_company.items():
+                reviews.filter(
+                    id__gte=first_id, id__lte=last_id,
+                    company__isnull=True, company_name__in=company_names,
+                ).update(company_id=company_id)
+
+
+def restore_names(apps, schema_editor):
+    """Copy the company names back to the reviews"""
+    Company = apps.get_model('core', 'Company')
+    Review = apps.get_model('core', 'Review')
+    using = schema_editor.connection.alias
+    for company in Company.objects.using(using).iterator():
+        Review.objects.using(using).filter(company=company).update(
+            company_name=company.name
+        )
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_company'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore_names),
+    ]
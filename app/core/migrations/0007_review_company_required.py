@@ -0,0 +1,23 @@
+# Generated by Django 3.1.4 on 2026-10-17 17:42
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_review_company_backfill'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='review',
+            name='company_name',
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='company',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='reviews', to='core.company'),
+        ),
+    ]
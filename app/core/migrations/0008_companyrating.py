@@ -0,0 +1,49 @@
+# Generated by Django 3.1.4 on 2026-10-17 18:05
+
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+import django.db.models.deletion
+
+
+def fill_ratings(apps, schema_editor):
+    """Summarize the reviews already written"""
+    Company = apps.get_model('core', 'Company')
+    CompanyRating = apps.get_model('core', 'CompanyRating')
+    using = schema_editor.connection.alias
+    counts = {
+        'rating_%d' % rating: Count(
+            'reviews', filter=Q(reviews__rating=rating)
+        )
+        for rating in range(1, 6)
+    }
+    rows = Company.objects.using(using).annotate(
+        count=Count('reviews'), rating_sum=Sum('reviews__rating'),
+        **counts
+    ).filter(count__gt=0).values('id', 'count', 'rating_sum', *counts)
+    CompanyRating.objects.using(using).bulk_create(
+        CompanyRating(company_id=row.pop('id'), **row) for row in rows
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_review_company_required'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CompanyRating',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating', serialize=False, to='core.company')),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.PositiveIntegerField(default=0)),
+                ('rating_1', models.PositiveIntegerField(default=0)),
+                ('rating_2', models.PositiveIntegerField(default=0)),
+                ('rating_3', models.PositiveIntegerField(default=0)),
+                ('rating_4', models.PositiveIntegerField(default=0)),
+                ('rating_5', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 3.1.4 on 2026-10-17 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_companyrating'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['company', 'submission_date'], name='review_company_date_idx'),
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.PROTECT, related_name='reviews', to='core.company'),
+        ),
+    ]
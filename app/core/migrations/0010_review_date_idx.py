@@ -0,0 +1,17 @@
+# Generated by Django 3.1.4 on 2026-10-17 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_review_company_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['submission_date'], name='review_date_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.1.4 on 2026-10-17 19:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0010_review_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='review_sequence',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='sequence',
+            field=models.BigIntegerField(default=0, editable=False),
+        ),
+        migrations.CreateModel(
+            name='ReviewTombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('review_id', models.IntegerField()),
+                ('sequence', models.BigIntegerField()),
+                ('reviewer', models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='reviewtombstone',
+            index=models.Index(fields=['reviewer', 'sequence'], name='tombstone_reviewer_seq_idx'),
+        ),
+    ]
@@ -0,0 +1,54 @@
+from django.db import migrations, models, transaction
+from django.db.models import F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+BATCH_SIZE = 5000
+
+
+def backfill(apps, schema_editor):
+    """Number the reviews already written with their id, one short
+       transaction per batch of ids, then start the sequence of each
+       reviewer after its last review. Only reviews without a number
+       are read, so an interrupted run resumes where it stopped"""
+    Review = apps.get_model('core', 'Review')
+    User = apps.get_model('core', 'User')
+    using = schema_editor.connection.alias
+    reviews = Review.objects.using(using)
+    last_id = 0
+    while True:
+        ids = list(
+            reviews.filter(id__gt=last_id, sequence=0)
+            .order_by('id').values_list('id', flat=True)[:BATCH_SIZE]
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+        with transaction.atomic(using=using):
+            reviews.filter(
+                id__gte=ids[0], id__lte=last_id, sequence=0
+            ).update(sequence=F('id'))
+
+    last_sequence = reviews.filter(reviewer=OuterRef('pk')) \
+        .values('reviewer').annotate(last=Max('sequence')).values('last')
+    User.objects.using(using).update(
+        review_sequence=Coalesce(Subquery(last_sequence), 0)
+    )
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('core', '0011_review_sequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+        # Built once the reviews are numbered
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['reviewer', 'sequence'], name='review_reviewer_sequence_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 3.1.4 on 2026-10-17 19:50
+
+import core.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_review_sequence_backfill'),
+    ]
+
+    operations = [
+        # Filled from the text column before replacing it
+        migrations.AddField(
+            model_name='review',
+            name='summary_data',
+            field=core.fields.CompressedTextField(max_length=10000, null=True),
+        ),
+        migrations.AddField(
+            model_name='review',
+            name='search_summary',
+            field=models.TextField(editable=False, null=True),
+        ),
+    ]
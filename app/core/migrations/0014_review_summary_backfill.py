@@ -0,0 +1,59 @@
+from django.db import migrations, transaction
+
+
+BATCH_SIZE = 2000
+
+
+def backfill(apps, schema_editor):
+    """Compress every summary into the new column, one short
+       transaction per batch of ids. Only reviews not compressed yet
+       are read, so an interrupted run resumes where it stopped.
+       Without the PostgreSQL trigger clearing it, the plain text is
+       also kept for the search index"""
+    Review = apps.get_model('core', 'Review')
+    using = schema_editor.connection.alias
+    reviews = Review.objects.using(using)
+    fields = ['summary_data']
+    if schema_editor.connection.vendor != 'postgresql':
+        fields.append('search_summary')
+    last_id = 0
+    while True:
+        batch = list(
+            reviews.filter(id__gt=last_id, summary_data__isnull=True)
+            .order_by('id').only('id', 'summary')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+        last_id = batch[-1].id
+        for review in batch:
+            review.summary_data = review.search_summary = review.summary
+        with transaction.atomic(using=using):
+            reviews.bulk_update(batch, fields, batch_size=500)
+
+
+def restore_text(apps, schema_editor):
+    """Copy the summaries back to the text column"""
+    Review = apps.get_model('core', 'Review')
+    using = schema_editor.connection.alias
+    reviews = Review.objects.using(using)
+    batch = []
+    for review in reviews.only('id', 'summary_data').iterator():
+        review.summary = review.summary_data
+        batch.append(review)
+        if len(batch) == BATCH_SIZE:
+            reviews.bulk_update(batch, ['summary'], batch_size=500)
+            batch = []
+    reviews.bulk_update(batch, ['summary'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+    # Every batch commits on its own
+    atomic = False
+
+    dependencies = [
+        ('core', '0013_review_summary_data'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, restore_text),
+    ]
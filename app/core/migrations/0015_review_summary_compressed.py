@@ -0,0 +1,128 @@
+# Generated by Django 3.1.4 on 2026-10-17 19:55
+
+import core.fields
+from django.db import migrations
+
+
+# The search index as of this migration, reading the summary handed
+# over in search_summary. Later changes go in migrations of their own,
+# see core.search
+SEARCH_CONFIG = 'english'
+
+_PG_TITLE = "setweight(to_tsvector('%s', coalesce(NEW.title, '')), 'A')" \
+    % SEARCH_CONFIG
+_PG_SUMMARY = (
+    "setweight(to_tsvector('%s', coalesce(NEW.search_summary, '')), 'B')"
+    % SEARCH_CONFIG
+)
+
+POSTGRESQL_INSTALL = [
+    'ALTER TABLE core_review ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    '''CREATE OR REPLACE FUNCTION core_review_search_vector()
+       RETURNS trigger AS $$
+       BEGIN
+           IF TG_OP = 'UPDATE' AND NEW.search_summary IS NULL THEN
+               NEW.search_vector := %(title)s ||
+                   ts_filter(coalesce(OLD.search_vector, ''), '{b}');
+           ELSE
+               NEW.search_vector := %(title)s || %(summary)s;
+           END IF;
+           NEW.search_summary := NULL;
+           RETURN NEW;
+       END
+       $$ LANGUAGE plpgsql''' % {'title': _PG_TITLE, 'summary': _PG_SUMMARY},
+    'DROP TRIGGER IF EXISTS core_review_search_vector ON core_review',
+    '''CREATE TRIGGER core_review_search_vector
+       BEFORE INSERT OR UPDATE OF title, summary, search_summary
+       ON core_review
+       FOR EACH ROW EXECUTE PROCEDURE core_review_search_vector()''',
+    '''CREATE INDEX IF NOT EXISTS core_review_search_idx
+       ON core_review USING GIN (search_vector)''',
+]
+
+SQLITE_INSTALL = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS core_review_fts USING fts5(
+           title, search_summary, content='core_review',
+           content_rowid='id', tokenize='porter unicode61'
+       )''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_insert
+       AFTER INSERT ON core_review BEGIN
+           INSERT INTO core_review_fts(rowid, title, search_summary)
+           VALUES (new.id, new.title, new.search_summary);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_delete
+       AFTER DELETE ON core_review BEGIN
+           INSERT INTO core_review_fts(
+               core_review_fts, rowid, title, search_summary
+           ) VALUES ('delete', old.id, old.title, old.search_summary);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_update
+       AFTER UPDATE OF title, search_summary ON core_review BEGIN
+           INSERT INTO core_review_fts(
+               core_review_fts, rowid, title, search_summary
+           ) VALUES ('delete', old.id, old.title, old.search_summary);
+           INSERT INTO core_review_fts(rowid, title, search_summary)
+           VALUES (new.id, new.title, new.search_summary);
+       END''',
+    "INSERT INTO core_review_fts(core_review_fts) VALUES ('rebuild')",
+]
+
+# Stop maintaining the index. PostgreSQL keeps the vectors, the SQLite
+# table is dropped and rebuilt by the install
+DROP_TRIGGERS = {
+    'postgresql': [
+        'DROP TRIGGER IF EXISTS core_review_search_vector ON core_review',
+    ],
+    'sqlite': [
+        'DROP TRIGGER IF EXISTS core_review_fts_insert',
+        'DROP TRIGGER IF EXISTS core_review_fts_delete',
+        'DROP TRIGGER IF EXISTS core_review_fts_update',
+        'DROP TABLE IF EXISTS core_review_fts',
+    ],
+}
+
+
+def execute(connection, statements):
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    execute(connection, DROP_TRIGGERS.get(connection.vendor, []))
+
+
+def install_triggers(apps, schema_editor):
+    connection = schema_editor.connection
+    execute(connection, {
+        'postgresql': POSTGRESQL_INSTALL,
+        'sqlite': SQLITE_INSTALL,
+    }.get(connection.vendor, []))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_review_summary_backfill'),
+    ]
+
+    operations = [
+        # The triggers read the text column being dropped
+        migrations.RunPython(drop_triggers, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='review',
+            name='summary',
+        ),
+        migrations.RenameField(
+            model_name='review',
+            old_name='summary_data',
+            new_name='summary',
+        ),
+        migrations.AlterField(
+            model_name='review',
+            name='summary',
+            field=core.fields.CompressedTextField(max_length=10000),
+        ),
+        migrations.RunPython(install_triggers, drop_triggers),
+    ]
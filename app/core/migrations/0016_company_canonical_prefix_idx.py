@@ -0,0 +1,17 @@
+# Generated by Django 3.1.4 on 2026-10-17 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_review_summary_compressed'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='company',
+            index=models.Index(fields=['canonical_name'], name='company_canonical_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
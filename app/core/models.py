@@ -1,4 +1,9 @@
-from django.db import models
+import unicodedata
+
+from collections import Counter
+
+from django.db import IntegrityError, models, router, transaction
+from django.db.models import Count, F, Q, Sum
 from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
@@ -6,6 +11,8 @@ from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, \
 from django.conf import settings
 from django.utils.translation import gettext as _
 
+from core.fields import CompressedText, CompressedTextField
+
 
 class UserManager(BaseUserManager):
     """Manager for custom user profiles and encrypted passwords"""
@@ -36,11 +43,144 @@ class User(AbstractBaseUser, PermissionsMixin):
     name = models.CharField(max_length=250)
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # Last sequence number given to a change of the user reviews
+    review_sequence = models.BigIntegerField(default=0, editable=False)
 
     objects = UserManager()
 
     USERNAME_FIELD = 'email'
 
+    def save(self, *args, **kwargs):
+        """Never write review_sequence back when updating a user. Only
+           ReviewManager.next_sequence moves it, with an F() update, and
+           users loaded before (like the ones of the token cache) hold
+           a stale value that would hand out numbers again"""
+        if not self._state.adding and not kwargs.get('force_insert') \
+                and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != 'review_sequence'
+            ]
+        super().save(*args, **kwargs)
+
+
+def canonical_company_name(name):
+    """Key telling companies apart: case, Unicode compatibility forms
+       and runs of whitespace don't make a different company"""
+    name = ' '.join(unicodedata.normalize('NFKC', name).split())
+    return name.casefold()[:255]
+
+
+class CompanyManager(models.Manager):
+    """Manager interning company names"""
+    # Names looked up per query, below the SQLite parameter limit
+    lookup_batch_size = 500
+
+    def intern(self, names, using=None, create=True):
+        """Return {name: Company} for every name, creating the
+           companies that don't exist yet. Names with the same
+           canonical form get the same company. With create=False
+           nothing is written, missing companies are left unsaved"""
+        companies = self.db_manager(using or router.db_for_write(self.model))
+        by_key = {}
+        for name in names:
+            by_key.setdefault(canonical_company_name(name), name)
+
+        found = {}
+        keys = list(by_key)
+        for start in range(0, len(keys), self.lookup_batch_size):
+            chunk = keys[start:start + self.lookup_batch_size]
+            found.update(
+                (company.canonical_name, company)
+                for company in companies.filter(canonical_name__in=chunk)
+            )
+            missing = [key for key in chunk if key not in found]
+            if missing and not create:
+                found.update(
+                    (key, self.model(name=by_key[key], canonical_name=key))
+                    for key in missing
+                )
+            elif missing:
+                # Concurrent writers may create the same company, the
+                # unique canonical name keeps one of them
+                companies.bulk_create([
+                    self.model(name=by_key[key], canonical_name=key)
+                    for key in missing
+                ], ignore_conflicts=True)
+                found.update(
+                    (company.canonical_name, company)
+                    for company in companies.filter(
+                        canonical_name__in=missing
+                    )
+                )
+        return {
+            name: found[canonical_company_name(name)] for name in names
+        }
+
+
+class Company(models.Model):
+    """Company reviewed, shared by all of its reviews"""
+    # Name as first submitted
+    name = models.CharField(max_length=255)
+    canonical_name = models.CharField(max_length=255, unique=True)
+
+    objects = CompanyManager()
+
+    class Meta:
+        verbose_name_plural = 'companies'
+        indexes = [
+            # Prefix searches of the admin. PostgreSQL only serves LIKE
+            # from a btree with the pattern operator class
+            models.Index(
+                fields=['canonical_name'],
+                name='company_canonical_prefix_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.canonical_name = canonical_company_name(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
+class ReviewManager(models.Manager):
+    """Manager numbering the changes of the reviews of each reviewer"""
+
+    def next_sequence(self, reviewer_id, count=1, using=None):
+        """Reserve `count` sequence numbers of a reviewer, returning
+           the first one. The reviewer row stays locked until the
+           transaction ends, so the changes of a reviewer commit in
+           the order of their numbers"""
+        using = using or router.db_for_write(self.model)
+        users = self.model._meta.get_field('reviewer').related_model \
+            ._default_manager.db_manager(using).filter(pk=reviewer_id)
+        users.update(review_sequence=F('review_sequence') + count)
+        last = users.values_list('review_sequence', flat=True).first()
+        return last - count + 1
+
+    def number(self, reviews, using=None):
+        """Give every review the next sequence number of its
+           reviewer. Meant to run in the transaction writing them"""
+        by_reviewer = {}
+        for review in reviews:
+            by_reviewer.setdefault(review.reviewer_id, []).append(review)
+        # Reviewers are locked in the same order by every writer
+        for reviewer_id in sorted(by_reviewer):
+            batch = by_reviewer[reviewer_id]
+            first = self.next_sequence(reviewer_id, len(batch), using)
+            for sequence, review in enumerate(batch, first):
+                review.sequence = sequence
+
+    def bulk_create(self, objs, *args, **kwargs):
+        """Hand the summaries to the search triggers, like save"""
+        objs = list(objs)
+        for review in objs:
+            review.search_summary = review.summary
+        return super().bulk_create(objs, *args, **kwargs)
+
 
 class Review(models.Model):
     """Tag to be used for a recipe"""
@@ -48,22 +188,213 @@ class Review(models.Model):
     rating = models.IntegerField(
             validators=[MaxValueValidator(5), MinValueValidator(1)]
             )
-    summary = models.TextField(max_length=10000)
+    summary = CompressedTextField(max_length=10000)
+    # Plain summary handed to the full-text search triggers on write,
+    # the stored summary is compressed so they can't read it. On
+    # PostgreSQL the trigger clears it, so it is never stored
+    search_summary = models.TextField(null=True, editable=False)
     ip = models.CharField(max_length=45)
     submission_date = models.DateTimeField(auto_now_add=True)
-    company = models.CharField(max_length=255)
+    company = models.ForeignKey(
+        Company,
+        on_delete=models.PROTECT,
+        related_name='reviews',
+        db_index=False,
+    )
     reviewer = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        db_index=False,
     )
+    # Number of the last change, see ReviewManager.number
+    sequence = models.BigIntegerField(default=0, editable=False)
+
+    objects = ReviewManager()
+
+    class Meta:
+        # The reviewer and company indexes lead with the foreign key, so
+        # they also serve the lookups the plain foreign key indexes were
+        # used for
+        indexes = [
+            models.Index(
+                fields=['reviewer', '-title', 'id'],
+                name='review_reviewer_title_idx',
+            ),
+            models.Index(
+                fields=['reviewer', 'submission_date'],
+                name='review_reviewer_date_idx',
+            ),
+            # Changes of a reviewer in order, for the delta sync
+            models.Index(
+                fields=['reviewer', 'sequence'],
+                name='review_reviewer_sequence_idx',
+            ),
+            # Range scans for the company rating trends
+            models.Index(
+                fields=['company', 'submission_date'],
+                name='review_company_date_idx',
+            ),
+            # Date hierarchy of the admin, over every review
+            models.Index(
+                fields=['submission_date'],
+                name='review_date_idx',
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """Number the change in the transaction saving it, and hand
+           the summary to the search triggers"""
+        using = kwargs.get('using') or \
+            router.db_for_write(type(self), instance=self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields:
+            update_fields = set(update_fields) | {'sequence'}
+            if 'summary' in update_fields:
+                update_fields.add('search_summary')
+            kwargs['update_fields'] = update_fields
+        # A summary still compressed as loaded hasn't changed, the
+        # search index already has its words
+        summary = self.__dict__.get('summary')
+        if summary is not None and \
+                not isinstance(summary, CompressedText) and \
+                (not update_fields or 'summary' in update_fields):
+            self.search_summary = summary
+        with transaction.atomic(using=using, savepoint=False):
+            type(self)._default_manager.db_manager(using).number([self])
+            super().save(*args, **kwargs)
 
     def clean(self):
         """Validation for title, summary and company fields"""
         if self.title is None or self.title == '':
             raise ValidationError(_('Review needs a title!'))
-        if self.company is None or self.company == '':
+        # A company named for the first time stays unsaved until the
+        # review is written
+        company = self._meta.get_field('company').get_cached_value(
+            self, None
+        )
+        if self.company_id is None and company is None:
             raise ValidationError(_('Review needs a company!'))
 
     def __str__(self):
         """Method for transforming review into string"""
         return self.title
+
+
+class ReviewTombstone(models.Model):
+    """Left behind by a deleted review, so the delta sync can tell
+       the clients holding it"""
+    # Reviews of deleted users leave tombstones while the user row is
+    # deleted, they are cleared once it is gone
+    reviewer = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        db_index=False,
+        related_name='+',
+    )
+    review_id = models.IntegerField()
+    sequence = models.BigIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['reviewer', 'sequence'],
+                name='tombstone_reviewer_seq_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return 'Review %s' % self.review_id
+
+
+# Ratings a review can give, each one counted by a CompanyRating column
+RATINGS = range(1, 6)
+
+
+class CompanyRatingManager(models.Manager):
+    """Manager keeping the rating summaries in step with the reviews"""
+
+    def record(self, reviews, sign=1, using=None):
+        """Add the ratings of `reviews` to the summaries of their
+           companies, or take them off with sign=-1. Meant to run in
+           the transaction writing the reviews"""
+        tallies = {}
+        for review in reviews:
+            tally = tallies.setdefault(review.company_id, Counter())
+            tally['count'] += sign
+            tally['rating_sum'] += sign * review.rating
+            tally['rating_%d' % review.rating] += sign
+
+        using = using or router.db_for_write(self.model)
+        # Rows are locked in the same order by every writer, so two
+        # batches touching the same companies can't deadlock
+        for company_id in sorted(tallies):
+            self._add(company_id, tallies[company_id], using)
+
+    def _add(self, company_id, tally, using):
+        """Upsert one summary. The increments are computed by the
+           database, so concurrent writers never overwrite each other"""
+        summaries = self.db_manager(using).filter(company_id=company_id)
+        changes = {name: F(name) + value for name, value in tally.items()}
+        if summaries.update(**changes) or tally['count'] < 0:
+            return
+        try:
+            with transaction.atomic(using=using):
+                self.db_manager(using).create(company_id=company_id, **tally)
+        except IntegrityError:
+            # Another writer created the summary first
+            summaries.update(**changes)
+
+    def compute(self, using=None):
+        """Tally every review from scratch, returning the summary
+           fields of each reviewed company as {company_id: {...}}"""
+        companies = self.model._meta.get_field('company').related_model
+        counts = {
+            'rating_%d' % rating: Count(
+                'reviews', filter=Q(reviews__rating=rating)
+            )
+            for rating in RATINGS
+        }
+        rows = companies._default_manager.db_manager(using).annotate(
+            count=Count('reviews'), rating_sum=Sum('reviews__rating'),
+            **counts
+        ).filter(count__gt=0).values('id', 'count', 'rating_sum', *counts)
+        return {row.pop('id'): row for row in rows}
+
+
+class CompanyRating(models.Model):
+    """Rating summary of a company, updated with every review
+       written so it never has to be computed from the reviews"""
+    company = models.OneToOneField(
+        Company,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='rating',
+    )
+    count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
+
+    objects = CompanyRatingManager()
+
+    @property
+    def average(self):
+        """Average rating, None for a company without reviews"""
+        if not self.count:
+            return None
+        return round(self.rating_sum / self.count, 2)
+
+    @property
+    def distribution(self):
+        """Number of reviews giving each rating"""
+        return {
+            str(rating): getattr(self, 'rating_%d' % rating)
+            for rating in RATINGS
+        }
+
+    def __str__(self):
+        return str(self.company)
@@ -0,0 +1,124 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.functional import SimpleLazyObject, empty
+
+
+_state = ContextVar('db_routing', default=None)
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Always read from the primary: a token created a moment ago has to
+# work on the next request, before the user is known
+PRIMARY_MODELS = {'authtoken.token', 'authtoken.tokenproxy'}
+
+
+def replica_aliases():
+    """Database aliases configured as read replicas"""
+    return [alias for alias in settings.DATABASES if alias != DEFAULT_DB_ALIAS
+            and alias.startswith('replica')]
+
+
+def _sticky_key(user_id):
+    return 'db-sticky-primary:%s' % user_id
+
+
+def stick_to_primary(*user_ids):
+    """Send the reads of these users to the primary for a while, so
+       they see the changes made to their rows while the replicas catch
+       up. Also called for writes made outside of their requests, like
+       write-behind flushes, imports and admin edits"""
+    if user_ids:
+        sticky_cache().set_many(
+            {_sticky_key(user_id): True for user_id in set(user_ids)},
+            settings.DATABASE_REPLICA_STICKY_SECONDS
+        )
+
+
+class RequestRouting:
+    """What the router knows about the request being handled"""
+
+    def __init__(self, request):
+        self.request = request
+        self.safe = request.method in SAFE_METHODS
+        self.wrote = False
+        self._sticky_user = None
+        self._sticky = False
+
+    @property
+    def user_id(self):
+        """Id of the authenticated user, if it is already known.
+           A lazy user that wasn't resolved yet is left alone, as
+           resolving it would query the database from the router"""
+        user = self.request.__dict__.get('user')
+        if isinstance(user, SimpleLazyObject):
+            user = user._wrapped
+            if user is empty:
+                return None
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
+
+    def use_replica(self):
+        if not self.safe or self.wrote:
+            return False
+        user_id = self.user_id
+        if user_id is not None and user_id != self._sticky_user:
+            self._sticky_user = user_id
+            self._sticky = bool(sticky_cache().get(_sticky_key(user_id)))
+        return not (user_id is not None and self._sticky)
+
+    def finish(self):
+        """Keep the user who wrote on the primary for a while, so they
+           read their own writes while the replicas catch up"""
+        user_id = self.user_id
+        if self.wrote and user_id is not None:
+            stick_to_primary(user_id)
+
+
+def sticky_cache():
+    return caches[settings.DATABASE_STICKY_CACHE_ALIAS]
+
+
+@contextmanager
+def request_routing(request):
+    """Route the queries run within the block for `request`"""
+    routing = RequestRouting(request)
+    token = _state.set(routing)
+    try:
+        yield routing
+    finally:
+        _state.reset(token)
+
+
+class ReplicaRouter:
+    """Send the reads of safe-method requests to a random replica,
+       and everything else to the primary. Queries run outside of a
+       request, like commands and tests, always use the primary"""
+
+    def __init__(self, replicas=None):
+        self.replicas = replicas if replicas is not None \
+            else replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        routing = _state.get()
+        if not self.replicas or routing is None or \
+                model._meta.label_lower in PRIMARY_MODELS or \
+                connections[DEFAULT_DB_ALIAS].in_atomic_block or \
+                not routing.use_replica():
+            return DEFAULT_DB_ALIAS
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        routing = _state.get()
+        if routing is not None:
+            routing.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Replicas hold the same rows as the primary"""
+        return True
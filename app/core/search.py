@@ -0,0 +1,203 @@
+"""Full-text search over review titles and summaries.
+
+PostgreSQL keeps a weighted `search_vector` tsvector column up to date
+with a trigger and indexes it with GIN. SQLite keeps an external-content
+FTS5 table in sync with triggers. Both are maintained by the database,
+so bulk_create and COPY imports are indexed like any other write. The
+column and the FTS5 table are not part of the Review model.
+
+Summaries are stored compressed, so every write hands the plain text to
+the triggers in `search_summary`. The PostgreSQL trigger indexes it and
+clears it before the row is stored. An UPDATE without it keeps the
+summary words already indexed. SQLite keeps it, as its FTS5 table reads
+the text from the reviews.
+"""
+import re
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+
+SEARCH_CONFIG = 'english'
+
+# Title matches weigh more than summary matches
+_PG_TITLE = "setweight(to_tsvector('%s', coalesce(NEW.title, '')), 'A')" \
+    % SEARCH_CONFIG
+_PG_SUMMARY = (
+    "setweight(to_tsvector('%s', coalesce(NEW.search_summary, '')), 'B')"
+    % SEARCH_CONFIG
+)
+
+POSTGRESQL_INSTALL = [
+    'ALTER TABLE core_review ADD COLUMN IF NOT EXISTS search_vector tsvector',
+    '''CREATE OR REPLACE FUNCTION core_review_search_vector()
+       RETURNS trigger AS $$
+       BEGIN
+           IF TG_OP = 'UPDATE' AND NEW.search_summary IS NULL THEN
+               NEW.search_vector := %(title)s ||
+                   ts_filter(coalesce(OLD.search_vector, ''), '{b}');
+           ELSE
+               NEW.search_vector := %(title)s || %(summary)s;
+           END IF;
+           NEW.search_summary := NULL;
+           RETURN NEW;
+       END
+       $$ LANGUAGE plpgsql''' % {'title': _PG_TITLE, 'summary': _PG_SUMMARY},
+    'DROP TRIGGER IF EXISTS core_review_search_vector ON core_review',
+    '''CREATE TRIGGER core_review_search_vector
+       BEFORE INSERT OR UPDATE OF title, summary, search_summary
+       ON core_review
+       FOR EACH ROW EXECUTE PROCEDURE core_review_search_vector()''',
+]
+
+POSTGRESQL_INDEX = '''CREATE INDEX IF NOT EXISTS core_review_search_idx
+    ON core_review USING GIN (search_vector)'''
+
+POSTGRESQL_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS core_review_search_vector ON core_review',
+    'DROP FUNCTION IF EXISTS core_review_search_vector()',
+    'DROP INDEX IF EXISTS core_review_search_idx',
+    'ALTER TABLE core_review DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_INSTALL = [
+    '''CREATE VIRTUAL TABLE IF NOT EXISTS core_review_fts USING fts5(
+           title, search_summary, content='core_review',
+           content_rowid='id', tokenize='porter unicode61'
+       )''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_insert
+       AFTER INSERT ON core_review BEGIN
+           INSERT INTO core_review_fts(rowid, title, search_summary)
+           VALUES (new.id, new.title, new.search_summary);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_delete
+       AFTER DELETE ON core_review BEGIN
+           INSERT INTO core_review_fts(
+               core_review_fts, rowid, title, search_summary
+           ) VALUES ('delete', old.id, old.title, old.search_summary);
+       END''',
+    '''CREATE TRIGGER IF NOT EXISTS core_review_fts_update
+       AFTER UPDATE OF title, search_summary ON core_review BEGIN
+           INSERT INTO core_review_fts(
+               core_review_fts, rowid, title, search_summary
+           ) VALUES ('delete', old.id, old.title, old.search_summary);
+           INSERT INTO core_review_fts(rowid, title, search_summary)
+           VALUES (new.id, new.title, new.search_summary);
+       END''',
+]
+
+SQLITE_TRIGGERS = (
+    'core_review_fts_insert', 'core_review_fts_delete',
+    'core_review_fts_update',
+)
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS %s' % name for name in SQLITE_TRIGGERS
+] + ['DROP TABLE IF EXISTS core_review_fts']
+
+
+def install_search_index(connection):
+    """Create the search column or table, its triggers and index.
+       SQLite indexes the existing reviews, PostgreSQL rows keep the
+       vector they have"""
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            for statement in POSTGRESQL_INSTALL:
+                cursor.execute(statement)
+            cursor.execute(POSTGRESQL_INDEX)
+        elif connection.vendor == 'sqlite':
+            for statement in SQLITE_INSTALL:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO core_review_fts(core_review_fts) "
+                "VALUES ('rebuild')"
+            )
+
+
+def uninstall_search_index(connection):
+    """Drop everything install_search_index created"""
+    statements = {
+        'postgresql': POSTGRESQL_UNINSTALL,
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def drop_search_triggers(connection):
+    """Stop maintaining the index, keeping the PostgreSQL vectors. The
+       SQLite table is dropped, install_search_index rebuilds it"""
+    statements = {
+        'postgresql': POSTGRESQL_UNINSTALL[:1],
+        'sqlite': SQLITE_UNINSTALL,
+    }.get(connection.vendor, [])
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def ensure_search_index(connection):
+    """SQLite rebuilds a table to alter it, which drops its triggers.
+       Put them back, and reindex, if a migration removed them"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'table' "
+            "AND name = 'core_review'"
+        )
+        if not cursor.fetchone()[0]:
+            return
+        cursor.execute(
+            "SELECT count(*) FROM sqlite_master WHERE type = 'trigger' "
+            "AND name IN (%s)" % ', '.join(['%s'] * len(SQLITE_TRIGGERS)),
+            SQLITE_TRIGGERS
+        )
+        if cursor.fetchone()[0] == len(SQLITE_TRIGGERS):
+            return
+    install_search_index(connection)
+
+
+def _fts5_query(query):
+    """Quote every word so user input can't break the FTS5 syntax"""
+    return ' '.join('"%s"' % word for word in re.findall(r'\w+', query))
+
+
+def search_reviews(queryset, query):
+    """Filter a review queryset down to the reviews matching a user
+       query, annotated with a `rank` (higher is better)"""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = "websearch_to_tsquery('%s', %%s)" % SEARCH_CONFIG
+        return queryset.annotate(rank=RawSQL(
+            # double precision keeps the rank exact in pagination cursors
+            'CAST(ts_rank_cd(core_review.search_vector, %s) '
+            'AS double precision)' % tsquery,
+            (query,), output_field=FloatField()
+        )).filter(RawSQL(
+            'core_review.search_vector @@ %s' % tsquery,
+            (query,), output_field=BooleanField()
+        ))
+
+    if vendor == 'sqlite':
+        match = _fts5_query(query)
+        if not match:
+            return queryset.annotate(
+                rank=Value(0.0, output_field=FloatField())
+            ).none()
+        return queryset.annotate(rank=RawSQL(
+            'SELECT -bm25(core_review_fts, 10.0, 1.0) FROM core_review_fts '
+            'WHERE core_review_fts MATCH %s '
+            'AND core_review_fts.rowid = core_review.id',
+            (match,), output_field=FloatField()
+        )).filter(id__in=RawSQL(
+            'SELECT rowid FROM core_review_fts '
+            'WHERE core_review_fts MATCH %s', (match,)
+        ))
+
+    # Without triggers to clear it, the plain summary stays stored
+    return queryset.filter(
+        Q(title__icontains=query) | Q(search_summary__icontains=query)
+    ).annotate(rank=Value(0.0, output_field=FloatField()))
@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from benchmarks import admin as admin_benchmark
+from core.companies import company_cache
+from core.management.commands.benchmark import Command as BenchmarkCommand
+from core.models import Company, Review
+
+
+REVIEW_CHANGELIST_URL = reverse('admin:core_review_changelist')
+USER_CHANGELIST_URL = reverse('admin:core_user_changelist')
+COMPANY_CHANGELIST_URL = reverse('admin:core_company_changelist')
+
+
+class AdminTests(TestCase):
+    """Test the review and user changelists of the admin"""
+
+    def setUp(self):
+        self.admin_user = get_user_model().objects.create_superuser(
+            'admin@test.com',
+            'password'
+        )
+        self.client.force_login(self.admin_user)
+        self.user = get_user_model().objects.create_user(
+            'reviewer@test.com',
+            'password'
+        )
+
+    def test_review_changelist(self):
+        """Test reviews are listed, searched through the full-text
+           index and filtered by rating"""
+        for title, rating in [('Great espresso', 5), ('Cold pizza', 2)]:
+            Review.objects.create(
+                reviewer=self.user, title=title, rating=rating,
+                summary='Nothing else to say', ip='10.0.0.1',
+                company=company_cache.get('Test Company'),
+            )
+
+        res = self.client.get(REVIEW_CHANGELIST_URL)
+        self.assertContains(res, 'Great espresso')
+        self.assertContains(res, 'Cold pizza')
+
+        res = self.client.get(REVIEW_CHANGELIST_URL, {'q': 'espresso'})
+        self.assertContains(res, 'Great espresso')
+        self.assertNotContains(res, 'Cold pizza')
+
+        res = self.client.get(REVIEW_CHANGELIST_URL, {'rating': 2})
+        self.assertNotContains(res, 'Great espresso')
+        self.assertContains(res, 'Cold pizza')
+
+    def test_user_changelist_search(self):
+        """Test users are searched by their full email"""
+        res = self.client.get(USER_CHANGELIST_URL, {'q': 'reviewer@test.com'})
+        self.assertContains(res, 'reviewer@test.com')
+
+        res = self.client.get(USER_CHANGELIST_URL, {'q': 'reviewer'})
+        self.assertNotContains(res, 'reviewer@test.com')
+
+    def test_company_changelist_search(self):
+        """Test companies are searched by the prefix of their
+           canonical name, not by a substring"""
+        Company.objects.intern(['Acme Inc', 'Acme Labs', 'Big Acme'])
+
+        res = self.client.get(COMPANY_CHANGELIST_URL, {'q': ' ACME  inc '})
+        self.assertContains(res, 'Acme Inc')
+        self.assertNotContains(res, 'Acme Labs')
+
+        res = self.client.get(COMPANY_CHANGELIST_URL, {'q': 'acme'})
+        self.assertContains(res, 'Acme Inc')
+        self.assertContains(res, 'Acme Labs')
+        self.assertNotContains(res, 'Big Acme')
+
+    def test_admin_benchmark_runs(self):
+        """Smoke test of `manage.py benchmark admin` on a few rows"""
+        out = StringIO()
+
+        admin_benchmark.run(BenchmarkCommand(stdout=out), rows=20)
+
+        self.assertIn('date drilldown', out.getvalue())
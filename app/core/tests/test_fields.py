@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from core import fields
+from core.companies import company_cache
+from core.models import Review
+
+
+class BestZlibCodec(fields.ZlibCodec):
+    """zlib at its best ratio, under a tag of its own"""
+    tag = b'9'
+    name = 'zlib-best'
+
+    def __init__(self):
+        super().__init__(level=9)
+
+
+class CompressedTextFieldTests(TestCase):
+    """Test review summaries stored compressed"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+
+    def create_review(self, summary):
+        return Review.objects.create(
+            reviewer=self.user, title='Review 1', rating=5, summary=summary,
+            ip='190.190.190.1', company=company_cache.get('Test Company'),
+        )
+
+    def stored(self, review):
+        """Payload of the review summary as stored in the database"""
+        value = Review.objects.values_list(
+            'summary', flat=True
+        ).get(pk=review.pk)
+        return value.payload
+
+    def test_summary_roundtrip(self):
+        """Test long summaries are compressed, short ones are stored as
+           is, and both read back as the text that was written"""
+        long_text = 'The coffee machine arrived late. ' * 50
+        long_review = self.create_review(long_text)
+        short_review = self.create_review('Fine')
+
+        self.assertEqual(self.stored(long_review)[:1], b'z')
+        self.assertLess(len(self.stored(long_review)), len(long_text))
+        self.assertEqual(self.stored(short_review), b'\x00Fine')
+        self.assertEqual(Review.objects.get(pk=long_review.pk).summary,
+                         long_text)
+        self.assertEqual(Review.objects.get(pk=short_review.pk).summary,
+                         'Fine')
+
+    def test_summary_decompressed_when_read(self):
+        """Test loaded summaries stay compressed until read, also when
+           other fields of the review are saved"""
+        review = self.create_review('Nothing to say ' * 20)
+        payload = self.stored(review)
+
+        review = Review.objects.get(pk=review.pk)
+        self.assertIsInstance(review.__dict__['summary'],
+                              fields.CompressedText)
+        review.rating = 3
+        review.save()
+
+        self.assertEqual(self.stored(review), payload)
+        self.assertEqual(review.summary, 'Nothing to say ' * 20)
+        self.assertIsInstance(review.__dict__['summary'], str)
+
+    def test_registered_codec(self):
+        """Test payloads of a registered codec are read by their tag,
+           and unknown codecs are refused"""
+        fields.register_codec(BestZlibCodec())
+        field = fields.CompressedTextField(codec='zlib-best')
+        text = 'Good value for money. ' * 20
+
+        payload = field.to_payload(text)
+
+        self.assertEqual(payload[:1], b'9')
+        self.assertEqual(fields.decompress(payload), text)
+        self.assertEqual(field.deconstruct()[3]['codec'], 'zlib-best')
+        with self.assertRaises(ValueError):
+            fields.CompressedTextField(codec='missing')
+        with self.assertRaises(ValueError):
+            fields.decompress(b'?abc')
@@ -0,0 +1,81 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.instrumentation import fingerprint, slow_query_log
+from user.authentication import token_cache
+
+
+REVIEW_URL = reverse('review:review-list')
+SLOW_QUERIES_URL = reverse('core:slow-queries')
+
+
+class RequestTimingTests(TransactionTestCase):
+    """Test the request timing middleware and the slow query log"""
+
+    def setUp(self):
+        slow_query_log.clear()
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+    def test_server_timing_header(self):
+        """Test the header splits db, auth, view and render time"""
+        res = self.client.get(REVIEW_URL)
+
+        phases = [
+            entry.split(';')[0].strip()
+            for entry in res['Server-Timing'].split(',')
+        ]
+        self.assertEqual(phases, ['db', 'auth', 'view', 'render', 'total'])
+        # The token lookup and the page
+        self.assertRegex(
+            res['Server-Timing'], r'^db;dur=[\d.]+;desc="2 queries"'
+        )
+
+    def test_slow_queries_recorded(self):
+        """Test slow queries are summarized by fingerprint"""
+        with patch.object(slow_query_log, 'threshold', 0):
+            self.client.get(REVIEW_URL)
+            self.client.get(REVIEW_URL, {'page_size': 7})
+
+        top = slow_query_log.top(50)
+
+        self.assertTrue(top)
+        self.assertTrue(all(item['count'] >= 1 for item in top))
+        self.assertTrue(any(item['count'] >= 2 for item in top))
+        self.assertEqual(top, sorted(
+            top, key=lambda item: item['total_ms'], reverse=True
+        ))
+
+    def test_slow_queries_staff_only(self):
+        """Test that only staff users can read the slow queries"""
+        res = self.client.get(SLOW_QUERIES_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(SLOW_QUERIES_URL, {'top': 5})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('queries', res.data)
+
+    def test_fingerprint(self):
+        """Test that parameters and IN list lengths are normalized"""
+        self.assertEqual(
+            fingerprint("SELECT a FROM t  WHERE id IN (%s, %s) "
+                        "AND b = 'x' LIMIT 21"),
+            fingerprint("SELECT a FROM t WHERE id IN (%s, %s, %s) "
+                        "AND b = 'y' LIMIT 5"),
+        )
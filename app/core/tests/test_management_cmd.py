@@ -1,16 +1,252 @@
-from unittest.mock import patch
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest.mock import MagicMock, patch
 
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from rest_framework.authtoken.models import Token
+
+from core.companies import company_cache
+from core.models import Company, CompanyRating, Review
+from core.warmup import warm_up_on_start
+
 
 class CommandTests(TestCase):
 
     @patch('time.sleep', return_value=True)
     def test_wait_for_db(self, ts):
         """Test waiting for db working properly"""
+        connection = MagicMock()
         with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            gi.side_effect = [OperationalError] * 2 + [True]
-            call_command('wait_for_db')
+            gi.side_effect = [OperationalError] * 2 + [connection]
+            call_command('wait_for_db', stdout=StringIO())
             self.assertEqual(gi.call_count, 3)
+
+        connection.ensure_connection.assert_called_once_with()
+        cursor = connection.cursor.return_value.__enter__.return_value
+        cursor.execute.assert_called_once_with('SELECT 1')
+        self.assertEqual([call[0][0] for call in ts.call_args_list],
+                         [0.1, 0.2])
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_connection_refused(self, ts):
+        """Test that failing to connect is retried, not only failing
+           to look up the connection"""
+        connection = MagicMock()
+        connection.ensure_connection.side_effect = \
+            [OperationalError] * 3 + [None]
+        with patch('django.db.utils.ConnectionHandler.__getitem__',
+                   return_value=connection):
+            call_command('wait_for_db', stdout=StringIO())
+
+        self.assertEqual(connection.ensure_connection.call_count, 4)
+        self.assertEqual(connection.close.call_count, 3)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_deadline(self, ts):
+        """Test giving up once the deadline has passed"""
+        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
+            gi.side_effect = OperationalError('refused')
+            with self.assertRaises(CommandError):
+                call_command('wait_for_db', timeout=0, stdout=StringIO())
+
+    def test_warm_up(self):
+        """Test the warm-up runs and reports every phase"""
+        out = StringIO()
+        call_command('warm_up', stdout=out)
+
+        for phase in ('connections', 'urls', 'serializers',
+                      'content types'):
+            self.assertIn(phase, out.getvalue())
+
+    def test_warm_up_on_start_closes_connections(self):
+        """Test the warm-up done on start doesn't leave its connections
+           to the importing thread, even when it fails"""
+        with patch.object(connections, 'close_all') as close_all:
+            warm_up_on_start()
+            with patch('core.warmup.warm_up', side_effect=OperationalError):
+                warm_up_on_start()
+
+        self.assertEqual(close_all.call_count, 2)
+
+    def test_rebuild_ratings(self):
+        """Test drifted company ratings are reported, and fixed
+           unless it is a dry run"""
+        user = get_user_model().objects.create_user('t@test.com', 'pass')
+        review = Review.objects.create(
+            reviewer=user, title='Review 1', rating=4, summary='Fine',
+            ip='10.0.0.1', company=company_cache.get('Test Co'),
+        )
+        ratings = CompanyRating.objects.filter(pk=review.company_id)
+        ratings.update(count=7)
+
+        out = StringIO()
+        call_command('rebuild_ratings', dry_run=True, stdout=out)
+        self.assertIn('Company %d: count 7 -> 1' % review.company_id,
+                      out.getvalue())
+        self.assertEqual(ratings.get().count, 7)
+
+        call_command('rebuild_ratings', stdout=StringIO())
+        self.assertEqual(ratings.get().count, 1)
+
+        out = StringIO()
+        call_command('rebuild_ratings', stdout=out)
+        self.assertIn('up to date', out.getvalue())
+
+
+class ImportReviewsCommandTests(TestCase):
+    """Test the import_reviews management command"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_dump(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', newline='', encoding='utf-8') as dump:
+            dump.write(content)
+        return path
+
+    def import_reviews(self, path, **options):
+        call_command('import_reviews', path, stdout=StringIO(),
+                     stderr=StringIO(), **options)
+
+    def test_import_csv(self):
+        """Test importing a CSV dump keeps its submission dates"""
+        path = self.write_dump('reviews.csv', (
+            'title,rating,summary,ip,company,reviewer,submission_date\n'
+            'Review 1,5,"Great, really",10.0.0.1,Test Co,test@test.com,'
+            '2019-05-01T10:00:00Z\n'
+            'Review 2,3,Meh,10.0.0.2,Test Co,test@test.com,\n'
+        ))
+        self.import_reviews(path)
+
+        reviews = Review.objects.filter(reviewer=self.user).order_by('title')
+        self.assertEqual(reviews.count(), 2)
+        self.assertEqual(reviews[0].summary, 'Great, really')
+        self.assertEqual(reviews[0].submission_date.year, 2019)
+
+    def test_import_ndjson(self):
+        """Test importing a newline-delimited JSON dump"""
+        path = self.write_dump('reviews.ndjson', json.dumps({
+            'title': 'Review 1', 'rating': 4, 'summary': 'Fine',
+            'ip': '10.0.0.1', 'company': 'Test Co',
+            'reviewer': 'test@test.com',
+        }) + '\n')
+        self.import_reviews(path)
+
+        self.assertEqual(Review.objects.filter(reviewer=self.user).count(), 1)
+
+    def test_import_skips_invalid_records(self):
+        """Test records breaking the model rules are skipped"""
+        path = self.write_dump('reviews.csv', (
+            'title,rating,summary,ip,company,reviewer\n'
+            'Review 1,9,Bad rating,10.0.0.1,Orphan Co,test@test.com\n'
+            ',5,No title,10.0.0.1,Test Co,test@test.com\n'
+            'Review 3,5,Nobody,10.0.0.1,Test Co,nobody@test.com\n'
+            'Review 4,5,Good,10.0.0.1,Test Co,test@test.com\n'
+        ))
+        self.import_reviews(path)
+
+        titles = list(Review.objects.values_list('title', flat=True))
+        self.assertEqual(titles, ['Review 4'])
+        # Only the company of the imported review was created
+        self.assertEqual(
+            list(Company.objects.values_list('name', flat=True)),
+            ['Test Co']
+        )
+
+        with self.assertRaises(CommandError):
+            self.import_reviews(path, max_errors=1, checkpoint=path + '.2')
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test a second run only imports the records after
+           the last checkpoint"""
+        lines = ['title,rating,summary,ip,company,reviewer']
+        lines += [
+            'Review %d,5,Summary,10.0.0.1,Test Co,test@test.com' % i
+            for i in range(5)
+        ]
+        path = self.write_dump('reviews.csv', '\n'.join(lines[:3]) + '\n')
+        self.import_reviews(path, batch_size=1)
+
+        self.write_dump('reviews.csv', '\n'.join(lines) + '\n')
+        self.import_reviews(path, batch_size=2)
+
+        self.assertEqual(Review.objects.count(), 5)
+        with open(path + '.checkpoint') as checkpoint:
+            self.assertEqual(json.load(checkpoint)['position'], 5)
+
+
+class ProvisionUsersCommandTests(TestCase):
+    """Test the provision_users management command"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+
+    def write_users(self, content):
+        path = os.path.join(self.tmpdir.name, 'users.csv')
+        with open(path, 'w', newline='', encoding='utf-8') as users:
+            users.write(content)
+        return path
+
+    def provision_users(self, path, **options):
+        out = StringIO()
+        call_command('provision_users', path, stdout=out,
+                     stderr=StringIO(), **options)
+        return out.getvalue()
+
+    def test_provision_users(self):
+        """Test users are created with their password hashed in worker
+           processes and a token, and a second run skips them"""
+        path = self.write_users(
+            'email,password,name\n' + ''.join(
+                'user%d@test.com,password%d,User %d\n' % (i, i, i)
+                for i in range(3)
+            )
+        )
+        self.provision_users(path, workers=2, batch_size=2)
+
+        users = get_user_model().objects.order_by('email')
+        self.assertEqual([user.email for user in users], [
+            'user0@test.com', 'user1@test.com', 'user2@test.com',
+        ])
+        self.assertTrue(users[2].check_password('password2'))
+        self.assertEqual(Token.objects.count(), 3)
+
+        out = self.provision_users(path, workers=1)
+        self.assertIn('Created 0 users', out)
+        self.assertEqual(get_user_model().objects.count(), 3)
+
+    def test_provision_skips_invalid_records(self):
+        """Test records the user create endpoint would refuse are
+           skipped"""
+        path = self.write_users(
+            'email,password,name\n'
+            'short@test.com,12345,Short password\n'
+            'not an email,password,Bad email\n'
+            'noname@test.com,password,\n'
+            'good@test.com,password,Good\n'
+            'good@test.com,password,Duplicate\n'
+        )
+        self.provision_users(path, workers=1)
+
+        emails = list(get_user_model().objects.values_list(
+            'email', flat=True
+        ))
+        self.assertEqual(emails, ['good@test.com'])
+
+        with self.assertRaises(CommandError):
+            self.provision_users(path, workers=1, max_errors=1)
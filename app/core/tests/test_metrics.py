@@ -0,0 +1,102 @@
+import json
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.metrics import MetricsRegistry, metrics
+
+
+REVIEW_URL = reverse('review:review-list')
+METRICS_URL = reverse('metrics')
+
+
+class MetricsTests(TestCase):
+    """Test the request metrics registry and endpoint"""
+
+    def setUp(self):
+        metrics.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.staff = get_user_model().objects.create_superuser(
+            'staff@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_requests_recorded_per_view(self):
+        """Test count, latency and size are exported per view"""
+        self.client.get(REVIEW_URL)
+        self.client.get(REVIEW_URL)
+        self.client.get('/api/missing/')
+
+        self.client.force_authenticate(self.staff)
+        res = self.client.get(METRICS_URL)
+        content = res.content.decode()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('# TYPE http_request_duration_seconds histogram',
+                      content)
+        self.assertIn('http_requests_total{view="review:review-list",'
+                      'method="GET",status="200"} 2', content)
+        self.assertIn('http_requests_total{view="<unresolved>",'
+                      'method="GET",status="404"} 1', content)
+        self.assertIn('http_request_duration_seconds_bucket{view='
+                      '"review:review-list",method="GET",le="+Inf"} 2',
+                      content)
+        self.assertIn('http_response_size_bytes_count{view='
+                      '"review:review-list"} 2', content)
+
+    def test_denied_by_default(self):
+        """Test only staff users can read the metrics when no address
+           is allowed"""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 403)
+
+        self.client.force_authenticate(None)
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(res.status_code, 401)
+
+        self.client.force_authenticate(self.staff)
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 200)
+
+    @override_settings(METRICS_ALLOWED_IPS=['10.0.0.1'])
+    def test_allowed_ips(self):
+        """Test the endpoint can be limited to some addresses"""
+        res = self.client.get(METRICS_URL)
+        self.assertEqual(res.status_code, 403)
+
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(res.status_code, 200)
+
+    def test_workers_added_up(self):
+        """Test the snapshot files of every worker are added up"""
+        labels = (('view', 'user:me'), ('method', 'GET'))
+        with tempfile.TemporaryDirectory() as directory:
+            with open(os.path.join(directory, 'metrics-1-1.json'),
+                      'w') as stream:
+                json.dump([
+                    ['http_requests_total',
+                     [list(pair) for pair in labels], 3],
+                ], stream)
+            registry = MetricsRegistry(directory=directory)
+            registry.inc('http_requests_total', labels, 2)
+            registry.observe('http_request_duration_seconds', labels, 0.2)
+
+            content = registry.render()
+
+        self.assertIn(
+            'http_requests_total{view="user:me",method="GET"} 5', content
+        )
+        self.assertIn('http_request_duration_seconds_bucket{view='
+                      '"user:me",method="GET",le="0.1"} 0', content)
+        self.assertIn('http_request_duration_seconds_bucket{view='
+                      '"user:me",method="GET",le="0.25"} 1', content)
@@ -0,0 +1,116 @@
+import gzip
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Review
+from user.authentication import token_cache
+
+
+ME_URL = reverse('user:me')
+REVIEW_URL = reverse('review:review-list')
+EXPORT_URL = reverse('review:review-export')
+ADMIN_LOGIN_URL = reverse('admin:login')
+
+
+class BrowserMiddlewareTests(TestCase):
+    """Test the browser middleware only run outside of the API"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+
+    def test_api_skips_browser_middleware(self):
+        """Test API requests get no session, CSRF check or frame
+           options, even with a session cookie"""
+        token = Token.objects.create(user=self.user)
+        client = APIClient(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+        res = client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(hasattr(res.wsgi_request, 'session'))
+        self.assertNotIn('X-Frame-Options', res)
+
+    def test_admin_keeps_browser_middleware(self):
+        """Test the admin still gets sessions, CSRF checks and frame
+           options"""
+        client = Client(enforce_csrf_checks=True)
+
+        res = client.get(ADMIN_LOGIN_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(hasattr(res.wsgi_request, 'session'))
+        self.assertEqual(res['X-Frame-Options'], 'DENY')
+
+        res = client.post(ADMIN_LOGIN_URL, {
+            'username': 'test@test.com', 'password': 'password',
+        })
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class CompressionMiddlewareTests(TestCase):
+    """Test API responses are gzipped for the clients accepting it"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(20):
+            Review.objects.create(
+                reviewer=self.user, title='Review %d' % i, rating=5,
+                summary='The coffee machine arrived late. ' * 10,
+                ip='190.190.190.1', company=company_cache.get('Test Company'),
+            )
+
+    def test_list_compressed(self):
+        """Test large JSON responses are gzipped only when accepted,
+           with a weak ETag that still matches"""
+        plain = self.client.get(REVIEW_URL, HTTP_ACCEPT_ENCODING='br')
+        res = self.client.get(REVIEW_URL,
+                              HTTP_ACCEPT_ENCODING='gzip, deflate')
+
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', res['Vary'])
+        self.assertLess(len(res.content), len(plain.content))
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertEqual(res['ETag'], 'W/' + plain['ETag'])
+
+        res = self.client.get(REVIEW_URL, HTTP_ACCEPT_ENCODING='gzip',
+                              HTTP_IF_NONE_MATCH=res['ETag'])
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_small_or_refused_not_compressed(self):
+        """Test small responses and clients refusing gzip get the body
+           as is"""
+        res = self.client.get(ME_URL, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', res)
+
+        res = self.client.get(REVIEW_URL,
+                              HTTP_ACCEPT_ENCODING='gzip;q=0, *;q=1')
+        self.assertNotIn('Content-Encoding', res)
+
+    def test_export_compressed(self):
+        """Test streaming exports are gzipped as they are sent"""
+        plain = self.client.get(EXPORT_URL)
+        res = self.client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(res.streaming_content)),
+            b''.join(plain.streaming_content)
+        )
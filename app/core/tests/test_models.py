@@ -2,6 +2,7 @@ from django.test import TestCase
 from django.contrib.auth import get_user_model
 
 from core import models
+from core.companies import company_cache
 
 
 def sample_user(email='test@test.com', password='testpass'):
@@ -57,7 +58,19 @@ class ModelTests(TestCase):
                     title='Review 1',
                     summary='This is my first review!!!',
                     ip='190.190.190.1',
-                    company='Test Company'
+                    company=company_cache.get('Test Company')
                     )
 
         self.assertEqual(str(review), review.title)
+
+    def test_company_intern(self):
+        """Test company names are told apart by their canonical form"""
+        companies = models.Company.objects.intern(
+            ['Test  Company', 'TEST COMPANY', 'Other']
+        )
+
+        self.assertEqual(companies['Test  Company'].pk,
+                         companies['TEST COMPANY'].pk)
+        self.assertEqual(companies['TEST COMPANY'].name, 'Test  Company')
+        self.assertEqual(companies['Other'].canonical_name, 'other')
+        self.assertEqual(models.Company.objects.count(), 2)
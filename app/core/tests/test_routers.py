@@ -0,0 +1,161 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connections
+from django.test import RequestFactory, SimpleTestCase, \
+                        TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Review
+from core.routers import ReplicaRouter, request_routing
+
+
+REVIEW_URL = reverse('review:review-list')
+
+# A second database the primary doesn't replicate to, standing for a
+# replica lagging behind: rows only show up in it once the test copies
+# them there
+REPLICA = 'replica_0'
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    """Test the routing of reads to replicas and writes to primary.
+       Reads within a transaction always go to the primary, so these
+       tests don't run in one"""
+
+    def setUp(self):
+        caches[settings.DATABASE_STICKY_CACHE_ALIAS].clear()
+        self.router = ReplicaRouter(replicas=['replica_0'])
+        self.factory = RequestFactory()
+        self.user = get_user_model()(pk=1, email='test@test.com')
+
+    def request(self, method='get', user=None):
+        request = getattr(self.factory, method)('/api/review/reviews/')
+        request.user = user or AnonymousUser()
+        return request
+
+    def test_outside_requests_use_primary(self):
+        """Test commands and tests keep reading from the primary"""
+        self.assertEqual(self.router.db_for_read(Review), 'default')
+
+    def test_safe_reads_use_replica(self):
+        """Test GET reads go to a replica and POST ones don't"""
+        with request_routing(self.request(user=self.user)):
+            self.assertEqual(self.router.db_for_read(Review), 'replica_0')
+            self.assertEqual(self.router.db_for_write(Review), 'default')
+
+        with request_routing(self.request('post', self.user)):
+            self.assertEqual(self.router.db_for_read(Review), 'default')
+
+    def test_tokens_read_from_primary(self):
+        """Test new tokens can be used right away"""
+        with request_routing(self.request()):
+            self.assertEqual(self.router.db_for_read(Token), 'default')
+
+    def test_read_your_writes(self):
+        """Test a user who wrote reads from the primary for a while,
+           while other users keep using the replicas"""
+        with request_routing(self.request('post', self.user)) as routing:
+            self.router.db_for_write(Review)
+        routing.finish()
+
+        with request_routing(self.request(user=self.user)):
+            self.assertEqual(self.router.db_for_read(Review), 'default')
+
+        other = get_user_model()(pk=2, email='o@test.com')
+        with request_routing(self.request(user=other)):
+            self.assertEqual(self.router.db_for_read(Review), 'replica_0')
+
+    def test_no_replicas(self):
+        """Test everything goes to the primary without replicas"""
+        router = ReplicaRouter(replicas=[])
+
+        with request_routing(self.request()):
+            self.assertEqual(router.db_for_read(Review), 'default')
+
+
+@override_settings(DATABASE_ROUTERS=['core.routers.ReplicaRouter'])
+class ReplicaReadYourWritesTests(TransactionTestCase):
+    """Test the replica routing end to end, with a real second database
+       the writes never reach. The replica is only added to the
+       databases once the class is set up, so it takes them all"""
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        # Added before the settings override builds the router
+        connections.databases[REPLICA] = {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ':memory:',
+        }
+        super().setUpClass()
+        call_command('migrate', database=REPLICA, verbosity=0)
+
+    @classmethod
+    def tearDownClass(cls):
+        # Removed before the router is built again without the override
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        super().tearDownClass()
+
+    def setUp(self):
+        caches[settings.DATABASE_STICKY_CACHE_ALIAS].clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com', 'password'
+        )
+        self.other = get_user_model().objects.create_user(
+            'other@test.com', 'password'
+        )
+        self.client = APIClient()
+
+    def create_review(self, user, title):
+        """Insert a review on the primary, outside of any request, like
+           the write-behind flusher, the import command or the admin"""
+        return Review.objects.create(
+            reviewer=user,
+            title=title,
+            rating=5,
+            summary='Only on the primary',
+            ip='190.190.190.1',
+            company=company_cache.get('Test Company'),
+        )
+
+    def list_titles(self, user):
+        self.client.force_authenticate(user)
+        res = self.client.get(REVIEW_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [review['title'] for review in res.data['results']]
+
+    def test_reads_own_writes(self):
+        """Test a user who just created a review reads it from the
+           primary, while other users read from the replica"""
+        self.create_review(self.other, 'Not replicated yet')
+        # Long enough ago for the other user to be back on the replica
+        caches[settings.DATABASE_STICKY_CACHE_ALIAS].clear()
+
+        self.client.force_authenticate(self.user)
+        res = self.client.post(REVIEW_URL, {
+            'title': 'Mine',
+            'rating': 5,
+            'summary': 'Created through the API',
+            'company': 'Test Company',
+        })
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(self.list_titles(self.user), ['Mine'])
+        self.assertEqual(self.list_titles(self.other), [])
+
+    def test_reads_writes_made_outside_requests(self):
+        """Test a reviewer whose list changed outside of their requests
+           reads it from the primary, instead of caching the replica's
+           old rows under the new ETag"""
+        self.create_review(self.user, 'Imported')
+
+        self.assertEqual(self.list_titles(self.user), ['Imported'])
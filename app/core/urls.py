@@ -0,0 +1,14 @@
+from django.urls import path
+
+from core import views
+
+
+app_name = 'core'
+
+urlpatterns = [
+    path(
+        'slow-queries/',
+        views.SlowQueriesView.as_view(),
+        name='slow-queries'
+    ),
+]
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.http import HttpResponse
+
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from core.instrumentation import slow_query_log
+from core.metrics import metrics
+from user.authentication import CachedTokenAuthentication
+
+
+class SlowQueriesView(APIView):
+    """Slowest query fingerprints recently seen by this worker,
+       only visible to staff users. Use ?top=<n> to get more or
+       fewer of them"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+    default_top = 20
+
+    def get(self, request, format=None):
+        try:
+            count = int(request.query_params.get('top', self.default_top))
+        except ValueError:
+            count = self.default_top
+        return Response({
+            'threshold_ms': slow_query_log.threshold,
+            'queries': slow_query_log.top(max(count, 0)),
+        })
+
+
+class MetricsPermission(permissions.BasePermission):
+    """Addresses listed in METRICS_ALLOWED_IPS, or staff users"""
+
+    def has_permission(self, request, view):
+        if request.META.get('REMOTE_ADDR') in settings.METRICS_ALLOWED_IPS:
+            return True
+        return permissions.IsAdminUser().has_permission(request, view)
+
+
+class MetricsView(APIView):
+    """Request metrics of every worker in the Prometheus text format.
+       Only readable from the addresses in METRICS_ALLOWED_IPS or by
+       staff users sending their token, denied to anyone else"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (MetricsPermission,)
+
+    def get(self, request, format=None):
+        return HttpResponse(
+            metrics.render(), content_type='text/plain; version=0.0.4'
+        )
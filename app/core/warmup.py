@@ -0,0 +1,93 @@
+"""Work done once before serving, so the first requests of a worker
+don't pay for it.
+
+The connections phase checks every database answers and loads its
+backend. On start the connections it opened are closed afterwards:
+they belong to the thread importing the application, which doesn't
+serve requests with threaded workers or runserver, and whose sockets
+would be shared by every worker forked from it with gunicorn
+--preload. Serving threads open their own on their first query.
+"""
+import logging
+import time
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import connections
+from django.urls import get_resolver, resolve, reverse
+
+
+logger = logging.getLogger(__name__)
+
+# URLs resolved to load every view module and fill the resolver caches
+WARM_UP_URLS = ('review:review-list', 'user:me', 'user:token')
+
+
+def warm_connections():
+    """Check every configured database answers"""
+    for connection in connections.all():
+        connection.ensure_connection()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.fetchone()
+
+
+def warm_urls():
+    """Populate the URL resolver and import the views behind it"""
+    get_resolver().reverse_dict
+    for name in WARM_UP_URLS:
+        resolve(reverse(name))
+
+
+def warm_serializers():
+    """Build the fields of the API serializers, which fills the model
+       metadata caches they are built from"""
+    from review.fastpath import RowSerializer
+    from review.serializers import ReviewSerializer
+    from user.serializers import AuthTokenSerializer, UserSerializer
+
+    for serializer_class in (ReviewSerializer, UserSerializer,
+                             AuthTokenSerializer):
+        serializer_class().fields
+    RowSerializer(ReviewSerializer())
+
+
+def warm_content_types():
+    """Load the content type of every model into the ContentType
+       cache used by permission checks and the admin"""
+    ContentType.objects.get_for_models(*apps.get_models())
+
+
+PHASES = (
+    ('connections', warm_connections),
+    ('urls', warm_urls),
+    ('serializers', warm_serializers),
+    ('content types', warm_content_types),
+)
+
+
+def warm_up():
+    """Run every warm-up phase, returning how long each one took in
+       milliseconds"""
+    timings = []
+    for name, phase in PHASES:
+        start = time.perf_counter()
+        phase()
+        timings.append((name, (time.perf_counter() - start) * 1000))
+    return timings
+
+
+def warm_up_on_start():
+    """Warm up the serving process. A failure is only logged, the
+       worker can still serve without it"""
+    try:
+        timings = warm_up()
+    except Exception:
+        logger.exception('Warm-up failed')
+        return
+    finally:
+        # Not left to the importing thread, see the module docstring
+        connections.close_all()
+    logger.info('Warmed up: %s', ', '.join(
+        '%s %.1fms' % (phase, duration) for phase, duration in timings
+    ))
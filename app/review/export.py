@@ -0,0 +1,76 @@
+import csv
+import json
+
+from review.fastpath import datetime_converter, row_field
+from review.serializers import ReviewSerializer
+
+
+EXPORT_FIELDS = ReviewSerializer.Meta.fields
+
+# .values_list() lookups of the exported fields
+EXPORT_COLUMNS = tuple(
+    row_field(ReviewSerializer().fields[name])[0] for name in EXPORT_FIELDS
+)
+
+_date_index = EXPORT_FIELDS.index('submission_date')
+_summary_index = EXPORT_FIELDS.index('summary')
+
+
+class _Echo:
+    """File-like object that returns what is written, so csv.writer
+       can format rows without buffering them"""
+
+    def write(self, value):
+        return value
+
+
+def _chunked(rows, chunk_size):
+    """Group rows so every streamed chunk holds many lines"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _preparer():
+    """Return a function converting a values_list row into
+       JSON/CSV friendly values"""
+    convert_date = datetime_converter()
+
+    def prepare(row):
+        row = list(row)
+        row[_date_index] = convert_date(row[_date_index])
+        # Summaries are read compressed
+        row[_summary_index] = str(row[_summary_index])
+        return row
+    return prepare
+
+
+def ndjson_lines(rows, chunk_size=500):
+    """Stream rows as newline-delimited JSON objects"""
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(',', ':')).encode
+    prepare = _preparer()
+    for chunk in _chunked(rows, chunk_size):
+        yield ''.join(
+            dumps(dict(zip(EXPORT_FIELDS, prepare(row)))) + '\n'
+            for row in chunk
+        )
+
+
+def csv_lines(rows, chunk_size=500):
+    """Stream rows as CSV, starting with a header line"""
+    writer = csv.writer(_Echo())
+    prepare = _preparer()
+    yield writer.writerow(EXPORT_FIELDS)
+    for chunk in _chunked(rows, chunk_size):
+        yield ''.join(writer.writerow(prepare(row)) for row in chunk)
+
+
+EXPORTERS = {
+    'ndjson': (ndjson_lines, 'application/x-ndjson'),
+    'csv': (csv_lines, 'text/csv'),
+}
@@ -0,0 +1,120 @@
+"""Read path rendering `.values()` rows exactly like a ModelSerializer
+would render the model instances, without building either of them.
+
+Every serializer field gets a converter computed once per request:
+plain integers and strings are passed through, datetimes go through
+a copy of DateTimeField.to_representation with the timezone looked
+up once, and any other field falls back to its own to_representation.
+A field rendered from a related model names the `.values()` lookup
+holding its rendered value with a `row_source` attribute.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.utils import timezone
+
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+def datetime_converter(field=None):
+    """Return a function rendering datetimes exactly like DRF's
+       DateTimeField, with the timezone looked up once instead of
+       on every value"""
+    if field is None:
+        field = serializers.DateTimeField()
+    if getattr(field, 'format', api_settings.DATETIME_FORMAT) != ISO_8601:
+        return field.to_representation
+    tz = getattr(field, 'timezone', field.default_timezone())
+
+    def convert(value):
+        if not value:
+            return None
+        if tz is None or not timezone.is_aware(value):
+            # Naive values or output are left to DateTimeField itself
+            return field.to_representation(value)
+        value = value.astimezone(tz).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+# Fields whose to_representation only casts to the type the database
+# driver already returns
+_PASSTHROUGH = {
+    serializers.IntegerField.to_representation: int,
+    serializers.CharField.to_representation: str,
+}
+
+
+def field_converter(field):
+    """Return a function rendering a column value like `field` would"""
+    to_representation = type(field).to_representation
+    if to_representation in _PASSTHROUGH:
+        cast = _PASSTHROUGH[to_representation]
+
+        def convert(value):
+            if type(value) is cast:
+                return value
+            return to_representation(field, value)
+        return convert
+    if to_representation is serializers.DateTimeField.to_representation:
+        return datetime_converter(field)
+    return field.to_representation
+
+
+def _as_is(value):
+    return value
+
+
+def row_field(field):
+    """Return the (.values() lookup, converter) rendering `field`"""
+    row_source = getattr(field, 'row_source', None)
+    if row_source:
+        return row_source, _as_is
+    return field.source_attrs[0], field_converter(field)
+
+
+class RowSerializer:
+    """Renders rows of `.values()` like `serializer` renders instances.
+       Only serializers whose fields all read a model column directly
+       are supported, see `supports`"""
+
+    def __init__(self, serializer):
+        self.fields = [
+            (field.field_name,) + row_field(field)
+            for field in serializer._readable_fields
+        ]
+
+    @property
+    def columns(self):
+        """Lookups to select with `.values()`"""
+        return [source for _, source, _ in self.fields]
+
+    @staticmethod
+    def supports(serializer):
+        """Whether every readable field maps to a model column
+           or has a `row_source`"""
+        model = serializer.Meta.model
+        for field in serializer._readable_fields:
+            if getattr(field, 'row_source', None):
+                continue
+            if len(field.source_attrs) != 1:
+                return False
+            try:
+                model_field = model._meta.get_field(field.source_attrs[0])
+            except FieldDoesNotExist:
+                return False
+            if not model_field.concrete or model_field.is_relation:
+                return False
+        return True
+
+    def to_representation(self, rows):
+        """Render a page of rows into a list of dicts"""
+        fields = self.fields
+        return [
+            {
+                name: None if row[source] is None else convert(row[source])
+                for name, source, convert in fields
+            }
+            for row in rows
+        ]
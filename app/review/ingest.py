@@ -0,0 +1,163 @@
+"""Write-behind ingestion of new reviews.
+
+When REVIEW_WRITE_BEHIND is on, the review API validates new reviews,
+hands them to `review_queue` and answers 202 right away. A background
+thread writes the queued reviews with one bulk INSERT and one commit
+every REVIEW_WRITE_BEHIND_BATCH_SIZE rows, or every
+REVIEW_WRITE_BEHIND_INTERVAL_MS if fewer are waiting.
+
+Queued reviews live in the worker memory until they are written: they
+are flushed when the worker exits normally, but lost if it is killed.
+"""
+import atexit
+import logging
+import os
+import threading
+import time
+from queue import Full
+
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+
+from core.companies import company_cache
+from core.models import CompanyRating, Review
+from review.versioning import list_versions
+
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """Bounded in-process buffer of unsaved reviews drained by a
+       background flusher thread"""
+
+    def __init__(self, max_size, batch_size, interval, put_timeout,
+                 retries=3):
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.interval = interval
+        self.put_timeout = put_timeout
+        self.retries = retries
+        self._cond = threading.Condition()
+        self._rows = []
+        self._thread = None
+        self._pid = None
+        self._stopping = False
+        self.queued = self.written = self.batches = 0
+        self.rejected = self.dropped = 0
+        atexit.register(self.stop)
+
+    def put_many(self, reviews):
+        """Queue a list of reviews, all of them or none. Waits up to
+           put_timeout seconds for room and raises queue.Full if the
+           flusher doesn't catch up by then"""
+        self.start()
+        with self._cond:
+            has_room = self._cond.wait_for(
+                lambda: len(self._rows) + len(reviews) <= self.max_size,
+                timeout=self.put_timeout
+            )
+            if not has_room or self._stopping:
+                self.rejected += len(reviews)
+                raise Full()
+            self._rows.extend(reviews)
+            self.queued += len(reviews)
+            if len(self._rows) >= self.batch_size:
+                self._cond.notify_all()
+
+    def start(self):
+        """Start the flusher thread of this process if needed"""
+        with self._cond:
+            if self._pid == os.getpid() and self._thread.is_alive():
+                return
+            # A forked worker doesn't inherit the flusher thread
+            self._pid = os.getpid()
+            self._stopping = False
+            self._thread = threading.Thread(
+                target=self._run, name='review-write-behind', daemon=True
+            )
+            self._thread.start()
+
+    def stop(self, timeout=30):
+        """Write every queued review and stop the flusher thread"""
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def stats(self):
+        """Counters of the reviews that went through the queue"""
+        with self._cond:
+            return {
+                'pending': len(self._rows),
+                'queued': self.queued,
+                'written': self.written,
+                'batches': self.batches,
+                'rejected': self.rejected,
+                'dropped': self.dropped,
+            }
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(
+                        lambda: len(self._rows) >= self.batch_size or
+                        self._stopping,
+                        timeout=self.interval
+                    )
+                    batch = self._rows[:self.batch_size]
+                    del self._rows[:self.batch_size]
+                    done = self._stopping and not self._rows
+                    # Producers waiting for room may go on
+                    self._cond.notify_all()
+                if batch:
+                    self._write(batch)
+                if done:
+                    break
+        finally:
+            connection.close()
+
+    def _write(self, batch):
+        """Insert one batch in a single transaction, retrying on a
+           fresh connection before giving up on it"""
+        # Companies named for the first time are created with the
+        # reviews, again on every attempt as a failed one rolls back
+        new_companies = [
+            (review, review.company) for review in batch
+            if review.company.pk is None
+        ]
+        for attempt in range(1, self.retries + 1):
+            try:
+                with transaction.atomic():
+                    for review, company in new_companies:
+                        review.company = company
+                    company_cache.persist(batch)
+                    Review.objects.number(batch)
+                    Review.objects.bulk_create(batch)
+                    CompanyRating.objects.record(batch)
+                break
+            except DatabaseError:
+                connection.close()
+                if attempt == self.retries:
+                    logger.exception('Dropped %d queued reviews', len(batch))
+                    with self._cond:
+                        self.dropped += len(batch)
+                    return
+                time.sleep(0.1 * attempt)
+
+        # bulk_create sends no signals
+        list_versions.bump(*(review.reviewer_id for review in batch))
+        with self._cond:
+            self.written += len(batch)
+            self.batches += 1
+
+
+review_queue = WriteBehindQueue(
+    max_size=settings.REVIEW_WRITE_BEHIND_QUEUE_SIZE,
+    batch_size=settings.REVIEW_WRITE_BEHIND_BATCH_SIZE,
+    interval=settings.REVIEW_WRITE_BEHIND_INTERVAL_MS / 1000,
+    put_timeout=settings.REVIEW_WRITE_BEHIND_PUT_TIMEOUT_MS / 1000,
+)
@@ -0,0 +1,209 @@
+import json
+from base64 import b64decode, b64encode
+from binascii import Error as BinasciiError
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from django.template import loader
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Opaque cursor pagination that seeks on the ordering columns
+       instead of using OFFSET, so every page costs the same no matter
+       how deep into the list it is"""
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-title', 'id')
+    invalid_cursor_message = _('Invalid cursor')
+    template = 'rest_framework/pagination/previous_and_next.html'
+
+    @property
+    def page_size(self):
+        """Default page size, configurable through the settings"""
+        return settings.REVIEW_PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Return one page of objects starting after the cursor"""
+        self.request = request
+        self.ordering = self.get_ordering(view)
+        self.limit = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request)
+
+        queryset = self.get_page_queryset(queryset, position, reverse)
+        results = list(queryset[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if reverse:
+            results.reverse()
+
+        if reverse:
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.next_position = self.previous_position = None
+        if results:
+            self.next_position = self.get_position(results[-1])
+            self.previous_position = self.get_position(results[0])
+        elif position is not None:
+            # An empty page still lets the client step back or forth
+            self.next_position = self.previous_position = position
+
+        self.display_page_controls = self.has_next or self.has_previous
+        return results
+
+    def get_page_queryset(self, queryset, position=None, reverse=False):
+        """Order the queryset and seek past the cursor position"""
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(self._invert(field) for field in ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek(ordering, position))
+        return queryset
+
+    def get_ordering(self, view):
+        """Ordering of the view, falling back to the default one"""
+        if hasattr(view, 'get_ordering'):
+            return tuple(view.get_ordering())
+        return self.ordering
+
+    def get_page_size(self, request):
+        """Page size requested by the client, capped by max_page_size"""
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if size <= 0:
+            return self.page_size
+        return min(size, self.max_page_size)
+
+    def get_position(self, item):
+        """Ordering values of an item, used as the cursor position"""
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(item, dict):
+            return [item[field] for field in fields]
+        return [getattr(item, field) for field in fields]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def decode_cursor(self, request):
+        """Return the (position, reverse) pair encoded in the request"""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+
+        try:
+            payload = json.loads(b64decode(encoded.encode('ascii')))
+            position = payload['p']
+            ordering = payload['o']
+            reverse = bool(payload.get('r', False))
+        except (TypeError, ValueError, KeyError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+        # A cursor is only valid for the ordering it was built with
+        if ordering != list(self.ordering) or \
+                not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return position, reverse
+
+    def encode_cursor(self, position, reverse=False):
+        """Build the absolute URL pointing to the given position"""
+        payload = {'p': position, 'o': list(self.ordering)}
+        if reverse:
+            payload['r'] = 1
+        encoded = b64encode(
+            json.dumps(payload, separators=(',', ':')).encode('utf-8')
+        ).decode('ascii')
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
+
+    def get_html_context(self):
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link(),
+        }
+
+    def to_html(self):
+        template = loader.get_template(self.template)
+        return template.render(self.get_html_context())
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.page_size_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+    @staticmethod
+    def _invert(field):
+        """Flip the direction of an ordering field"""
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _seek(ordering, position):
+        """Row-value comparison (a, b) > (x, y) expanded into a Q.
+           The columns are sorted in mixed directions, so the database
+           can't compare them as a tuple; the redundant bound on the
+           first column is what lets it start an index range scan at
+           the cursor instead of filtering from the top of the list"""
+        seek = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{'%s__%s' % (name, lookup): position[i]})
+            for prev_field, value in zip(ordering[:i], position[:i]):
+                step &= Q(**{prev_field.lstrip('-'): value})
+            seek |= step
+
+        first = ordering[0]
+        lookup = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{'%s__%s' % (first.lstrip('-'), lookup): position[0]}) \
+            & seek
@@ -0,0 +1,43 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer that encodes with orjson when it is installed,
+       producing the same bytes as the default compact, strict and
+       non-ASCII output. Anything else, like indented output, goes
+       through JSONRenderer"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if not self.use_orjson(data, indent):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+
+        try:
+            # Dates are left to the DRF encoder, which renders them
+            # differently than orjson does
+            ret = orjson.dumps(
+                data,
+                default=encoders.JSONEncoder().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # Integers past 64 bits, non-string keys...
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        # Same escaping JSONRenderer applies for JavaScript
+        return ret.replace(b'\xe2\x80\xa8', b'\\u2028') \
+                  .replace(b'\xe2\x80\xa9', b'\\u2029')
+
+    def use_orjson(self, data, indent):
+        return orjson is not None and data is not None and \
+            indent is None and self.compact and self.strict and \
+            not self.ensure_ascii
@@ -1,10 +1,126 @@
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+
 from rest_framework import serializers
+from rest_framework.fields import empty
 
 from core import models
+from core.companies import company_cache
+
+from review.versioning import list_versions
+
+
+class ReviewListSerializer(serializers.ListSerializer):
+    """Serializes a batch of Review Objects, creating them
+       with bulk INSERTs in a single transaction"""
+    max_batch_size = 1000
+    batch_size = 500
+
+    def to_internal_value(self, data):
+        """Check the batch size before validating every item"""
+        if isinstance(data, list) and not data:
+            raise serializers.ValidationError({
+                'non_field_errors': [_('Send at least one review.')]
+            })
+        if isinstance(data, list) and len(data) > self.max_batch_size:
+            raise serializers.ValidationError({
+                'non_field_errors': [
+                    _('Send at most %d reviews at once.')
+                    % self.max_batch_size
+                ]
+            })
+        if isinstance(data, list):
+            self.resolved_companies = self.resolve_companies(data)
+        return super().to_internal_value(data)
+
+    def resolve_companies(self, data):
+        """Look up the companies of the whole batch at once, instead
+           of one lookup per review naming a new company. New ones are
+           created by create()"""
+        field = self.child.fields['company']
+        names = set()
+        for item in data:
+            name = item.get('company') if isinstance(item, dict) else None
+            if isinstance(name, str):
+                name = name.strip() if field.trim_whitespace else name
+                if name and len(name) <= field.max_length:
+                    names.add(name)
+        return company_cache.lookup(names)
+
+    def create(self, validated_data):
+        """Create every review of the batch or none of them.
+           bulk_create sends no signals, so the reviews are numbered
+           and the list version and the company ratings are updated
+           here"""
+        model = self.child.Meta.model
+        reviews = [model(**attrs) for attrs in validated_data]
+        with transaction.atomic():
+            company_cache.persist(reviews)
+            model.objects.number(reviews)
+            reviews = model.objects.bulk_create(
+                reviews, batch_size=self.batch_size
+            )
+            models.CompanyRating.objects.record(reviews)
+            list_versions.bump_on_commit(
+                *(review.reviewer_id for review in reviews)
+            )
+        return reviews
+
+
+class CompanyField(serializers.CharField):
+    """Name of the :model:`core.Company` reviewed. Names are looked
+       up through the in-process company cache, a company named for
+       the first time is an unsaved one until the review is saved"""
+    # .values() lookup holding the rendered value, see RowSerializer
+    row_source = 'company__name'
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 255)
+        super().__init__(**kwargs)
+
+    def run_validation(self, data=empty):
+        """Look the name up once it passed the length validation"""
+        name = super().run_validation(data)
+        resolved = getattr(self.root, 'resolved_companies', {})
+        if name in resolved:
+            return resolved[name]
+        return company_cache.lookup([name])[name]
+
+    def to_representation(self, value):
+        return value.name
 
 
 class ReviewSerializer(serializers.ModelSerializer):
-    """Serializes a Review Object"""
+    """Serializes a Review Object, optionally only a subset of
+       its fields given with `fields`"""
+
+    company = CompanyField()
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    def create(self, validated_data):
+        """The post_save signal updates the company rating, in the
+           transaction inserting the review"""
+        with transaction.atomic():
+            self.persist_company(validated_data)
+            return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        with transaction.atomic():
+            self.persist_company(validated_data)
+            return super().update(instance, validated_data)
+
+    def persist_company(self, validated_data):
+        """Create the company if it is named for the first time"""
+        company = validated_data.get('company')
+        if company is not None and company.pk is None:
+            validated_data['company'] = company_cache.resolve(
+                [company.name]
+            )[company.name]
 
     class Meta:
         model = models.Review
@@ -13,3 +129,19 @@ class ReviewSerializer(serializers.ModelSerializer):
                  'summary', 'submission_date', 'company'
                  )
         read_only_fields = ('id', 'submission_date', 'ip')
+        list_serializer_class = ReviewListSerializer
+
+
+class CompanyRatingSerializer(serializers.ModelSerializer):
+    """Serializes the rating summary of a :model:`core.Company`"""
+    id = serializers.IntegerField(source='company_id', read_only=True)
+    name = serializers.CharField(source='company.name', read_only=True)
+    average = serializers.FloatField(read_only=True)
+    distribution = serializers.DictField(
+        child=serializers.IntegerField(), read_only=True
+    )
+
+    class Meta:
+        model = models.CompanyRating
+        fields = ('id', 'name', 'count', 'average', 'distribution')
+        read_only_fields = fields
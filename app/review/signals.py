@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.models import CompanyRating, Review, ReviewTombstone
+
+from review.trends import trend_scopes, trend_versions
+from review.versioning import list_versions
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_list_version(sender, instance, **kwargs):
+    """A review was created, changed or deleted, so the list of its
+       reviewer is not the same anymore"""
+    list_versions.bump_on_commit(instance.reviewer_id)
+
+
+@receiver(pre_save, sender=Review)
+def discard_previous_rating(sender, instance, **kwargs):
+    """A review being changed leaves the rating and the trends it
+       was counted in before"""
+    if instance._state.adding:
+        return
+    previous = Review.objects.filter(pk=instance.pk) \
+        .only('rating', 'company', 'reviewer').first()
+    if previous is not None:
+        CompanyRating.objects.record([previous], sign=-1)
+        trend_versions.bump_on_commit(*trend_scopes(previous))
+
+
+@receiver(post_save, sender=Review)
+def record_rating(sender, instance, **kwargs):
+    """Count a review saved one at a time in its company rating"""
+    CompanyRating.objects.record([instance])
+
+
+@receiver(post_delete, sender=Review)
+def leave_tombstone(sender, instance, using, **kwargs):
+    """Number the deletion of a review for the delta sync. Connected
+       before discard_rating, so the reviewer row is locked before the
+       company rating like when a review is written"""
+    ReviewTombstone.objects.using(using).create(
+        reviewer_id=instance.reviewer_id,
+        review_id=instance.pk,
+        sequence=Review.objects.next_sequence(
+            instance.reviewer_id, using=using
+        ),
+    )
+
+
+@receiver(post_delete, sender=get_user_model())
+def clear_tombstones(sender, instance, using, **kwargs):
+    """The reviews of a deleted user left tombstones nobody will
+       sync anymore"""
+    ReviewTombstone.objects.using(using).filter(
+        reviewer_id=instance.pk
+    ).delete()
+
+
+@receiver(post_delete, sender=Review)
+def discard_rating(sender, instance, **kwargs):
+    """Take a deleted review off its company rating"""
+    CompanyRating.objects.record([instance], sign=-1)
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_trend_versions(sender, instance, created=False, **kwargs):
+    """A changed or deleted review may be counted in closed trend
+       buckets. New reviews are always in the open ones"""
+    if not created:
+        trend_versions.bump_on_commit(*trend_scopes(instance))
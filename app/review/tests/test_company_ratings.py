@@ -0,0 +1,80 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import RATINGS, CompanyRating, Review
+
+
+REVIEW_URL = reverse('review:review-list')
+COMPANY_URL = reverse('review:company-list')
+
+
+def review_payload(rating, company='Test Company'):
+    return {
+        'title': 'Review %d' % rating,
+        'rating': rating,
+        'summary': 'Rated %d' % rating,
+        'company': company,
+    }
+
+
+class CompanyRatingApiTests(TestCase):
+    """Test the company rating summaries and their endpoint"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_ratings_follow_reviews(self):
+        """Test single and batch creates and deletes update
+           the summary, which matches the reviews"""
+        self.client.post(REVIEW_URL, review_payload(5))
+        self.client.post(REVIEW_URL, [
+            review_payload(4), review_payload(4),
+            review_payload(1, company='Other Company'),
+        ], format='json')
+        Review.objects.filter(rating=4).first().delete()
+
+        rating = CompanyRating.objects.get(company__name='Test Company')
+        self.assertEqual((rating.count, rating.rating_sum), (2, 9))
+        self.assertEqual(rating.distribution,
+                         {'1': 0, '2': 0, '3': 0, '4': 1, '5': 1})
+        self.assertEqual(rating.average, 4.5)
+        fields = ['count', 'rating_sum'] + [
+            'rating_%d' % value for value in RATINGS
+        ]
+        stored = {
+            summary.pk: {name: getattr(summary, name) for name in fields}
+            for summary in CompanyRating.objects.all()
+        }
+        self.assertEqual(len(stored), 2)
+        self.assertEqual(CompanyRating.objects.compute(), stored)
+
+    def test_company_ratings_endpoint(self):
+        """Test the summary of a company is found by name or id"""
+        self.client.post(REVIEW_URL, [
+            review_payload(5), review_payload(2),
+            review_payload(3, company='Other Company'),
+        ], format='json')
+
+        res = self.client.get(COMPANY_URL, {'name': 'test  company'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        summary = res.data['results'][0]
+        self.assertEqual(summary['name'], 'Test Company')
+        self.assertEqual(summary['count'], 2)
+        self.assertEqual(summary['average'], 3.5)
+        self.assertEqual(summary['distribution']['5'], 1)
+
+        res = self.client.get(
+            reverse('review:company-detail', args=[summary['id']])
+        )
+        self.assertEqual(res.data, summary)
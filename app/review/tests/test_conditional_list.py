@@ -0,0 +1,132 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Review
+from review.versioning import check_shared_versions, list_versions
+
+
+REVIEW_URL = reverse('review:review-list')
+
+
+def create_dummy_review(user, title='Review 1'):
+    """Simple function for creating reviews of a user"""
+    return Review.objects.create(
+        reviewer=user,
+        title=title,
+        rating=5,
+        summary='This is my first review!!!',
+        ip='190.190.190.1',
+        company=company_cache.get('Test Company'),
+    )
+
+
+class ConditionalReviewListTests(TransactionTestCase):
+    """Test the ETag/Last-Modified handling of the review list.
+       Versions are bumped on commit, so these tests run outside
+       of a wrapping transaction"""
+
+    def setUp(self):
+        list_versions.cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_unchanged_list_not_modified(self):
+        """Test that a known ETag gets a 304 without any query"""
+        create_dummy_review(self.user)
+        res = self.client.get(REVIEW_URL)
+        etag = res['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(REVIEW_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertIn('Last-Modified', res)
+
+    def test_changes_bump_version(self):
+        """Test that creating, batch creating and deleting reviews
+           change the ETag of the list"""
+        etags = [self.client.get(REVIEW_URL)['ETag']]
+        review = create_dummy_review(self.user)
+        etags.append(self.client.get(REVIEW_URL)['ETag'])
+        self.client.post(REVIEW_URL, [{
+            'title': 'Bulk review',
+            'rating': 4,
+            'summary': 'Created in a batch',
+            'company': 'Test Company'
+        }], format='json')
+        etags.append(self.client.get(REVIEW_URL)['ETag'])
+        review.delete()
+
+        res = self.client.get(REVIEW_URL, HTTP_IF_NONE_MATCH=etags[-1])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(set(etags + [res['ETag']])), 4)
+
+    def test_other_user_changes_keep_version(self):
+        """Test that reviews of another user don't change the list"""
+        etag = self.client.get(REVIEW_URL)['ETag']
+        other = get_user_model().objects.create_user('o@test.com', 'pass')
+        create_dummy_review(other)
+
+        res = self.client.get(REVIEW_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_etag_depends_on_query(self):
+        """Test that pages and searches of a list have their own ETag"""
+        create_dummy_review(self.user)
+        etag = self.client.get(REVIEW_URL)['ETag']
+
+        res = self.client.get(
+            REVIEW_URL, {'page_size': 1}, HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+
+    def test_versions_shared_between_workers(self):
+        """Test a write handled by one worker changes the ETag another
+           worker answers with, when both use a shared cache"""
+        shared = {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'shared-between-workers',
+        }
+        caches = {'default': shared, 'worker_a': shared, 'worker_b': shared}
+        with override_settings(CACHES=caches):
+            with patch.object(list_versions, 'alias', 'worker_b'):
+                etag = self.client.get(REVIEW_URL)['ETag']
+            with patch.object(list_versions, 'alias', 'worker_a'):
+                create_dummy_review(self.user)
+            with patch.object(list_versions, 'alias', 'worker_b'):
+                res = self.client.get(REVIEW_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+        # The default in-process cache isn't shared, deploys are warned
+        self.assertEqual([warning.id for warning in
+                          check_shared_versions(None)], ['review.W001'])
+
+    def test_modified_since_ignored(self):
+        """Test If-Modified-Since alone never gets a 304, it can't tell
+           apart two writes in the same second"""
+        res = self.client.get(REVIEW_URL)
+        create_dummy_review(self.user)
+
+        res = self.client.get(
+            REVIEW_URL, HTTP_IF_MODIFIED_SINCE=res['Last-Modified']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
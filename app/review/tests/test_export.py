@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+import tracemalloc
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Review
+from review.export import csv_lines, ndjson_lines
+from review.serializers import ReviewSerializer
+
+
+EXPORT_URL = reverse('review:review-export')
+
+
+def create_dummy_review(user, title='Review 1'):
+    """Simple function for creating reviews of a user"""
+    return Review.objects.create(
+        reviewer=user,
+        title=title,
+        rating=5,
+        summary='This is my "first" review,\nwith two lines',
+        ip='190.190.190.1',
+        company=company_cache.get('Test Company'),
+    )
+
+
+def synthetic_rows(count):
+    """Rows shaped like the export values_list, built lazily"""
+    date = datetime(2021, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        yield (i, 'Review %d' % i, 5, '190.190.190.1',
+               'x' * 200, date, 'Test Company')
+
+
+class ReviewExportApiTests(TestCase):
+    """Test the streaming export of the review API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_login_required(self):
+        """Check that login is required to export reviews"""
+        res = APIClient().get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_export_ndjson(self):
+        """Test every review of the user is exported as one JSON line,
+           rendered exactly like the list endpoint does"""
+        create_dummy_review(self.user, 'Review 1')
+        create_dummy_review(self.user, 'Review 2')
+        other = get_user_model().objects.create_user('o@test.com', 'pass')
+        create_dummy_review(other, 'Review X')
+
+        res = self.client.get(EXPORT_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        expected = ReviewSerializer(
+            Review.objects.filter(reviewer=self.user).order_by('-title'),
+            many=True
+        ).data
+        self.assertEqual([json.loads(line) for line in lines], expected)
+
+    def test_export_csv(self):
+        """Test reviews are exported as CSV with a header line"""
+        review = create_dummy_review(self.user)
+
+        res = self.client.get(EXPORT_URL, {'type': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        content = b''.join(res.streaming_content).decode()
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]['summary'], review.summary)
+        self.assertEqual(rows[0]['id'], str(review.id))
+
+    def test_export_invalid_type(self):
+        """Test that unknown export types are rejected"""
+        res = self.client.get(EXPORT_URL, {'type': 'xml'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_export_memory_bounded(self):
+        """Test that the memory used by the stream doesn't grow with
+           the number of rows. `manage.py benchmark export` checks the
+           same thing against 1M rows in the database"""
+        for stream in (ndjson_lines, csv_lines):
+            peaks = []
+            for count in (5000, 50000):
+                tracemalloc.start()
+                for _ in stream(synthetic_rows(count)):
+                    pass
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+
+            self.assertLess(peaks[1], 1024 * 1024, stream.__name__)
+            self.assertLess(peaks[1], peaks[0] * 1.5, stream.__name__)
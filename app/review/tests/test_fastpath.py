@@ -0,0 +1,133 @@
+import unittest
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Company, Review
+from review import renderers
+from review.fastpath import RowSerializer
+from review.renderers import FastJSONRenderer
+from review.serializers import ReviewSerializer
+from review.views import ReviewViewSet
+
+
+REVIEW_URL = reverse('review:review-list')
+
+# Characters that JSON encoders tend to escape differently
+TRICKY_SUMMARY = ('Quotes " \\ tabs\t lines\n\u2028\u2029 '
+                  'ctrl \x01\x1f \xf1 \U0001f600')
+
+
+def create_dummy_review(user, title='Review 1', summary='Nothing to say'):
+    """Simple function for creating reviews of a user"""
+    return Review.objects.create(
+        reviewer=user,
+        title=title,
+        rating=5,
+        summary=summary,
+        ip='190.190.190.1',
+        company=company_cache.get('Test Company'),
+    )
+
+
+class FastListParityTests(TestCase):
+    """Test that the fast list path renders the same bytes as
+       the regular ModelSerializer path"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+        for i in range(5):
+            create_dummy_review(self.user, 'Coffee %d' % i, TRICKY_SUMMARY)
+
+    def assertSameContent(self, url, params=None):
+        fast = self.client.get(url, params)
+        with patch.object(ReviewViewSet, 'fast_list', False):
+            slow = self.client.get(url, params)
+
+        self.assertEqual(fast.status_code, slow.status_code)
+        self.assertEqual(fast.content, slow.content)
+        return fast
+
+    def test_list_parity(self):
+        """Test full, sparse, searched and paginated lists"""
+        for params in [{}, {'fields': 'id,title,submission_date'},
+                       {'q': 'coffee'}, {'page_size': 2}]:
+            res = self.assertSameContent(REVIEW_URL, params)
+            if res.data['next']:
+                self.assertSameContent(res.data['next'])
+
+    @override_settings(TIME_ZONE='America/Argentina/Buenos_Aires')
+    def test_list_parity_time_zone(self):
+        """Test dates are converted to the current time zone alike"""
+        self.assertSameContent(REVIEW_URL)
+
+    def test_list_skips_instances(self):
+        """Test the page is rendered without model instances"""
+        with patch.object(Review, '__init__') as init:
+            self.client.get(REVIEW_URL)
+
+        init.assert_not_called()
+
+
+class RowSerializerTests(TestCase):
+    """Test the converters of the row serializer"""
+
+    def test_row_parity(self):
+        """Test rows render like instances, including null dates"""
+        user = get_user_model().objects.create_user('t@test.com', 'pass')
+        review = Review(
+            id=1, reviewer=user, title='Review', rating=3,
+            summary=TRICKY_SUMMARY, ip='10.0.0.1',
+            company=Company(name='Test Company'),
+            submission_date=datetime(2021, 5, 1, 12, 30, 15, 123456,
+                                     tzinfo=timezone.utc),
+        )
+        serializer = ReviewSerializer()
+        row = {field: getattr(review, field)
+               for field in ReviewSerializer.Meta.fields}
+        row['company__name'] = review.company.name
+
+        self.assertEqual(RowSerializer(serializer).to_representation([row]),
+                         [ReviewSerializer(review).data])
+
+        review.submission_date = row['submission_date'] = None
+        self.assertEqual(RowSerializer(serializer).to_representation([row]),
+                         [ReviewSerializer(review).data])
+
+
+class FastJSONRendererTests(TestCase):
+    """Test the orjson renderer matches JSONRenderer"""
+
+    @unittest.skipIf(renderers.orjson is None, 'orjson is not installed')
+    def test_renderer_parity(self):
+        """Test tricky strings and nested data encode to the same bytes"""
+        data = {
+            'results': [{'id': 1, 'summary': TRICKY_SUMMARY, 'ok': True}],
+            'next': None,
+            'date': datetime(2021, 5, 1, 12, 30, 15, 123456,
+                             tzinfo=timezone.utc),
+        }
+
+        for value in [data, {'big': 2 ** 70}]:
+            self.assertEqual(FastJSONRenderer().render(value),
+                             JSONRenderer().render(value))
+
+    def test_renderer_fallback(self):
+        """Test indented output is left to JSONRenderer"""
+        data = {'id': 1}
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(FastJSONRenderer().render(data, media_type),
+                         JSONRenderer().render(data, media_type))
@@ -0,0 +1,100 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.models import Review, ReviewTombstone
+from review.views import ReviewViewSet
+
+
+REVIEW_URL = reverse('review:review-list')
+
+# Plan nodes meaning the database read the whole table or sorted in memory
+BAD_PLAN_NODES = {
+    'postgresql': re.compile(r'Seq Scan|\bSort\b'),
+    'sqlite': re.compile(r'\bSCAN\b|TEMP B-TREE'),
+}
+
+
+def view_queryset(user):
+    """Return the queryset ReviewViewSet builds for a user"""
+    request = Request(APIRequestFactory().get(REVIEW_URL))
+    request.user = user
+    view = ReviewViewSet(request=request, format_kwarg=None)
+    return view.get_queryset()
+
+
+def query_plan(queryset):
+    """EXPLAIN a queryset. On PostgreSQL the planner is told to avoid
+       seq scans and sorts, so they only show up when no index can
+       serve the query, whatever the size of the test table"""
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute('SET LOCAL enable_sort = off')
+    return queryset.explain()
+
+
+class QueryPlanTests(TestCase):
+    """Check the review querysets are answered from an index"""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.paginator = ReviewViewSet.pagination_class()
+
+    def assertUsesIndex(self, queryset):
+        pattern = BAD_PLAN_NODES.get(connection.vendor)
+        if pattern is None:
+            self.skipTest('No plan checks for %s' % connection.vendor)
+        plan = query_plan(queryset)
+        self.assertIsNone(pattern.search(plan), plan)
+
+    def test_review_list_first_page_uses_index(self):
+        """Test the first page of the list needs no scan or sort"""
+        queryset = self.paginator.get_page_queryset(
+            view_queryset(self.user)
+        )
+
+        self.assertUsesIndex(queryset[:51])
+
+    def test_review_list_next_page_uses_index(self):
+        """Test seeking past a cursor needs no scan or sort"""
+        queryset = self.paginator.get_page_queryset(
+            view_queryset(self.user), ['Review 1', 10]
+        )
+
+        self.assertUsesIndex(queryset[:51])
+
+    def test_review_list_previous_page_uses_index(self):
+        """Test seeking backwards from a cursor needs no scan or sort"""
+        queryset = self.paginator.get_page_queryset(
+            view_queryset(self.user), ['Review 1', 10], reverse=True
+        )
+
+        self.assertUsesIndex(queryset[:51])
+
+    def test_reviews_by_date_use_index(self):
+        """Test listing a user's reviews by date needs no scan or sort"""
+        queryset = Review.objects.filter(
+            reviewer=self.user
+        ).order_by('submission_date')
+
+        self.assertUsesIndex(queryset)
+
+    def test_sync_changes_use_index(self):
+        """Test reading the changes past a sync cursor needs no scan
+           or sort"""
+        for model in (Review, ReviewTombstone):
+            queryset = model.objects.filter(
+                reviewer=self.user, sequence__gt=10
+            ).order_by('sequence')
+
+            self.assertUsesIndex(queryset[:51])
@@ -1,11 +1,14 @@
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.test import TestCase
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Review
+from core.companies import company_cache
+from core.models import Company, Review
 from review.serializers import ReviewSerializer
 
 
@@ -20,7 +23,7 @@ def create_dummy_review(user, title='Review 1'):
                 rating=5,
                 summary='This is my first review!!!',
                 ip='190.190.190.1',
-                company='Test Company',
+                company=company_cache.get('Test Company'),
                 )
     return review
 
@@ -61,7 +64,7 @@ class PrivateReviewApiTests(TestCase):
         serializer = ReviewSerializer(Reviews, many=True)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_review_limited_to_user(self):
         """Check that Reviews for the authenticated user are returned"""
@@ -76,8 +79,71 @@ class PrivateReviewApiTests(TestCase):
         res = self.client.get(REVIEW_URL)
 
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['title'], review1.title)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['title'], review1.title)
+
+    def test_review_list_paginated(self):
+        """Test walking the list with the next cursor returns every
+           review once, even when titles are repeated"""
+        for title in ['B', 'A', 'B', 'C', 'B', 'A', 'D']:
+            create_dummy_review(self.user, title)
+
+        res = self.client.get(REVIEW_URL, {'page_size': 3})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertIsNone(res.data['previous'])
+
+        ids = [item['id'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids.extend(item['id'] for item in res.data['results'])
+
+        expected = Review.objects.order_by('-title', 'id')
+        self.assertEqual(ids, [review.id for review in expected])
+
+    def test_review_list_previous_page(self):
+        """Test the previous cursor returns the page before"""
+        for i in range(5):
+            create_dummy_review(self.user, 'Review %d' % i)
+
+        first = self.client.get(REVIEW_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        res = self.client.get(second.data['previous'])
+
+        self.assertEqual(res.data['results'], first.data['results'])
+        self.assertIsNone(res.data['previous'])
+
+    def test_review_list_invalid_cursor(self):
+        """Test that a tampered cursor is rejected"""
+        res = self.client.get(REVIEW_URL, {'cursor': 'not-a-cursor'})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_review_list_sparse_fields(self):
+        """Test that ?fields= trims the output and the SQL projection"""
+        for i in range(3):
+            create_dummy_review(self.user, 'Review %d' % i)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(
+                REVIEW_URL, {'fields': 'id,title,rating', 'page_size': 2}
+            )
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('summary', queries[0]['sql'])
+
+        res = self.client.get(res.data['next'])
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(list(res.data['results'][0]),
+                         ['id', 'title', 'rating'])
+
+    def test_review_list_invalid_fields(self):
+        """Test that unknown or empty field lists are rejected"""
+        for fields in ['id,password', ',']:
+            res = self.client.get(REVIEW_URL, {'fields': fields})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_create_review_successful(self):
         """Check that Reviews are created"""
@@ -139,3 +205,111 @@ class PrivateReviewApiTests(TestCase):
         res = self.client.post(REVIEW_URL, payload)
 
         self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create_reviews(self):
+        """Test that a JSON array creates every review of the batch"""
+        payload = [
+            {
+                'title': 'Review %d' % i,
+                'rating': 4,
+                'summary': 'This is a bulk review',
+                'company': 'Test Company'
+            }
+            for i in range(3)
+        ]
+        res = self.client.post(
+            REVIEW_URL, payload, format='json', REMOTE_ADDR='10.0.0.1'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        reviews = Review.objects.filter(reviewer=self.user)
+        self.assertEqual(reviews.count(), 3)
+        self.assertEqual(set(reviews.values_list('ip', flat=True)),
+                         {'10.0.0.1'})
+
+    def test_bulk_create_reviews_invalid_item(self):
+        """Test that one invalid item rejects the whole batch
+           and its errors are reported at the item position"""
+        payload = [
+            {
+                'title': 'Review 1',
+                'rating': 4,
+                'summary': 'This is a bulk review',
+                'company': 'Test Company'
+            },
+            {
+                'title': 'Review 2',
+                'rating': 9,
+                'summary': 'This is a bulk review',
+                'company': 'Test Company'
+            },
+        ]
+        res = self.client.post(REVIEW_URL, payload, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data[0], {})
+        self.assertIn('rating', res.data[1])
+        self.assertFalse(Review.objects.exists())
+
+    def test_bulk_create_reviews_batch_limits(self):
+        """Test that empty and oversized batches are rejected"""
+        item = {
+            'title': 'Review 1',
+            'rating': 4,
+            'summary': 'This is a bulk review',
+            'company': 'Test Company'
+        }
+        max_size = ReviewSerializer.Meta.list_serializer_class.max_batch_size
+
+        res = self.client.post(REVIEW_URL, [], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            REVIEW_URL, [item] * (max_size + 1), format='json'
+        )
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Review.objects.exists())
+
+    def test_company_names_are_interned(self):
+        """Test spellings of one company name share its company,
+           which keeps the name it was first sent with"""
+        item = {
+            'title': 'Review 1',
+            'rating': 4,
+            'summary': 'This is a bulk review',
+        }
+        self.client.post(REVIEW_URL, dict(item, company='Test Company'))
+        res = self.client.post(REVIEW_URL, [
+            dict(item, company='test  COMPANY'),
+            dict(item, company='Other Company'),
+        ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(res.data[0]['company'], 'Test Company')
+        companies = Review.objects.values_list('company__name', flat=True)
+        self.assertEqual(sorted(companies),
+                         ['Other Company', 'Test Company', 'Test Company'])
+        self.assertEqual(Company.objects.count(), 2)
+
+    def test_rejected_reviews_create_no_company(self):
+        """Test companies named by rejected reviews aren't created,
+           only the ones of reviews that are saved"""
+        item = {'title': 'Review 1', 'rating': 9, 'summary': 'Too high'}
+        self.client.post(REVIEW_URL, dict(item, company='Orphan One'))
+        res = self.client.post(REVIEW_URL, [
+            dict(item, rating=4, company='Orphan Two'),
+            dict(item, company='Orphan Three'),
+        ], format='json')
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Company.objects.count(), 0)
+
+        res = self.client.post(REVIEW_URL, dict(
+            item, rating=4, company='Orphan One'
+        ))
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            list(Company.objects.values_list('name', flat=True)),
+            ['Orphan One']
+        )
@@ -0,0 +1,113 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Review
+
+
+REVIEW_URL = reverse('review:review-list')
+
+
+def create_dummy_review(user, title='Review 1', summary='Nothing to say'):
+    """Simple function for creating reviews of a user"""
+    return Review.objects.create(
+        reviewer=user,
+        title=title,
+        rating=5,
+        summary=summary,
+        ip='190.190.190.1',
+        company=company_cache.get('Test Company'),
+    )
+
+
+class ReviewSearchApiTests(TestCase):
+    """Test the full-text search of the review API"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def search(self, query, **params):
+        res = self.client.get(REVIEW_URL, dict(q=query, **params))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res
+
+    def test_search_title_and_summary(self):
+        """Test reviews matching in the title or the summary are found,
+           best match first, and other users' reviews are not"""
+        in_summary = create_dummy_review(
+            self.user, 'Slow delivery', 'The coffee machine arrived late'
+        )
+        in_title = create_dummy_review(self.user, 'Great coffee machines')
+        create_dummy_review(self.user, 'Nice chair', 'Very comfortable')
+        other = get_user_model().objects.create_user('o@test.com', 'pass')
+        create_dummy_review(other, 'Coffee machine')
+
+        res = self.search('coffee machine')
+
+        ids = [item['id'] for item in res.data['results']]
+        self.assertEqual(ids, [in_title.id, in_summary.id])
+
+    def test_search_paginated(self):
+        """Test walking search results with the next cursor"""
+        for i in range(5):
+            create_dummy_review(self.user, 'Review %d' % i, 'Coffee ' * i)
+
+        res = self.search('coffee', page_size=2)
+        ids = [item['id'] for item in res.data['results']]
+        while res.data['next']:
+            res = self.client.get(res.data['next'])
+            ids.extend(item['id'] for item in res.data['results'])
+
+        self.assertEqual(len(ids), 4)
+        self.assertEqual(len(set(ids)), 4)
+
+    def test_search_index_follows_writes(self):
+        """Test batch-created and updated reviews are searchable"""
+        payload = [{
+            'title': 'Bulk review',
+            'rating': 4,
+            'summary': 'Imported espresso notes',
+            'company': 'Test Company'
+        }]
+        self.client.post(REVIEW_URL, payload, format='json')
+        review = create_dummy_review(self.user, 'Old title')
+        review.title = 'Renamed espresso'
+        review.save()
+
+        res = self.search('espresso')
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(len(self.search('old').data['results']), 0)
+
+    def test_search_compressed_summary(self):
+        """Test summary words stay searchable after saves that leave the
+           compressed summary as it was loaded"""
+        review = create_dummy_review(self.user, 'Chair', 'Espresso ' * 50)
+        review = Review.objects.get(pk=review.pk)
+        review.title = 'Office chair'
+        review.save()
+        review.rating = 3
+        review.save(update_fields=['rating'])
+
+        res = self.search('espresso')
+
+        self.assertEqual([item['id'] for item in res.data['results']],
+                         [review.id])
+
+    def test_search_special_characters(self):
+        """Test that query syntax characters don't cause errors"""
+        create_dummy_review(self.user, 'Coffee')
+
+        self.search('"coffee* AND (')
+        res = self.search('!!!')
+
+        self.assertEqual(res.data['results'], [])
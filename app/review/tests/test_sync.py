@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Review
+from user.authentication import token_cache
+
+
+REVIEW_URL = reverse('review:review-list')
+ME_URL = reverse('user:me')
+
+
+def create_dummy_review(user, title='Review 1'):
+    """Simple function for creating reviews of a user"""
+    return Review.objects.create(
+        reviewer=user,
+        title=title,
+        rating=5,
+        summary='This is my first review!!!',
+        ip='190.190.190.1',
+        company=company_cache.get('Test Company'),
+    )
+
+
+class ReviewSyncApiTests(TestCase):
+    """Test the delta sync of the review list with ?since="""
+
+    def setUp(self):
+        token_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since, **params):
+        res = self.client.get(REVIEW_URL, dict(params, since=since))
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res.data
+
+    def test_sync_returns_changes_after_cursor(self):
+        """Test a first sync returns every review in the order they
+           were written, and the next one only what changed since"""
+        other_user = get_user_model().objects.create_user(
+            'other@test.com',
+            'password'
+        )
+        create_dummy_review(other_user, 'Not mine')
+        created = [create_dummy_review(self.user, 'Review %d' % i)
+                   for i in range(3)]
+
+        data = self.sync(0)
+        self.assertEqual([review['id'] for review in data['results']],
+                         [review.id for review in created])
+        self.assertEqual(data['deleted'], [])
+        self.assertFalse(data['more'])
+
+        self.assertEqual(self.sync(data['cursor'])['results'], [])
+
+        created[0].title = 'Changed'
+        created[0].save()
+        deleted_id = created[1].id
+        created[1].delete()
+        new = create_dummy_review(self.user, 'New')
+
+        data = self.sync(data['cursor'])
+        self.assertEqual([review['title'] for review in data['results']],
+                         ['Changed', 'New'])
+        self.assertEqual(data['results'][1]['id'], new.id)
+        self.assertEqual(data['deleted'], [deleted_id])
+
+    def test_sync_pages(self):
+        """Test a sync with more changes than the page size continues
+           from the cursor it returns"""
+        for i in range(5):
+            create_dummy_review(self.user, 'Review %d' % i)
+        Review.objects.filter(title='Review 1').delete()
+
+        data = self.sync(0, page_size=3)
+        self.assertTrue(data['more'])
+        self.assertEqual(len(data['results']), 3)
+
+        data = self.sync(data['cursor'], page_size=3)
+        self.assertFalse(data['more'])
+        self.assertEqual([review['title'] for review in data['results']],
+                         ['Review 4'])
+        self.assertEqual(len(data['deleted']), 1)
+
+    def test_sync_invalid_requests(self):
+        """Test malformed cursors and searches are refused"""
+        for params in ({'since': 'abc'}, {'since': -1},
+                       {'since': 0, 'q': 'review'}):
+            res = self.client.get(REVIEW_URL, params)
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_profile_update_keeps_sequence(self):
+        """Test saving a user loaded before its reviews were numbered,
+           like the cached one of PATCH /me, doesn't rewind the
+           sequence and clients don't miss the next review"""
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+        client.get(ME_URL)
+        first = [create_dummy_review(self.user, 'Review %d' % i)
+                 for i in range(2)]
+
+        res = client.patch(ME_URL, {'name': 'New name'})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        latest = create_dummy_review(self.user, 'Review 2')
+
+        self.assertEqual(latest.sequence, 3)
+        data = self.sync(first[0].sequence)
+        self.assertEqual([review['id'] for review in data['results']],
+                         [first[1].id, latest.id])
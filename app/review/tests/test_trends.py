@@ -0,0 +1,99 @@
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.companies import company_cache
+from core.models import Review
+from review.trends import review_trends
+
+
+TREND_URL = reverse('review:review-trend')
+YEAR_2020 = {'period': 'month', 'since': '2020-01-01', 'until': '2020-12-31'}
+
+
+def create_dated_review(user, rating, date):
+    """Create a review of a user submitted on `date`"""
+    review = Review.objects.create(
+        reviewer=user,
+        title='Review',
+        rating=rating,
+        summary='Dated review',
+        ip='190.190.190.1',
+        company=company_cache.get('Test Company'),
+    )
+    # submission_date is set on creation, move it afterwards
+    Review.objects.filter(pk=review.pk).update(submission_date=date)
+    return review
+
+
+class ReviewTrendApiTests(TransactionTestCase):
+    """Test the rating trends and their cache. Trend versions are
+       bumped on commit, so these tests run outside of a wrapping
+       transaction"""
+
+    def setUp(self):
+        review_trends.cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+        self.reviews = [
+            create_dated_review(self.user, rating, datetime(
+                2020, month, day, 12, tzinfo=timezone.utc
+            ))
+            for rating, month, day in [(4, 3, 10), (5, 3, 20), (1, 5, 1)]
+        ]
+
+    def month(self, res, month):
+        return res.data['results'][month - 1]
+
+    def test_monthly_trends(self):
+        """Test the reviewer and company trends count every month
+           of the range, empty ones included"""
+        company_id = self.reviews[0].company_id
+        company_url = reverse('review:company-trend', args=[company_id])
+
+        for url in (TREND_URL, company_url):
+            res = self.client.get(url, YEAR_2020)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data['results']), 12)
+            self.assertEqual(self.month(res, 3), {
+                'bucket': datetime(2020, 3, 1, tzinfo=timezone.utc),
+                'count': 2,
+                'average': 4.5,
+            })
+            self.assertEqual(self.month(res, 5)['average'], 1)
+            self.assertEqual(self.month(res, 1)['count'], 0)
+            self.assertIsNone(self.month(res, 1)['average'])
+
+        res = self.client.get(TREND_URL, dict(YEAR_2020, period='hour'))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_closed_buckets_cached(self):
+        """Test closed buckets are served without any query"""
+        self.client.get(TREND_URL, YEAR_2020)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TREND_URL, YEAR_2020)
+
+        self.assertEqual(self.month(res, 3)['count'], 2)
+
+    def test_deleted_review_updates_cached_trend(self):
+        """Test deleting a review in a closed bucket shows in the
+           next trend"""
+        self.client.get(TREND_URL, YEAR_2020)
+        self.reviews[1].delete()
+
+        res = self.client.get(TREND_URL, YEAR_2020)
+
+        self.assertEqual(self.month(res, 3)['count'], 1)
+        self.assertEqual(self.month(res, 3)['average'], 4)
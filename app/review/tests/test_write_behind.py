@@ -0,0 +1,87 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Review
+from review.ingest import review_queue
+
+
+REVIEW_URL = reverse('review:review-list')
+
+
+def review_payload(title='Review 1'):
+    return {
+        'title': title,
+        'rating': 4,
+        'summary': 'Written behind',
+        'company': 'Test Company'
+    }
+
+
+@override_settings(REVIEW_WRITE_BEHIND=True)
+class WriteBehindReviewApiTests(TransactionTestCase):
+    """Test the write-behind mode of review creation. The flusher
+       thread uses its own connection, so these tests commit"""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            'password'
+        )
+        self.client.force_authenticate(self.user)
+
+    def tearDown(self):
+        review_queue.stop()
+
+    def test_reviews_queued_and_written(self):
+        """Test single and batch creations answer 202 and are written
+           in batches once flushed"""
+        before = review_queue.stats()
+        res = self.client.post(REVIEW_URL, review_payload())
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(res.data['title'], 'Review 1')
+
+        res = self.client.post(REVIEW_URL, [
+            review_payload('Review %d' % i) for i in range(2, 5)
+        ], format='json', REMOTE_ADDR='10.0.0.1')
+        self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+
+        review_queue.stop()
+
+        reviews = Review.objects.filter(reviewer=self.user)
+        self.assertEqual(reviews.count(), 4)
+        self.assertEqual(reviews.filter(ip='10.0.0.1').count(), 3)
+        after = review_queue.stats()
+        self.assertEqual(after['written'] - before['written'], 4)
+        self.assertLessEqual(after['batches'] - before['batches'], 2)
+
+    def test_invalid_review_not_queued(self):
+        """Test validation still happens before answering"""
+        queued = review_queue.stats()['queued']
+        payload = review_payload()
+        payload['rating'] = 9
+
+        res = self.client.post(REVIEW_URL, payload)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(review_queue.stats()['queued'], queued)
+
+    def test_full_queue_backpressure(self):
+        """Test a full queue answers 429 with Retry-After and queues
+           nothing of the batch"""
+        with patch.object(review_queue, 'max_size', 2), \
+                patch.object(review_queue, 'put_timeout', 0):
+            res = self.client.post(REVIEW_URL, [
+                review_payload('Review %d' % i) for i in range(3)
+            ], format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '1')
+        review_queue.stop()
+        self.assertFalse(Review.objects.exists())
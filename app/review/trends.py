@@ -0,0 +1,156 @@
+"""Rating trends: review count and average rating per day, week or
+month, aggregated by the database.
+
+Buckets are in UTC. A bucket is closed once it ended more than
+`settle` ago, late commits included, and then never changes unless a
+review is changed, deleted or imported. Closed buckets are cached
+without expiry, grouped in one entry per year of bucket starts, under
+a version of the company or reviewer that such writes bump. Only the
+buckets still open are computed on every request.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from review.versioning import ListVersions
+
+
+PERIODS = ('day', 'week', 'month')
+
+
+def truncate(value, period):
+    """Start of the UTC bucket holding `value`"""
+    value = value.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    if period == 'week':
+        return value - timedelta(days=value.weekday())
+    if period == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def next_bucket(bucket, period):
+    """Start of the bucket following `bucket`"""
+    if period == 'day':
+        return bucket + timedelta(days=1)
+    if period == 'week':
+        return bucket + timedelta(days=7)
+    if bucket.month == 12:
+        return bucket.replace(year=bucket.year + 1, month=1)
+    return bucket.replace(month=bucket.month + 1)
+
+
+def first_bucket_of(year, period):
+    """Start of the first bucket starting in `year`"""
+    new_year = datetime(year, 1, 1, tzinfo=timezone.utc)
+    bucket = truncate(new_year, period)
+    return bucket if bucket == new_year else next_bucket(bucket, period)
+
+
+def aggregate(reviews, period, start, end):
+    """Return {bucket: (count, rating sum)} of the reviews submitted
+       in [start, end), computed with one GROUP BY query"""
+    rows = reviews.filter(
+        submission_date__gte=start, submission_date__lt=end
+    ).annotate(
+        bucket=Trunc('submission_date', period, tzinfo=timezone.utc)
+    ).values('bucket').annotate(
+        count=Count('id'), rating_sum=Sum('rating')
+    ).order_by('bucket')
+    return {
+        row['bucket']: (row['count'], row['rating_sum']) for row in rows
+    }
+
+
+def trend_scopes(review):
+    """Trend versions a change to `review` must bump"""
+    return ('company:%s' % review.company_id,
+            'reviewer:%s' % review.reviewer_id)
+
+
+class TrendCache:
+    """Serves trends from the cached closed buckets, computing and
+       caching the ones missing"""
+    key_prefix = 'review-trend:'
+    settle = timedelta(minutes=5)
+
+    def __init__(self, alias, versions):
+        self.alias = alias
+        self.versions = versions
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def series(self, reviews, scope, period, first, last):
+        """Return [(bucket, count, average)] for every bucket from the
+           one holding `first` to the one holding `last`. `reviews`
+           holds the reviews of `scope` only"""
+        first, last = truncate(first, period), truncate(last, period)
+        end = next_bucket(last, period)
+        closed_until = min(
+            truncate(timezone.now() - self.settle, period), end
+        )
+
+        buckets = {}
+        if first < closed_until:
+            buckets.update(self._closed(
+                reviews, scope, period, first, closed_until
+            ))
+        if closed_until < end:
+            buckets.update(aggregate(
+                reviews, period, max(first, closed_until), end
+            ))
+
+        series = []
+        bucket = first
+        while bucket < end:
+            count, rating_sum = buckets.get(bucket, (0, 0))
+            average = round(rating_sum / count, 2) if count else None
+            series.append((bucket, count, average))
+            bucket = next_bucket(bucket, period)
+        return series
+
+    def _closed(self, reviews, scope, period, first, closed_until):
+        """Closed buckets in [first, closed_until) from the per-year
+           cache entries, completing the entries that lag behind"""
+        version, _ = self.versions.get(scope)
+        keys = {
+            year: '%s%s:%s:%s:%d' % (self.key_prefix, scope, version,
+                                     period, year)
+            for year in range(first.year, closed_until.year + 1)
+        }
+        entries = self.cache.get_many(keys.values())
+
+        buckets = {}
+        updated = {}
+        for year, key in keys.items():
+            entry = entries.get(key) or {
+                'through': first_bucket_of(year, period), 'buckets': {},
+            }
+            through = min(first_bucket_of(year + 1, period), closed_until)
+            if entry['through'] < through:
+                entry['buckets'].update(aggregate(
+                    reviews, period, entry['through'], through
+                ))
+                entry['through'] = through
+                updated[key] = entry
+            buckets.update(entry['buckets'])
+        if updated:
+            self.cache.set_many(updated, None)
+        return buckets
+
+
+class TrendVersions(ListVersions):
+    """Version of the closed trend buckets of a company or reviewer,
+       bumped by writes that can land in a closed bucket"""
+    key_prefix = 'review-trend-version:'
+
+
+trend_versions = TrendVersions(settings.REVIEW_TREND_CACHE_ALIAS)
+review_trends = TrendCache(settings.REVIEW_TREND_CACHE_ALIAS, trend_versions)
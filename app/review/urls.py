@@ -6,6 +6,7 @@ from review import views
 
 router = DefaultRouter()
 router.register('reviews', views.ReviewViewSet)
+router.register('companies', views.CompanyRatingViewSet, basename='company')
 
 app_name = 'review'
 
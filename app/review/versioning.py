@@ -0,0 +1,79 @@
+import time
+
+from django.conf import settings
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+from core.routers import stick_to_primary
+
+
+class ListVersions:
+    """Per-user version counter of the review list, kept in a cache
+       shared between workers. Every change to the reviews of a user
+       bumps it, so an unchanged version means an unchanged list.
+
+       A missing counter (first use, or evicted) starts again from the
+       current time in microseconds, which is past any version handed
+       out before, so old ETags can't match it by accident"""
+    key_prefix = 'review-list-version:'
+
+    def __init__(self, alias):
+        self.alias = alias
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get(self, user_id):
+        """Return the (version, modified timestamp) of a user's list"""
+        version_key, modified_key = self._keys(user_id)
+        values = self.cache.get_many([version_key, modified_key])
+        if version_key not in values or modified_key not in values:
+            now = time.time()
+            self.cache.add(version_key, int(now * 1000000), None)
+            self.cache.add(modified_key, now, None)
+            values = self.cache.get_many([version_key, modified_key])
+        return values[version_key], values[modified_key]
+
+    def bump(self, *user_ids):
+        """Move the lists of the given users to a new version. Their
+           reads stick to the primary for a while, otherwise a replica
+           lagging behind would serve the old list under the new ETag"""
+        stick_to_primary(*user_ids)
+        now = time.time()
+        for user_id in set(user_ids):
+            version_key, modified_key = self._keys(user_id)
+            try:
+                self.cache.incr(version_key)
+            except ValueError:
+                self.cache.add(version_key, int(now * 1000000), None)
+            self.cache.set(modified_key, now, None)
+
+    def bump_on_commit(self, *user_ids):
+        """Bump once the current transaction commits, so a poll in
+           between can't pair the new version with the old rows"""
+        transaction.on_commit(lambda: self.bump(*user_ids))
+
+    def _keys(self, user_id):
+        prefix = '%s%s' % (self.key_prefix, user_id)
+        return prefix, prefix + ':modified'
+
+
+list_versions = ListVersions(settings.REVIEW_LIST_VERSION_CACHE_ALIAS)
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_shared_versions(app_configs, **kwargs):
+    """Versions kept in the memory of each worker let a worker that
+       didn't see a write answer 304 for a stale list"""
+    if isinstance(list_versions.cache, LocMemCache):
+        return [checks.Warning(
+            'The review list versions are kept in an in-process cache, '
+            'workers will disagree about them.',
+            hint='Set MEMCACHED_LOCATION, or point '
+                 'REVIEW_LIST_VERSION_CACHE_ALIAS to a shared cache.',
+            id='review.W001',
+        )]
+    return []
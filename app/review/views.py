@@ -1,10 +1,85 @@
-from rest_framework import viewsets, mixins
-from rest_framework.authentication import TokenAuthentication
+from collections import OrderedDict
+from datetime import datetime, time, timedelta
+from hashlib import md5
+from operator import itemgetter
+from queue import Full
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, \
+                              patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import status, viewsets, mixins
+from rest_framework.decorators import action
+from rest_framework.exceptions import Throttled, ValidationError
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import BrowsableAPIRenderer
+from rest_framework.response import Response
 
-from core.models import Review
+from core.models import CompanyRating, Review, ReviewTombstone, \
+                        canonical_company_name
+from core.search import search_reviews
 
 from review import serializers
+from review.export import EXPORTERS, EXPORT_COLUMNS
+from review.fastpath import RowSerializer
+from review.ingest import review_queue
+from review.pagination import KeysetPagination
+from review.renderers import FastJSONRenderer
+from review.trends import PERIODS, review_trends
+from review.versioning import list_versions
+from user.authentication import CachedTokenAuthentication
+
+
+# Most buckets a trend request may ask for
+MAX_TREND_BUCKETS = 1000
+_DAYS_PER_BUCKET = {'day': 1, 'week': 7, 'month': 28}
+
+
+def _trend_date(request, name, default):
+    value = request.query_params.get(name)
+    if value is None:
+        return default
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValidationError({name: [_('Use the YYYY-MM-DD format.')]})
+    return parsed
+
+
+def trend_response(request, reviews, scope):
+    """Rating trend of `reviews` per ?period= (day, week or month,
+       the default) between the ?since= and ?until= dates, the last
+       year by default"""
+    period = request.query_params.get('period', 'month')
+    if period not in PERIODS:
+        raise ValidationError({
+            'period': [_('Choose one of: %s.') % ', '.join(PERIODS)]
+        })
+    until = _trend_date(request, 'until', timezone.now().date())
+    since = _trend_date(request, 'since', until - timedelta(days=365))
+    if since > until:
+        raise ValidationError({'since': [_('Must not be after until.')]})
+    if (until - since).days / _DAYS_PER_BUCKET[period] > MAX_TREND_BUCKETS:
+        raise ValidationError({'since': [
+            _('Ask for at most %d buckets.') % MAX_TREND_BUCKETS
+        ]})
+
+    series = review_trends.series(
+        reviews, scope, period,
+        datetime.combine(since, time.min, tzinfo=timezone.utc),
+        datetime.combine(until, time.min, tzinfo=timezone.utc),
+    )
+    return Response({
+        'period': period,
+        'results': [
+            {'bucket': bucket, 'count': count, 'average': average}
+            for bucket, count, average in series
+        ],
+    })
 
 
 class ReviewViewSet(viewsets.GenericViewSet,
@@ -13,20 +88,287 @@ class ReviewViewSet(viewsets.GenericViewSet,
                     ):
     """Base ViewSet for creating and listing
        :model:`core.Review` Objects in the database"""
-    authentication_classes = (TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (IsAuthenticated,)
     queryset = Review.objects.all()
     serializer_class = serializers.ReviewSerializer
+    pagination_class = KeysetPagination
+    renderer_classes = (FastJSONRenderer, BrowsableAPIRenderer)
+    export_chunk_size = 2000
+    # Render list pages from .values() rows, see list_rows
+    fast_list = True
 
     def get_queryset(self):
-        """Return reviews for the current authenticated user only"""
-        return self.queryset.filter(
-                reviewer=self.request.user
-                ).order_by('-title')
+        """Return reviews for the current authenticated user only,
+           narrowed down by the ?q= full-text search if given"""
+        queryset = self.queryset.filter(reviewer=self.request.user)
+        fields = self.get_sparse_fields()
+        if fields is None or 'company' in fields:
+            queryset = queryset.select_related('company')
+        if fields is not None:
+            # The ordering columns are read by the pagination cursors
+            ordering = [field.lstrip('-') for field in self.get_ordering()]
+            queryset = queryset.only(*(
+                set(fields) | (set(ordering) - {'rank'})
+            ))
+        query = self.get_search_query()
+        if query:
+            queryset = search_reviews(queryset, query)
+        return queryset.order_by(*self.get_ordering())
+
+    def get_search_query(self):
+        return self.request.query_params.get('q', '').strip()
+
+    def get_sparse_fields(self):
+        """Fields picked with ?fields=a,b on the list, or None for all"""
+        # Views built outside of a request, like in the query plan
+        # tests, have no action
+        if getattr(self, 'action', None) != 'list' or \
+                'fields' not in self.request.query_params:
+            return None
+        fields = [
+            name.strip()
+            for name in self.request.query_params['fields'].split(',')
+            if name.strip()
+        ]
+        unknown = set(fields) - set(self.serializer_class.Meta.fields)
+        if not fields or unknown:
+            raise ValidationError({'fields': [
+                _('Choose among: %s.')
+                % ', '.join(self.serializer_class.Meta.fields)
+            ]})
+        return fields
+
+    def get_sync_cursor(self):
+        """Sequence number given with ?since= on the list, None when
+           the full list is asked for"""
+        params = self.request.query_params
+        if getattr(self, 'action', None) != 'list' or 'since' not in params:
+            return None
+        try:
+            since = int(params['since'])
+        except ValueError:
+            since = -1
+        if since < 0:
+            raise ValidationError({'since': [
+                _('Use 0 or the cursor returned by the last sync.')
+            ]})
+        return since
+
+    def get_ordering(self):
+        """Search results come best match first, synced changes in
+           the order they were made"""
+        if self.get_sync_cursor() is not None:
+            return ('sequence',)
+        if self.get_search_query():
+            return ('-rank', 'id')
+        return self.pagination_class.ordering
+
+    def list(self, request, *args, **kwargs):
+        """List the reviews, or answer 304 without touching the
+           database when the client already has this version"""
+        version, modified = list_versions.get(request.user.pk)
+        etag = self.get_list_etag(version)
+        # Only the ETag is compared: Last-Modified has a one second
+        # resolution, so If-Modified-Since would miss a write made in
+        # the same second as the previous poll
+        response = get_conditional_response(request, etag=etag)
+        if response is None and self.get_sync_cursor() is not None:
+            response = self.sync(request)
+        if response is None and self.fast_list:
+            response = self.list_rows(request)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(modified)
+        # Clients may keep the list but must check it is still current
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list_rows(self, request):
+        """Render the page straight from .values() rows, without
+           building model instances nor running every serializer
+           field. Returns None when the serializer can't be rendered
+           this way"""
+        serializer = self.get_serializer()
+        if not RowSerializer.supports(serializer):
+            return None
+        rows = RowSerializer(serializer)
+
+        # The ordering columns are read by the pagination cursors
+        ordering = [field.lstrip('-') for field in self.get_ordering()]
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *dict.fromkeys(rows.columns + ordering)
+        )
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(rows.to_representation(page))
+
+    def sync(self, request):
+        """Reviews created or changed and ids of the reviews deleted
+           after the ?since= cursor, oldest change first. Both are read
+           from (reviewer, sequence) indexes, so a sync costs as much
+           as the changes it returns. Clients ask again with the
+           returned cursor, right away while there are `more`"""
+        if self.get_search_query():
+            raise ValidationError({'q': [
+                _('Search is not available when syncing.')
+            ]})
+        since = self.get_sync_cursor()
+        limit = self.paginator.get_page_size(request)
+
+        reviews = self.get_queryset().filter(sequence__gt=since)
+        tombstones = ReviewTombstone.objects.filter(
+            reviewer=request.user, sequence__gt=since
+        ).order_by('sequence').values_list('sequence', 'review_id')
+        # Both share the sequence of the reviewer, so merging the first
+        # `limit` of each gives the first `limit` changes
+        changes = sorted(
+            [(review.sequence, review, None)
+             for review in reviews[:limit + 1]] +
+            [(sequence, None, review_id)
+             for sequence, review_id in tombstones[:limit + 1]],
+            key=itemgetter(0)
+        )
+        more = len(changes) > limit
+        changes = changes[:limit]
+
+        cursor = changes[-1][0] if changes else since
+        serializer = self.get_serializer(
+            [review for sequence, review, review_id in changes
+             if review is not None],
+            many=True
+        )
+        return Response(OrderedDict([
+            ('cursor', str(cursor)),
+            ('more', more),
+            ('results', serializer.data),
+            ('deleted', [
+                review_id for sequence, review, review_id in changes
+                if review is None
+            ]),
+        ]))
+
+    def get_list_etag(self, version):
+        """The same list version renders differently for each page,
+           search and media type"""
+        variant = md5(('%s|%s' % (
+            self.request.get_full_path(),
+            self.request.accepted_renderer.media_type
+        )).encode('utf-8')).hexdigest()[:16]
+        return '"%s-%s"' % (version, variant)
+
+    def get_serializer(self, *args, **kwargs):
+        """Accept a JSON array for creating a batch of reviews"""
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+        kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def create(self, request, *args, **kwargs):
+        """Create reviews, or queue them and answer 202 in the
+           write-behind mode"""
+        if not settings.REVIEW_WRITE_BEHIND:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        self.perform_create(serializer)
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
 
     def perform_create(self, serializer):
-        """Create a new Review"""
+        """Create a new Review, or every Review of a batch"""
+        if settings.REVIEW_WRITE_BEHIND:
+            return self.perform_queue(serializer)
         serializer.save(
                 reviewer=self.request.user,
                 ip=self.request.META['REMOTE_ADDR']
                 )
+
+    def perform_queue(self, serializer):
+        """Hand the validated reviews to the write-behind queue,
+           asking the client to slow down when it is full"""
+        items = serializer.validated_data
+        if not isinstance(items, list):
+            items = [items]
+        try:
+            review_queue.put_many([
+                Review(
+                    reviewer=self.request.user,
+                    ip=self.request.META['REMOTE_ADDR'],
+                    **attrs
+                )
+                for attrs in items
+            ])
+        except Full:
+            # Throttled joins the detail with str, a lazy one breaks it
+            raise Throttled(wait=1, detail=str(_(
+                'Too many reviews waiting to be saved, try again later.'
+            )))
+
+    def perform_content_negotiation(self, request, force=False):
+        """The export streams its own content type, so any Accept
+           header is fine for it"""
+        force = force or self.action == 'export'
+        return super().perform_content_negotiation(request, force)
+
+    @action(detail=False, methods=['get'])
+    def trend(self, request):
+        """Rating trend of the reviews of the user"""
+        return trend_response(
+            request, Review.objects.filter(reviewer=request.user),
+            'reviewer:%s' % request.user.pk
+        )
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """Stream every review of the user as NDJSON (default)
+           or CSV with ?type=csv"""
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in EXPORTERS:
+            raise ValidationError({
+                'type': [_('Choose one of: %s.') % ', '.join(EXPORTERS)]
+            })
+        stream, content_type = EXPORTERS[export_type]
+
+        rows = self.get_queryset().values_list(*EXPORT_COLUMNS).iterator(
+            chunk_size=self.export_chunk_size
+        )
+        response = StreamingHttpResponse(
+            stream(rows), content_type=content_type
+        )
+        response['Content-Disposition'] = \
+            'attachment; filename="reviews.%s"' % export_type
+        return response
+
+
+class CompanyRatingViewSet(viewsets.ReadOnlyModelViewSet):
+    """Rating summaries of the :model:`core.Company` Objects, read
+       from the summary table instead of aggregating the reviews.
+       Use ?name= to look a company up by name"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    queryset = CompanyRating.objects.select_related('company')
+    serializer_class = serializers.CompanyRatingSerializer
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        queryset = self.queryset
+        name = self.request.query_params.get('name')
+        if name:
+            queryset = queryset.filter(
+                company__canonical_name=canonical_company_name(name)
+            )
+        return queryset
+
+    def get_ordering(self):
+        return ('company_id',)
+
+    @action(detail=True, methods=['get'])
+    def trend(self, request, pk=None):
+        """Rating trend of the reviews of a company"""
+        company_id = self.get_object().company_id
+        return trend_response(
+            request, Review.objects.filter(company_id=company_id),
+            'company:%s' % company_id
+        )
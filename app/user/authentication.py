@@ -0,0 +1,130 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from rest_framework.authentication import TokenAuthentication
+
+from core.instrumentation import timing
+
+
+class TokenCache:
+    """Bounded LRU of resolved auth tokens whose entries expire after
+       a TTL, optionally backed by a cache shared between workers.
+
+       Signals only reach the process that made the change, so the TTL
+       is what bounds how long other workers may keep a stale entry"""
+    key_prefix = 'token-auth:'
+
+    def __init__(self, max_size, ttl, shared_alias=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.shared_alias = shared_alias
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.shared_hits = self.misses = 0
+
+    @property
+    def shared(self):
+        if self.shared_alias is None:
+            return None
+        return caches[self.shared_alias]
+
+    def get(self, key):
+        """Return the cached token for a key, or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+
+        token = None
+        if self.shared is not None:
+            token = self.shared.get(self.key_prefix + key)
+        with self._lock:
+            if token is None:
+                self.misses += 1
+                return None
+            self.shared_hits += 1
+        self._store(key, token, now)
+        return token
+
+    def set(self, key, token):
+        """Remember a token that was resolved from the database"""
+        self._store(key, token, time.monotonic())
+        if self.shared is not None:
+            self.shared.set(self.key_prefix + key, token, self.ttl)
+
+    def invalidate(self, *keys):
+        """Forget the given token keys in this worker and the shared tier"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+        if self.shared is not None and keys:
+            self.shared.delete_many([self.key_prefix + key for key in keys])
+
+    def invalidate_on_commit(self, *keys):
+        """Invalidate once the current transaction commits, so a request
+           reading the old row in between can't cache it again"""
+        transaction.on_commit(lambda: self.invalidate(*keys))
+
+    def clear(self):
+        """Forget every token held by this worker"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self):
+        """Hit/miss counters and the current size of the cache"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+            }
+
+    def _store(self, key, token, now):
+        with self._lock:
+            self._entries[key] = (token, now + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+token_cache = TokenCache(
+    max_size=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+    shared_alias=settings.TOKEN_CACHE_SHARED_ALIAS,
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Drop-in TokenAuthentication that skips the token and user
+       query for tokens it resolved recently"""
+    cache = token_cache
+
+    def authenticate(self, request):
+        with timing('auth'):
+            return super().authenticate(request)
+
+    def authenticate_credentials(self, key):
+        token = self.cache.get(key)
+        if token is None:
+            user, token = super().authenticate_credentials(key)
+            self.cache.set(key, token)
+
+        # Views may change request.user, so every request works on
+        # its own copy of the cached objects
+        token = copy.deepcopy(token)
+        return (token.user, token)
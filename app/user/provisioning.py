@@ -0,0 +1,75 @@
+"""Creating users in bulk.
+
+Password hashes (PBKDF2 by default) are slow on purpose, they are most
+of the time taken to create a user. provision_users hashes the
+passwords of a batch in a pool of processes, one per CPU, then inserts
+the users and their tokens with bulk_create in one transaction.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from rest_framework.authtoken.models import Token
+
+
+class HashingPool:
+    """Hash passwords in `workers` processes, one per CPU by default,
+       or in this process when there is a single worker.
+
+       Workers are spawned rather than forked, so they don't share the
+       database connections of this process. They read the hashers
+       from the settings module, settings overridden at runtime don't
+       reach them"""
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+
+    def __enter__(self):
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(
+                self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def hash(self, passwords):
+        """Hashes of `passwords`, in the same order"""
+        if self.executor is None:
+            return [make_password(password) for password in passwords]
+        # A few chunks per worker, so one slow chunk doesn't hold the
+        # batch while the other workers wait
+        chunksize = max(1, len(passwords) // (self.workers * 4))
+        return list(self.executor.map(
+            make_password, passwords, chunksize=chunksize
+        ))
+
+
+def provision_users(users, passwords, pool):
+    """Set the hashes of `passwords` on the unsaved `users`, then
+       insert them with an auth token each. Returns the saved users"""
+    for user, password in zip(users, pool.hash(passwords)):
+        user.password = password
+
+    User = get_user_model()
+    with transaction.atomic():
+        User.objects.bulk_create(users)
+        if users and users[0].pk is None:
+            # Only PostgreSQL returns the ids of bulk-created rows
+            ids = dict(User.objects.filter(
+                email__in=[user.email for user in users]
+            ).values_list('email', 'id'))
+            for user in users:
+                user.pk = ids[user.email]
+        Token.objects.bulk_create(
+            Token(key=Token.generate_key(), user=user) for user in users
+        )
+    return users
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token, TokenProxy
+
+from user.authentication import token_cache
+
+
+@receiver(post_save, sender=Token)
+@receiver(post_delete, sender=Token)
+@receiver(post_save, sender=TokenProxy)
+@receiver(post_delete, sender=TokenProxy)
+def invalidate_token(sender, instance, **kwargs):
+    """Forget a cached token when it is rotated or deleted.
+       Admin changes go through the TokenProxy sender"""
+    token_cache.invalidate_on_commit(instance.key)
+
+
+@receiver(post_save, sender=get_user_model())
+def invalidate_user_tokens(sender, instance, created, **kwargs):
+    """Forget the cached tokens of a user that was updated,
+       including changes to is_active"""
+    if created:
+        return
+    keys = Token.objects.filter(user=instance).values_list('key', flat=True)
+    token_cache.invalidate_on_commit(*list(keys))
@@ -0,0 +1,125 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.deletion import Collector
+from django.test import TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core.models import ReviewTombstone
+from user.authentication import TokenCache, token_cache
+
+
+ME_URL = reverse('user:me')
+TOKEN_CACHE_URL = reverse('user:token-cache')
+
+
+class CachedTokenAuthenticationTests(TransactionTestCase):
+    """Test the token cache used for authenticating API requests"""
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            'test@test.com',
+            '123456',
+            name='Test Name'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def test_cached_token_skips_queries(self):
+        """Test that a known token is resolved without the database"""
+        self.client.get(ME_URL)
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['email'], self.user.email)
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+
+    def test_deleted_token_is_invalidated(self):
+        """Test that a deleted token stops working right away"""
+        self.client.get(ME_URL)
+        self.token.delete()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_rolled_back_delete_keeps_token(self):
+        """Test that tokens are only forgotten once the change commits"""
+        self.client.get(ME_URL)
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.token.delete()
+            raise RuntimeError
+
+        with self.assertNumQueries(0):
+            res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_other_models_keep_fast_deletes(self):
+        """Test that the token signals don't listen to every model,
+           which would turn off fast deletes"""
+        collector = Collector(using='default')
+
+        self.assertTrue(
+            collector.can_fast_delete(ReviewTombstone.objects.all())
+        )
+
+    def test_inactive_user_is_invalidated(self):
+        """Test that deactivating a user stops their token right away"""
+        self.client.get(ME_URL)
+        self.user.is_active = False
+        self.user.save()
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_updated_user_is_invalidated(self):
+        """Test that profile updates are seen by the next request"""
+        self.client.get(ME_URL)
+        self.client.patch(ME_URL, {'name': 'New Name'})
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.data['name'], 'New Name')
+
+    def test_cache_stats_staff_only(self):
+        """Test that only staff users can read the cache counters"""
+        res = self.client.get(TOKEN_CACHE_URL)
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        res = self.client.get(TOKEN_CACHE_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('hits', res.data)
+        self.assertIn('misses', res.data)
+
+    @patch('time.monotonic')
+    def test_cache_bounded_and_expiring(self, monotonic):
+        """Test that the least recently used and expired
+           entries are dropped"""
+        monotonic.return_value = 100
+        cache = TokenCache(max_size=2, ttl=10)
+        cache.set('a', 'token a')
+        cache.set('b', 'token b')
+        cache.get('a')
+        cache.set('c', 'token c')
+
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 'token a')
+
+        monotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['size'], 1)
@@ -8,5 +8,10 @@ app_name = 'user'
 urlpatterns = [
     path('create/', views.CreateUserView.as_view(), name='create'),
     path('token/', views.CreateTokenView.as_view(), name='token'),
+    path(
+        'token/cache/',
+        views.TokenCacheStatsView.as_view(),
+        name='token-cache'
+    ),
     path('me/', views.ManageUserView.as_view(), name='me'),
 ]
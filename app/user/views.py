@@ -1,7 +1,10 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
+from user.authentication import CachedTokenAuthentication, token_cache
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -21,9 +24,19 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
     """Viewpoint for checking and updating an authenticated
        :model:`core.User` profile"""
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication,)
+    authentication_classes = (CachedTokenAuthentication,)
     permission_classes = (permissions.IsAuthenticated,)
 
     def get_object(self):
         """Use the model for the logged user"""
         return self.request.user
+
+
+class TokenCacheStatsView(APIView):
+    """Hit/miss counters of the authentication token cache
+       of this worker, only visible to staff users"""
+    authentication_classes = (CachedTokenAuthentication,)
+    permission_classes = (permissions.IsAdminUser,)
+
+    def get(self, request, format=None):
+        return Response(token_cache.stats())